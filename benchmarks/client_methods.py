@@ -0,0 +1,247 @@
+"""
+Benchmarks every PyAnimeList method against the local fake MAL server in benchmarks/fake_mal.py
+
+Usage: python benchmarks/client_methods.py [--requests 200] [--concurrency 10] [--size 100] [--latency 0.01]
+                                           [--compress] [--stream-parse]
+                                           [--only search_all_anime ...] [--json results.json]
+                                           [--baseline results.json --tolerance 0.2]
+
+The server runs in its own process and each method is benchmarked in a fresh process, so the peak RSS reported is the
+client's alone. Parse time is how long the ParseExecutor spent parsing per call (everything is parsed inline so it can
+be timed), methods that don't parse through it show "-". With --baseline the results are compared against an earlier
+--json run and the exit status is 1 if throughput or p50/p99 latency got worse by more than --tolerance.
+--compress has the server gzip its responses and --stream-parse makes the client parse them as they download, run
+with and without them to see what large list downloads cost in bytes and peak RSS. Wire bytes is the mean per call.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+# Lets the script be run from a checkout without installing pyanimelist
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_mal import add_arguments, from_arguments, redirect_client
+
+# Entries per call for the methods that take many at once
+BATCH = 10
+
+
+async def _iterate(client, username, series_type):
+    return [entry async for entry in client.iter_user_series(username, series_type)]
+
+
+async def _many_users(client, series_type):
+    return [result async for result in client.fetch_many_users(["user{}".format(i) for i in range(BATCH)], series_type)]
+
+
+def scenarios():
+    """
+    :return: The name of each benchmark and a function taking (client, call number) and returning the awaitable to
+             time, every public PyAnimeList method is covered
+    """
+    from pyanimelist import AnimeStatus, MangaStatus
+
+    return {
+        "verify_credentials": lambda client, i: client.verify_credentials(),
+        "search_all_anime": lambda client, i: client.search_all_anime("naruto"),
+        "search_all_manga": lambda client, i: client.search_all_manga("naruto"),
+        "add_anime": lambda client, i: client.add_anime(i, AnimeStatus.WATCHING, episode=1),
+        "add_manga": lambda client, i: client.add_manga(i, MangaStatus.READING, chapter=1),
+        "update_anime": lambda client, i: client.update_anime(i, episode=2, score=8),
+        "update_manga": lambda client, i: client.update_manga(i, chapter=2, score=8),
+        "delete_anime": lambda client, i: client.delete_anime(i),
+        "delete_manga": lambda client, i: client.delete_manga(i),
+        "bulk_update_anime": lambda client, i: client.bulk_update_anime(
+            [(i * BATCH + j, {"episode": j}) for j in range(BATCH)]
+        ),
+        "bulk_update_manga": lambda client, i: client.bulk_update_manga(
+            [(i * BATCH + j, {"chapter": j}) for j in range(BATCH)]
+        ),
+        "get_user_series[anime]": lambda client, i: client.get_user_series("bench", "anime"),
+        "get_user_series[manga]": lambda client, i: client.get_user_series("bench", "manga"),
+        "get_user_series[columnar]": lambda client, i: client.get_user_series("bench", "anime", columnar=True),
+        "iter_user_series": lambda client, i: _iterate(client, "bench", "anime"),
+        "get_user_data": lambda client, i: client.get_user_data("bench"),
+        "fetch_many_users[anime]": lambda client, i: _many_users(client, "anime"),
+        "fetch_many_users[data]": lambda client, i: _many_users(client, None)
+    }
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def peak_rss():
+    # ru_maxrss is in KiB on Linux but bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+async def benchmark(name, base_url, requests, concurrency, warmup, stream_parse=False):
+    from pyanimelist import PyAnimeList, ParseExecutor, Metrics, MemorySink
+
+    call = scenarios()[name]
+    # An infinite threshold parses everything inline, which is what lets the executor time it
+    executor = ParseExecutor(threshold=float("inf"))
+    latencies = []
+    entries = 0
+    errors = 0
+    with redirect_client(base_url):
+        sink = MemorySink()
+        async with PyAnimeList("bench", "bench", parse_executor=executor, stream_parse=stream_parse,
+                               metrics=Metrics(sink)) as client:
+            for i in range(warmup):
+                try:
+                    await call(client, i)
+                except Exception:
+                    pass
+            executor.inline = 0
+            executor.blocked = 0.0
+            sink.clear()
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def timed(i):
+                nonlocal entries, errors
+                async with semaphore:
+                    start = time.perf_counter()
+                    try:
+                        result = await call(client, warmup + i)
+                    except Exception:
+                        errors += 1
+                        return
+                    latencies.append(time.perf_counter() - start)
+                    if isinstance(result, list):
+                        entries += len(result)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(timed(i) for i in range(requests)))
+            elapsed = time.perf_counter() - start
+    latencies.sort()
+    wire = [histogram for (metric, _), histogram in sink.histograms.items() if metric == "pyanimelist_wire_bytes"]
+    calls = sum(histogram.count for histogram in wire)
+    return {
+        "method": name,
+        "calls": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed,
+        "entries_per_second": entries / elapsed,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "parse": executor.blocked / executor.inline if executor.inline else None,
+        "peak_rss": peak_rss(),
+        "wire_bytes": sum(histogram.sum for histogram in wire) / calls if calls else None
+    }
+
+
+def run_isolated(name, base_url, requests, concurrency, warmup, stream_parse, results):
+    results.put(asyncio.run(benchmark(name, base_url, requests, concurrency, warmup, stream_parse)))
+
+
+def serve(server_arguments, addresses):
+    async def run():
+        server = from_arguments(server_arguments)
+        addresses.put(await server.start())
+        await asyncio.Event().wait()
+    asyncio.run(run())
+
+
+def print_results(results, baseline):
+    print("{:<28}{:>7}{:>7}{:>10}{:>11}{:>9}{:>9}{:>9}{:>9}{:>10}".format(
+        "method", "calls", "errors", "calls/s", "entries/s", "p50 ms", "p99 ms", "parse ms", "RSS MiB", "wire KiB"
+    ))
+    for result in results:
+        parse = "-" if result["parse"] is None else "{:.3f}".format(result["parse"] * 1000)
+        wire = "-" if result.get("wire_bytes") is None else "{:.1f}".format(result["wire_bytes"] / 2 ** 10)
+        print("{:<28}{:>7}{:>7}{:>10.1f}{:>11.0f}{:>9.2f}{:>9.2f}{:>9}{:>9.1f}{:>10}".format(
+            result["method"], result["calls"], result["errors"], result["throughput"], result["entries_per_second"],
+            result["p50"] * 1000, result["p99"] * 1000, parse, result["peak_rss"] / 2 ** 20, wire
+        ))
+        previous = baseline.get(result["method"])
+        if previous is not None:
+            print("{:<28}{:>24}{:>+10.1%}{:>11}{:>+9.1%}{:>+9.1%}".format(
+                "", "vs baseline", result["throughput"] / previous["throughput"] - 1, "",
+                result["p50"] / previous["p50"] - 1, result["p99"] / previous["p99"] - 1
+            ))
+
+
+def regressions(results, baseline, tolerance):
+    """
+    :return: The methods whose throughput dropped or whose latency rose by more than tolerance against the baseline
+    """
+    regressed = []
+    for result in results:
+        previous = baseline.get(result["method"])
+        if previous is None:
+            continue
+        if result["throughput"] < previous["throughput"] * (1 - tolerance) or \
+                result["p50"] > previous["p50"] * (1 + tolerance) or result["p99"] > previous["p99"] * (1 + tolerance):
+            regressed.append(result["method"])
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="Timed calls per method")
+    parser.add_argument("--concurrency", type=int, default=10, help="Calls in flight at once")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed calls made first")
+    parser.add_argument("--only", nargs="+", default=None, help="Only benchmark these methods")
+    parser.add_argument("--json", default=None, help="Write the results to this file")
+    parser.add_argument("--baseline", default=None, help="Compare against results written by --json")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against the baseline")
+    parser.add_argument("--stream-parse", action="store_true", help="Parse responses as they download")
+    add_arguments(parser)
+    arguments = parser.parse_args()
+
+    names = arguments.only or list(scenarios())
+    unknown = set(names) - set(scenarios())
+    if unknown:
+        parser.error("unknown methods: {}".format(", ".join(sorted(unknown))))
+
+    context = multiprocessing.get_context("spawn")
+    addresses = context.Queue()
+    server = context.Process(target=serve, args=(arguments, addresses), daemon=True)
+    server.start()
+    try:
+        base_url = addresses.get(timeout=30)
+        results = []
+        for name in names:
+            queue = context.Queue()
+            process = context.Process(
+                target=run_isolated,
+                args=(name, base_url, arguments.requests, arguments.concurrency, arguments.warmup,
+                      arguments.stream_parse, queue)
+            )
+            process.start()
+            results.append(queue.get())
+            process.join()
+    finally:
+        server.terminate()
+        server.join()
+
+    baseline = {}
+    if arguments.baseline:
+        with open(arguments.baseline) as f:
+            baseline = {result["method"]: result for result in json.load(f)["results"]}
+    print("size={} latency={}s jitter={}s error_rate={} requests={} concurrency={} compress={} stream_parse={}".format(
+        arguments.size, arguments.latency, arguments.jitter, arguments.error_rate, arguments.requests,
+        arguments.concurrency, arguments.compress, arguments.stream_parse
+    ))
+    print_results(results, baseline)
+    if arguments.json:
+        with open(arguments.json, "w") as f:
+            json.dump({"arguments": vars(arguments), "results": results}, f, indent=2)
+    regressed = regressions(results, baseline, arguments.tolerance)
+    if regressed:
+        print("regressed by more than {:.0%}: {}".format(arguments.tolerance, ", ".join(regressed)))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
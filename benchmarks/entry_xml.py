@@ -0,0 +1,56 @@
+"""
+Compares building the add/update ``<entry>`` XML with the entry schemas against dicttoxml, which the client used before
+
+Usage: python benchmarks/entry_xml.py [count]
+
+dicttoxml is only needed to run this, it's in the Pipfile dev-packages
+"""
+import os
+import sys
+import timeit
+from datetime import date
+
+# Lets the script be run from a checkout without installing pyanimelist
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dicttoxml import dicttoxml
+
+from pyanimelist import ANIME_ENTRY, AnimeStatus
+
+# A typical update, a few numbers, a status, a date and some text
+FIELDS = {
+    "episode": 12,
+    "status": AnimeStatus.COMPLETED,
+    "score": 9,
+    "date_finish": date(2017, 3, 4),
+    "enable_rewatching": False,
+    "comments": "Rewatch the <good> bits & skip the recap",
+    "tags": ["mecha", "space"]
+}
+
+# dicttoxml can't take enums, dates or lists like the schema can so it gets the values already converted
+RAW_FIELDS = {
+    "episode": 12,
+    "status": 2,
+    "score": 9,
+    "date_finish": "03042017",
+    "enable_rewatching": 0,
+    "comments": "Rewatch the <good> bits & skip the recap",
+    "tags": "mecha,space"
+}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    old = min(timeit.repeat(
+        lambda: dicttoxml(RAW_FIELDS, attr_type=False, custom_root="entry").decode(), number=count, repeat=5
+    ))
+    new = min(timeit.repeat(lambda: ANIME_ENTRY.to_xml(FIELDS), number=count, repeat=5))
+    print("{} entries".format(count))
+    print("dicttoxml: {:>8.2f} us/entry".format(old / count * 1e6))
+    print("schema:    {:>8.2f} us/entry".format(new / count * 1e6))
+    print("speedup:   {:>8.1f}x".format(old / new))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+A local stand-in for the MAL endpoints pyanimelist talks to, so the client can be benchmarked offline
+
+Usage: python benchmarks/fake_mal.py [--port 8080] [--size 100] [--latency 0.05] [--error-rate 0.01]
+
+Search, malappinfo and verify_credentials responses are generated with ``size`` entries, or read from a directory of
+recorded responses when ``--recordings`` is given (``anime_search.xml``, ``manga_search.xml``,
+``malappinfo_anime.xml``, ``malappinfo_manga.xml``, ``malappinfo.xml`` and ``verify_credentials.xml``, any that are
+missing are generated). The add/update/delete endpoints accept everything.
+"""
+import argparse
+import asyncio
+import os
+import random
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from xml.sax.saxutils import escape
+
+from aiohttp import BasicAuth, web
+
+MAL_BASE = "https://myanimelist.net/"
+
+MYINFO = (
+    "<myinfo><user_id>1</user_id><user_name>bench</user_name><user_watching>3</user_watching>"
+    "<user_completed>40</user_completed><user_onhold>1</user_onhold><user_dropped>2</user_dropped>"
+    "<user_plantowatch>9</user_plantowatch><user_days_spent_watching>21.50</user_days_spent_watching></myinfo>"
+)
+
+SYNOPSIS = escape(
+    "Moments prior to Naruto Uzumaki's birth, a huge demon known as the [i]Kyuubi[/i] attacked Konohagakure."
+    "<br />[b]Naruto[/b] &quot;grows up&quot; shunned by the villagers.[Written by MAL Rewrite]" * 3
+)
+
+
+def user_series(size: int, series_type: str) -> bytes:
+    """
+    :return: A malappinfo response with ``size`` entries of series_type
+    """
+    parts = ['<?xml version="1.0" encoding="UTF-8"?><myanimelist>', MYINFO]
+    for i in range(size):
+        if series_type == "anime":
+            parts.append(
+                "<anime><series_animedb_id>{0}</series_animedb_id><series_title>Title {0}</series_title>"
+                "<series_synonyms>; Synonym {0}</series_synonyms><series_type>1</series_type>"
+                "<series_episodes>{1}</series_episodes><series_status>2</series_status>"
+                "<series_start>2004-10-05</series_start><series_end>2005-03-29</series_end>"
+                "<series_image>https://myanimelist.cdn-dena.com/images/anime/{0}.jpg</series_image>"
+                "<my_id>0</my_id><my_watched_episodes>{2}</my_watched_episodes><my_start_date>0000-00-00</my_start_date>"
+                "<my_finish_date>2010-01-01</my_finish_date><my_score>{3}</my_score><my_status>{4}</my_status>"
+                "<my_rewatching>0</my_rewatching><my_rewatching_ep>0</my_rewatching_ep>"
+                "<my_last_updated>{5}</my_last_updated><my_tags>mecha, space</my_tags></anime>".format(
+                    i, i % 50 + 1, i % 12, i % 11, (1, 2, 3, 4, 6)[i % 5], 1400000000 + i
+                )
+            )
+        else:
+            parts.append(
+                "<manga><series_mangadb_id>{0}</series_mangadb_id><series_title>Title {0}</series_title>"
+                "<series_synonyms>; Synonym {0}</series_synonyms><series_type>1</series_type>"
+                "<series_chapters>{1}</series_chapters><series_volumes>{2}</series_volumes>"
+                "<series_status>2</series_status><series_start>2004-10-05</series_start>"
+                "<series_end>0000-00-00</series_end>"
+                "<series_image>https://myanimelist.cdn-dena.com/images/manga/{0}.jpg</series_image>"
+                "<my_id>0</my_id><my_read_chapters>{3}</my_read_chapters><my_read_volumes>1</my_read_volumes>"
+                "<my_start_date>0000-00-00</my_start_date><my_finish_date>0000-00-00</my_finish_date>"
+                "<my_score>{4}</my_score><my_status>{5}</my_status><my_rereadingg>0</my_rereadingg>"
+                "<my_rereading_chap>0</my_rereading_chap><my_last_updated>{6}</my_last_updated>"
+                "<my_tags></my_tags></manga>".format(
+                    i, i % 200 + 1, i % 20 + 1, i % 30, i % 11, (1, 2, 3, 4, 6)[i % 5], 1400000000 + i
+                )
+            )
+    parts.append("</myanimelist>")
+    return "".join(parts).encode()
+
+
+def user_data() -> bytes:
+    """
+    :return: A malappinfo response without a list, what get_user_data gets
+    """
+    return '<?xml version="1.0" encoding="UTF-8"?><myanimelist>{}</myanimelist>'.format(MYINFO).encode()
+
+
+def search(size: int, series_type: str) -> bytes:
+    """
+    :return: A search.xml response with ``size`` entries of series_type
+    """
+    parts = ['<?xml version="1.0" encoding="utf-8"?><{}>'.format(series_type)]
+    for i in range(size):
+        if series_type == "anime":
+            counts = "<episodes>{}</episodes>".format(i % 50 + 1)
+        else:
+            counts = "<chapters>{}</chapters><volumes>{}</volumes>".format(i % 200 + 1, i % 20 + 1)
+        parts.append(
+            "<entry><id>{0}</id><title>Naruto {0}</title><english>Naruto {0}</english>"
+            "<synonyms>NARUTO; Naruto {0}</synonyms>{1}<score>7.{2}</score><type>TV</type>"
+            "<status>Finished Airing</status><start_date>2002-10-03</start_date><end_date>2007-02-08</end_date>"
+            "<synopsis>{3}</synopsis><image>https://myanimelist.cdn-dena.com/images/{4}/{0}.jpg</image>"
+            "</entry>".format(i, counts, i % 10, SYNOPSIS, series_type)
+        )
+    parts.append("</{}>".format(series_type))
+    return "".join(parts).encode()
+
+
+def verify_credentials() -> bytes:
+    return b'<?xml version="1.0" encoding="utf-8"?><user><id>1</id><username>bench</username></user>'
+
+
+class FakeMAL(object):
+
+    """
+    An aiohttp application answering like MAL does
+
+    Every request waits ``latency`` plus up to ``jitter`` seconds, then fails with ``error_status`` with a probability
+    of ``error_rate``. Bodies are built once per endpoint and reused.
+    """
+
+    def __init__(self, size: int = 100, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, retry_after: float = None, recordings: str = None, seed: int = None,
+                 compress: bool = False):
+        """
+        :param int size: How many entries search and malappinfo responses have
+        :param float latency: Seconds every response is delayed by
+        :param float jitter: Most extra seconds a response is randomly delayed by
+        :param float error_rate: The chance of any request failing
+        :param int error_status: The status failed requests get
+        :param float retry_after: Sent as Retry-After on failed requests when set
+        :param str recordings: A directory of recorded responses to serve instead of generated ones
+        :param int seed: Seeds the jitter and errors so runs are repeatable
+        :param bool compress: Compress XML responses when the client accepts gzip or deflate, like MAL's CDN does
+        """
+        self.size = size
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.recordings = recordings
+        self.random = random.Random(seed)
+        self.compress = compress
+        self.requests = 0
+        self.errors = 0
+        # Requests per Basic auth login
+        self.logins = Counter()
+        self._bodies = {}
+        self._runner = None
+
+    def body(self, name: str) -> bytes:
+        """
+        :param str name: The recording name of the response, like ``anime_search``
+        :return: The recorded response if there is one, a generated one otherwise
+        """
+        body = self._bodies.get(name)
+        if body is None:
+            path = os.path.join(self.recordings, name + ".xml") if self.recordings else None
+            if path is not None and os.path.exists(path):
+                with open(path, "rb") as f:
+                    body = f.read()
+            elif name.endswith("_search"):
+                body = search(self.size, name[:-len("_search")])
+            elif name.startswith("malappinfo_"):
+                body = user_series(self.size, name[len("malappinfo_"):])
+            elif name == "malappinfo":
+                body = user_data()
+            else:
+                body = verify_credentials()
+            self._bodies[name] = body
+        return body
+
+    async def _delay_or_fail(self):
+        self.requests += 1
+        delay = self.latency + self.random.random() * self.jitter
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            headers = {"Retry-After": str(self.retry_after)} if self.retry_after is not None else None
+            return web.Response(status=self.error_status, headers=headers)
+
+    def _xml(self, request: web.Request, name: str) -> web.Response:
+        body = self.body(name)
+        # Lets cached responses be revalidated, a body is only sent when it isn't the one the client already has
+        etag = '"{:08x}"'.format(zlib.crc32(body))
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        response = web.Response(body=body, content_type="text/xml", headers={"ETag": etag})
+        if self.compress:
+            # Picks gzip or deflate from the requests Accept-Encoding, left uncompressed if it has neither
+            response.enable_compression()
+        return response
+
+    async def _search(self, request: web.Request) -> web.Response:
+        return await self._delay_or_fail() or self._xml(request, request.match_info["type"] + "_search")
+
+    async def _malappinfo(self, request: web.Request) -> web.Response:
+        series_type = request.query.get("type")
+        name = "malappinfo_" + series_type if series_type in ("anime", "manga") else "malappinfo"
+        return await self._delay_or_fail() or self._xml(request, name)
+
+    async def _verify(self, request: web.Request) -> web.Response:
+        return await self._delay_or_fail() or self._xml(request, "verify_credentials")
+
+    async def _write(self, request: web.Request) -> web.Response:
+        failed = await self._delay_or_fail()
+        if failed is not None:
+            return failed
+        if request.match_info["action"] == "add":
+            return web.Response(status=201, text="Created")
+        return web.Response(text="Updated" if request.match_info["action"] == "update" else "Deleted")
+
+    def make_app(self) -> web.Application:
+        @web.middleware
+        async def count_login(request: web.Request, handler):
+            authorization = request.headers.get("Authorization")
+            if authorization is not None:
+                self.logins[BasicAuth.decode(authorization).login] += 1
+            return await handler(request)
+
+        app = web.Application(middlewares=[count_login])
+        app.router.add_get("/api/{type:anime|manga}/search.xml", self._search)
+        app.router.add_get("/api/account/verify_credentials.xml", self._verify)
+        app.router.add_get("/api/{list:animelist|mangalist}/{action:add|update|delete}/{id}.xml", self._write)
+        app.router.add_get("/malappinfo.php", self._malappinfo)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        Starts serving in the running event loop
+
+        :param str host: The address to listen on
+        :param int port: The port to listen on, 0 picks a free one
+        :return: The base URL of the server, to pass to :func:`redirect_client`
+        """
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        return "http://{}:{}/".format(host, port)
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+@contextmanager
+def redirect_client(base_url: str):
+    """
+    Points every MAL URL pyanimelist.client and pyanimelist.sync request at base_url instead, for as long as the block
+    runs
+
+    :param str base_url: Where a :class:`FakeMAL` is listening, like ``http://127.0.0.1:8080/``
+    """
+    from pyanimelist import client, sync
+
+    original = [
+        (module, name, value) for module in (client, sync) for name, value in vars(module).items()
+        if isinstance(value, str) and value.startswith(MAL_BASE)
+    ]
+    for module, name, value in original:
+        setattr(module, name, base_url + value[len(MAL_BASE):])
+    try:
+        yield
+    finally:
+        for module, name, value in original:
+            setattr(module, name, value)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--size", type=int, default=100, help="Entries per search/malappinfo response")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds every response is delayed by")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Most extra seconds a response is delayed by")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Chance of a request failing")
+    parser.add_argument("--error-status", type=int, default=503, help="Status failed requests get")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After sent with failures")
+    parser.add_argument("--recordings", default=None, help="Directory of recorded responses to serve")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the jitter and errors")
+    parser.add_argument("--compress", action="store_true", help="Compress responses for clients accepting gzip")
+
+
+def from_arguments(arguments: argparse.Namespace) -> FakeMAL:
+    return FakeMAL(
+        size=arguments.size, latency=arguments.latency, jitter=arguments.jitter, error_rate=arguments.error_rate,
+        error_status=arguments.error_status, retry_after=arguments.retry_after, recordings=arguments.recordings,
+        seed=arguments.seed, compress=arguments.compress
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    add_arguments(parser)
+    arguments = parser.parse_args()
+    web.run_app(from_arguments(arguments).make_app(), host=arguments.host, port=arguments.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
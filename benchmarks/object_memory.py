@@ -0,0 +1,81 @@
+"""
+Compares the memory used by the slotted, typed objects against the ``__dict__`` based ones they replaced
+
+Usage: python benchmarks/object_memory.py [count]
+"""
+import os
+import sys
+import tracemalloc
+
+# Lets the script be run from a checkout without installing pyanimelist
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyanimelist import Anime, Titles, Dates
+
+
+class DictTitles(object):
+
+    def __init__(self, jp, english, synonyms=None):
+        self.jp = jp
+        self.english = english
+        self.synonyms = synonyms or []
+
+
+class DictDates(object):
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+
+
+class DictAnime(object):
+
+    def __init__(self, **kwargs):
+        self.id = kwargs.get("id")
+        self.titles = kwargs.get("titles")
+        self.episode_count = kwargs.get("episode_count")
+        self.dates = kwargs.get("dates")
+        self.type = kwargs.get("type")
+        self.status = kwargs.get("status")
+        self.synopsis = kwargs.get("synopsis")
+        self.cover = kwargs.get("cover")
+
+
+def build(anime, titles, dates, count):
+    # Every value is a fresh string like it would be coming out of lxml
+    return [
+        anime(
+            id=str(100000 + i),
+            titles=titles("Title {}".format(i), "English {}".format(i), ["Synonym {}".format(i)]),
+            episode_count=str(i % 100),
+            dates=dates("2004-10-{:02d}".format(i % 28 + 1), "2005-03-{:02d}".format(i % 28 + 1)),
+            type="".join(["T", "V"]),
+            status="".join(["Finished ", "Airing"]),
+            synopsis=None,
+            cover="https://myanimelist.cdn-dena.com/images/anime/{}.jpg".format(i)
+        )
+        for i in range(count)
+    ]
+
+
+def measure(anime, titles, dates, count):
+    tracemalloc.start()
+    objects = build(anime, titles, dates, count)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return size
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    old = measure(DictAnime, DictTitles, DictDates, count)
+    new = measure(Anime, Titles, Dates, count)
+    print("{} anime objects".format(count))
+    print("__dict__: {:>10.1f} MiB ({:.0f} bytes/object)".format(old / 2 ** 20, old / count))
+    print("slotted:  {:>10.1f} MiB ({:.0f} bytes/object)".format(new / 2 ** 20, new / count))
+    print("saved:    {:>10.1%}".format(1 - new / old))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,3 +10,15 @@ from .objects import *
 from .constants import *
 from .abstractions import *
 from .enumerations import *
+from .cache import *
+from .bulk import *
+from .ratelimit import *
+from .columnar import *
+from .sync import *
+from .executor import *
+from .entries import *
+from .metrics import *
+from .index import *
+from .blocking import *
+from .writequeue import *
+from .scraper import *
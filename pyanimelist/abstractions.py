@@ -1,25 +1,34 @@
 from typing import List
-from datetime import datetime
+from datetime import date
 
+from .util.models import SlottedObject
+from .util.parsing import to_date
 
-class Titles(object):
+__all__ = ["Titles", "Dates"]
+
+
+class Titles(SlottedObject):
 
     """
     Abstraction class for the three versions of titles myanimelist keeps.
     """
 
+    __slots__ = ("jp", "english", "synonyms")
+
     def __init__(self, jp: str, english: str, synonyms: List[str] = None):
         self.jp = jp
         self.english = english
         self.synonyms = synonyms or []
 
 
-class Dates(object):
+class Dates(SlottedObject):
 
     """
-    Abstraction class for the dates myanimelist stores
+    Abstraction class for the dates myanimelist stores, unknown dates are None
     """
 
-    def __init__(self, start: datetime, end: datetime):
-        self.start = start
-        self.end = end
+    __slots__ = ("start", "end")
+
+    def __init__(self, start: date, end: date):
+        self.start = to_date(start)
+        self.end = to_date(end)
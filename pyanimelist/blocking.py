@@ -0,0 +1,283 @@
+import asyncio
+import concurrent.futures
+import copy
+import functools
+import os
+import threading
+from typing import Any, Awaitable, Callable, Iterable, Iterator, List, Sequence
+
+from .client import PyAnimeList
+
+__all__ = ["SyncPyAnimeList"]
+
+# Returned in place of raising StopAsyncIteration across the thread boundary
+_DONE = object()
+
+
+async def _next(iterator):
+    try:
+        return await iterator.__anext__()
+    except StopAsyncIteration:
+        return _DONE
+
+
+async def _close(iterator):
+    await iterator.aclose()
+
+
+async def _queue(method: Callable, args, kwargs) -> concurrent.futures.Future:
+    # Queued from inside the loop, the asyncio future it hands back is mirrored onto one other threads can wait on
+    result = concurrent.futures.Future()
+
+    def done(future: asyncio.Future):
+        if future.cancelled():
+            result.cancel()
+        elif future.exception() is not None:
+            result.set_exception(future.exception())
+        else:
+            result.set_result(future.result())
+    method(*args, **kwargs).add_done_callback(done)
+    return result
+
+
+def _blocking(name: str) -> Callable:
+    method = getattr(PyAnimeList, name)
+
+    @functools.wraps(method)
+    def call(self, *args, **kwargs):
+        return self.run(getattr(self.client, name)(*args, **kwargs))
+    call.__doc__ = "Blocking version of :meth:`pyanimelist.client.PyAnimeList.{}`\n{}".format(
+        name, method.__doc__ or ""
+    )
+    return call
+
+
+def _blocking_iterator(name: str) -> Callable:
+    method = getattr(PyAnimeList, name)
+
+    @functools.wraps(method)
+    def iterate(self, *args, **kwargs):
+        iterator = getattr(self.client, name)(*args, **kwargs)
+        try:
+            while True:
+                item = self.run(_next(iterator))
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            # Stopping early closes the async generator in the loop, which cancels whatever it still had going
+            if not self.closed:
+                self.run(_close(iterator))
+    iterate.__doc__ = "Blocking version of :meth:`pyanimelist.client.PyAnimeList.{}`, returns an iterator\n{}".format(
+        name, method.__doc__ or ""
+    )
+    return iterate
+
+
+def _write_behind(name: str) -> Callable:
+    method = getattr(PyAnimeList, name)
+
+    @functools.wraps(method)
+    def queue(self, *args, **kwargs) -> concurrent.futures.Future:
+        return self.run(_queue(getattr(self.client, name), args, kwargs))
+    queue.__doc__ = (
+        "Thread safe version of :meth:`pyanimelist.client.PyAnimeList.{}`, it returns once the update is queued and "
+        "the :class:`concurrent.futures.Future` it returns resolves once it's been sent\n{}"
+    ).format(name, method.__doc__ or "")
+    return queue
+
+
+class SyncPyAnimeList(object):
+
+    """
+    A blocking wrapper around :class:`pyanimelist.client.PyAnimeList` for code that isn't async, like Celery tasks
+    or cron jobs.
+
+    It owns one event loop running in a background thread and one client, so every call reuses the same pooled
+    connections instead of paying for a new loop and session like ``asyncio.run`` would. Every client method has a
+    blocking version of the same name, the async generators return plain iterators. It can be used from many threads
+    at once, their calls run concurrently in the loop.
+
+    If the process forks (prefork worker pools) the child starts its own loop and session on its first call, since
+    neither survives a fork, and the clients caches, rate limiter and write queue drop the state they inherited (an
+    :class:`pyanimelist.cache.HTTPCache` opens its own database connection). Updates the parent had waiting in the
+    write queue are left for the parent to send. A ``parse_executor`` with its own thread or process pool doesn't
+    survive a fork either, make the facade in the child when using one.
+    """
+
+    def __init__(self, username: str, password: str, timeout: float = None, **kwargs):
+        """
+        :param str username: The username of the account that is being used to access the API
+        :param str password: The password of the account that is being used to access the API
+        :param float timeout: How long in seconds a call is waited on before it's cancelled, None to wait forever
+        :param kwargs: Passed on to :class:`pyanimelist.client.PyAnimeList`
+        """
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._loop = None  # type: asyncio.AbstractEventLoop
+        self._thread = None  # type: threading.Thread
+        self._pid = None
+        self._inherited = []
+        self._closed = False
+        # The facade a for_user view was made from, whose loop it runs in
+        self._root = None  # type: SyncPyAnimeList
+        self._start()
+        self.client = self.run(self._create_client(username, password, kwargs))
+
+    @staticmethod
+    async def _create_client(username: str, password: str, kwargs) -> PyAnimeList:
+        # Made inside the loop so anything it creates belongs to the loop's thread
+        return PyAnimeList(username, password, **kwargs)
+
+    def _start(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="pyanimelist-loop", daemon=True)
+        self._thread.start()
+        self._pid = os.getpid()
+
+    def _ensure_loop(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked, the loop thread didn't come with us and the parents connections, database connection and
+                # in flight work aren't ours to use. They're kept alive but never touched, closing the loop or session
+                # would unregister the parents sockets from the epoll instance we share with it
+                self._inherited.append((self._loop, self.client._after_fork()))
+                self._start()
+
+    @property
+    def closed(self) -> bool:
+        """
+        If :meth:`close` has been called, on this facade or the one a view was made from
+        """
+        return (self._root or self)._closed
+
+    def for_user(self, username: str, password: str) -> "SyncPyAnimeList":
+        """
+        Blocking version of :meth:`pyanimelist.client.PyAnimeList.for_user`, the view acts as another account while
+        running in the same loop over the same connections. Closing a view does nothing
+
+        :param str username: The username of the account the view acts as
+        :param str password: The password of the account the view acts as
+        :rtype: SyncPyAnimeList
+        """
+        view = copy.copy(self)
+        view._root = self._root or self
+        view.client = self.client.for_user(username, password)
+        return view
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def run(self, awaitable: Awaitable, timeout: float = None) -> Any:
+        """
+        Runs a coroutine in the background loop and blocks until it's done, for anything without a blocking version
+        (``sync.run(sync.client.search_all_anime("naruto"))``)
+
+        :param awaitable: The coroutine to run
+        :param float timeout: Overrides :attr:`timeout` for this call
+        :raises concurrent.futures.TimeoutError: If it took longer than the timeout, it's cancelled
+        """
+        if self._root is not None:
+            return self._root.run(awaitable, timeout if timeout is not None else self.timeout)
+        if self._closed:
+            raise RuntimeError("SyncPyAnimeList is closed")
+        self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(awaitable, self._loop)
+        try:
+            return future.result(timeout if timeout is not None else self.timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def run_many(self, name: str, calls: Iterable[Sequence], concurrency: int = 10,
+                 return_exceptions: bool = False) -> List[Any]:
+        """
+        Calls a client method once per set of arguments, fanned out inside the loop, and blocks until every call is
+        done
+
+        :param str name: The name of the client method, like ``search_all_anime``
+        :param calls: The positional arguments of each call
+        :param int concurrency: How many calls run at once
+        :param bool return_exceptions: Put exceptions in the results instead of raising the first one
+        :return: The result of each call, in the order they were given
+        :rtype: list
+        """
+        method = getattr(self.client, name)
+
+        async def fan_out():
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def call(arguments):
+                async with semaphore:
+                    return await method(*arguments)
+            return await asyncio.gather(*(call(arguments) for arguments in calls), return_exceptions=return_exceptions)
+        return self.run(fan_out())
+
+    def search_many_anime(self, queries: Iterable[str], concurrency: int = 10) -> List[Any]:
+        """
+        Runs :meth:`search_all_anime` for many queries at once
+
+        :param queries: The search queries
+        :param int concurrency: How many searches run at once
+        :return: The results (or the exception raised) for each query, in order
+        :rtype: list
+        """
+        return self.run_many("search_all_anime", ((query,) for query in queries), concurrency, True)
+
+    def search_many_manga(self, queries: Iterable[str], concurrency: int = 10) -> List[Any]:
+        """
+        Runs :meth:`search_all_manga` for many queries at once
+
+        :param queries: The search queries
+        :param int concurrency: How many searches run at once
+        :return: The results (or the exception raised) for each query, in order
+        :rtype: list
+        """
+        return self.run_many("search_all_manga", ((query,) for query in queries), concurrency, True)
+
+    def close(self):
+        """
+        Closes the client's session and stops the background loop, the object can't be used afterwards
+        """
+        if self._closed or self._root is not None or self._loop is None:
+            return
+        # When forked before making a call the loop is the parents and still looks like it's running from here, so
+        # it's left alone like the rest of what we inherited
+        if self._pid == os.getpid():
+            self.run(self.client.close())
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+        self._closed = True
+
+    verify_credentials = _blocking("verify_credentials")
+    search_all_anime = _blocking("search_all_anime")
+    search_all_manga = _blocking("search_all_manga")
+    add_anime = _blocking("add_anime")
+    add_manga = _blocking("add_manga")
+    update_anime = _blocking("update_anime")
+    update_manga = _blocking("update_manga")
+    delete_anime = _blocking("delete_anime")
+    delete_manga = _blocking("delete_manga")
+    queue_update_anime = _write_behind("queue_update_anime")  # type: Callable[..., concurrent.futures.Future]
+    queue_update_manga = _write_behind("queue_update_manga")  # type: Callable[..., concurrent.futures.Future]
+    flush_writes = _blocking("flush_writes")
+    bulk_anime = _blocking("bulk_anime")
+    bulk_manga = _blocking("bulk_manga")
+    bulk_add_anime = _blocking("bulk_add_anime")
+    bulk_update_anime = _blocking("bulk_update_anime")
+    bulk_delete_anime = _blocking("bulk_delete_anime")
+    bulk_add_manga = _blocking("bulk_add_manga")
+    bulk_update_manga = _blocking("bulk_update_manga")
+    bulk_delete_manga = _blocking("bulk_delete_manga")
+    get_user_series = _blocking("get_user_series")
+    get_user_data = _blocking("get_user_data")
+    iter_search_anime = _blocking_iterator("iter_search_anime")  # type: Callable[..., Iterator]
+    iter_search_manga = _blocking_iterator("iter_search_manga")  # type: Callable[..., Iterator]
+    iter_user_series = _blocking_iterator("iter_user_series")  # type: Callable[..., Iterator]
+    fetch_many_users = _blocking_iterator("fetch_many_users")  # type: Callable[..., Iterator]
@@ -0,0 +1,74 @@
+from collections import OrderedDict, namedtuple
+from typing import Dict, Iterable, List, Tuple
+
+__all__ = ["BulkOperation", "BulkResult", "coalesce_operations"]
+
+ADD = "add"
+UPDATE = "update"
+DELETE = "delete"
+
+BulkOperation = namedtuple("BulkOperation", "action series_id fields")
+BulkOperation.__doc__ = """
+A single change to make to a list, action is one of ``"add"``, ``"update"`` or ``"delete"`` and fields are the
+keyword arguments that would be passed to the add/update method (they're ignored for deletes)
+"""
+
+BulkResult = namedtuple("BulkResult", "operation success error coalesced", defaults=(None,))
+BulkResult.__doc__ = """
+The outcome of a :class:`BulkOperation`, error is the exception that was raised if success is False.
+
+When operations on the same id were merged together (or replaced by a delete) only one request was sent for all of
+them, coalesced is the operation that was sent and success and error are its outcome, it's None when the operation
+was sent as it was given. Updates following a delete of the same id aren't sent at all, they fail with
+:class:`pyanimelist.errors.OperationDropped`
+"""
+
+# An operation which is going to be sent and the positions of every operation it stands in for
+_Planned = namedtuple("_Planned", "operation indexes")
+
+
+def _plan(operations: Iterable[BulkOperation]) -> Tuple[Dict[int, List[_Planned]], List[int]]:
+    """
+    Coalesces the operations as :func:`coalesce_operations` describes, remembering where each one went
+
+    :return: The operations left to run for each id with the input positions they cover, and the positions of the
+             operations that were dropped
+    """
+    grouped = OrderedDict()  # type: Dict[int, List[_Planned]]
+    dropped = []
+    for index, operation in enumerate(operations):
+        if operation.action not in (ADD, UPDATE, DELETE):
+            raise ValueError("Unknown bulk action {!r}".format(operation.action))
+        pending = grouped.setdefault(operation.series_id, [])
+        previous = pending[-1].operation if pending else None
+        if operation.action == DELETE:
+            pending[:] = [_Planned(operation, [i for planned in pending for i in planned.indexes] + [index])]
+        elif operation.action == UPDATE and previous is not None and previous.action == DELETE:
+            # There's nothing left to update once it's been deleted
+            dropped.append(index)
+        elif operation.action == UPDATE and previous is not None:
+            fields = dict(previous.fields)
+            fields.update(operation.fields)
+            pending[-1] = _Planned(previous._replace(fields=fields), pending[-1].indexes + [index])
+        else:
+            pending.append(_Planned(operation._replace(fields=dict(operation.fields or {})), [index]))
+    return grouped, dropped
+
+
+def coalesce_operations(operations: Iterable[BulkOperation]) -> Dict[int, List[BulkOperation]]:
+    """
+    Groups operations by series id and drops the redundant ones, keeping the order they were given in
+
+    * Updates following an add or update of the same id are merged into it, later fields win
+    * A delete replaces every operation on that id before it
+    * Updates following a delete of the same id are dropped
+    * An add following a delete is kept, it's run after the delete
+
+    :param operations: The operations being coalesced
+    :return: The remaining operations for each id, in the order they have to be run
+    :rtype: dict
+    """
+    grouped, _ = _plan(operations)
+    return OrderedDict(
+        (series_id, [planned.operation for planned in chain]) for series_id, chain in grouped.items()
+    )
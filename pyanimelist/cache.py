@@ -0,0 +1,558 @@
+import asyncio
+import copy
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict, namedtuple
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from .errors import InvalidCredentials
+
+__all__ = ["BaseCache", "MemoryCache", "ResponseCache", "HTTPCache", "CachedResponse", "CredentialCache"]
+
+
+def _handed_out(value: Any) -> Any:
+    # A shallow copy, so a caller sorting or appending to its list doesn't change what every later caller gets
+    return copy.copy(value)
+
+
+class BaseCache(object):
+
+    """
+    The interface a cache backend has to implement to be used by :class:`ResponseCache`, subclass this to store
+    results somewhere other than memory
+    """
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        :param key: The key the value was stored under
+        :return: A (found, value) tuple, found is False if the key is missing or has expired
+        :rtype: tuple
+        """
+        raise NotImplementedError
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        """
+        :param key: The key to store the value under
+        :param value: The value being stored
+        :param float ttl: How many seconds the value is valid for
+        """
+        raise NotImplementedError
+
+    def delete(self, key: Hashable):
+        """
+        :param key: The key to remove, does nothing if it isn't stored
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        """
+        Removes everything from the cache
+        """
+        raise NotImplementedError
+
+
+class MemoryCache(BaseCache):
+
+    """
+    An in memory LRU cache, once it holds ``max_size`` entries the least recently used one is evicted
+    """
+
+    def __init__(self, max_size: int = 1024):
+        """
+        :param int max_size: The maximum amount of entries kept at once
+        """
+        self.max_size = max_size
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        try:
+            expires, value = self._entries[key]
+        except KeyError:
+            return False, None
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        # Mark the entry as the most recently used
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class ResponseCache(object):
+
+    """
+    Caches the results of :class:`pyanimelist.PyAnimeList` calls, per endpoint, in front of a swappable backend.
+
+    Identical calls made while one is already in flight wait on that call instead of making their own request.
+
+    Every caller gets its own copy of the list of results, but the :class:`pyanimelist.objects.Anime` and
+    :class:`pyanimelist.objects.Manga` in it are shared by everyone getting the same result until it expires, treat
+    them as read-only.
+    """
+
+    #: How many seconds results are cached for by default, per endpoint
+    DEFAULT_TTLS = {
+        "anime_search": 3600,
+        "manga_search": 3600
+    }
+
+    def __init__(self, backend: BaseCache = None, ttls: Dict[str, float] = None, default_ttl: float = 300,
+                 metrics=None):
+        """
+        :param BaseCache backend: Where the results are stored, defaults to a :class:`MemoryCache`
+        :param dict ttls: Seconds results are cached for keyed by endpoint name, merged over :attr:`DEFAULT_TTLS`
+        :param float default_ttl: Seconds results are cached for when the endpoint has no ttl of its own
+        :param pyanimelist.metrics.Metrics metrics: Where hits and misses are reported, set by the client it's given
+                                                    to when None
+        """
+        self.backend = backend if backend is not None else MemoryCache()
+        self.ttls = dict(self.DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.default_ttl = default_ttl
+        self.metrics = metrics
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._in_flight = {}  # type: Dict[Tuple[str, str, str], asyncio.Future]
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """
+        Makes queries which MAL treats the same share a key, casing and surrounding/repeated whitespace are ignored
+
+        :param str query: The query being normalized
+        :rtype: str
+        """
+        return " ".join(query.casefold().split())
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        The hit, miss and coalesced request counters
+        """
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced}
+
+    async def fetch(self, endpoint: str, query: str, fetcher: Callable[[], Awaitable[Any]], variant: str = None) -> Any:
+        """
+        Returns the cached result for a query, calling fetcher to get (and cache) it if there isn't one
+
+        :param str endpoint: The name of the endpoint, used to pick the ttl
+        :param str query: The query the result is for
+        :param fetcher: A coroutine function which makes the actual request
+        :param str variant: Tells apart results for the same query which were built differently
+        """
+        key = (endpoint, self.normalize(query), variant)
+        found, value = self.backend.get(key)
+        if found:
+            self.hits += 1
+            if self.metrics is not None:
+                self.metrics.cache("response", "hit")
+            return _handed_out(value)
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            if self.metrics is not None:
+                self.metrics.cache("response", "coalesced")
+            # Shielded so one waiter being cancelled doesn't cancel the request for everyone else
+            return _handed_out(await asyncio.shield(in_flight))
+        self.misses += 1
+        if self.metrics is not None:
+            self.metrics.cache("response", "miss")
+        task = asyncio.ensure_future(self._fetch(key, fetcher))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._finished(key, done))
+        return _handed_out(await asyncio.shield(task))
+
+    async def _fetch(self, key: Tuple[str, str, str], fetcher: Callable[[], Awaitable[Any]]) -> Any:
+        value = await fetcher()
+        self.backend.set(key, value, self.ttls.get(key[0], self.default_ttl))
+        return value
+
+    def _finished(self, key: Tuple[str, str, str], task: asyncio.Future):
+        self._in_flight.pop(key, None)
+        # Retrieve the exception so it isn't logged as never retrieved if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def clear(self):
+        """
+        Removes every cached result and resets the counters
+        """
+        self.backend.clear()
+        self.hits = self.misses = self.coalesced = 0
+
+    def _after_fork(self) -> Any:
+        """
+        Drops the lookups the parent process had in flight, they belong to its loop. They're returned so the caller
+        can keep them alive instead of having them destroyed while pending
+        """
+        in_flight, self._in_flight = self._in_flight, {}
+        return in_flight
+
+
+CachedResponse = namedtuple("CachedResponse", "body etag last_modified stored")
+
+
+class HTTPCache(object):
+
+    """
+    A SQLite backed store of raw endpoint responses which survives restarts.
+
+    Bodies are kept zlib compressed along with the ETag and Last-Modified headers `myanimelist`_ sent, once an entry is
+    older than its endpoints ttl :class:`pyanimelist.PyAnimeList` revalidates it with a conditional GET, so an unchanged
+    response only costs a 304.
+
+    It also keeps what the last ``parsed_size`` stored responses were parsed into in memory, so a response that's
+    still fresh or comes back 304 isn't parsed again, those are dropped as soon as a new body is stored for their key.
+    Each call gets its own copy of the list, the series in it are shared between calls and should be treated as
+    read-only.
+
+    It can be used from any thread, like the loop thread of :class:`pyanimelist.blocking.SyncPyAnimeList` after being
+    made in the caller's, the connection is shared behind a lock. The client does its reads and writes in the loops
+    default executor so the loop isn't held up by SQLite or zlib.
+    """
+
+    #: How many seconds a stored response is used without revalidating it, per endpoint
+    DEFAULT_TTLS = {
+        "malappinfo": 60,
+        "anime_search": 3600,
+        "manga_search": 3600
+    }
+
+    def __init__(self, path: str, ttls: Dict[str, float] = None, compression_level: int = 6, parsed_size: int = 16):
+        """
+        :param str path: Where the SQLite database is kept, ``":memory:"`` works but won't survive restarts
+        :param dict ttls: Seconds responses are fresh for keyed by endpoint name, merged over :attr:`DEFAULT_TTLS`
+        :param int compression_level: The zlib level bodies are compressed with
+        :param int parsed_size: How many responses have their parsed results kept in memory, 0 to keep none
+        """
+        self.path = path
+        self.ttls = dict(self.DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.compression_level = compression_level
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.parsed_size = parsed_size
+        # Bumped every time a body is stored, parsed results are only handed out for the body they came from
+        self._generation = 0
+        self._generations = {}  # type: Dict[str, int]
+        self._parsed = OrderedDict()  # type: Dict[str, Tuple[int, Dict[Hashable, Any]]]
+        self._lock = threading.Lock()
+        self._connection = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, stored REAL NOT NULL, body BLOB NOT NULL)"
+        )
+        connection.commit()
+        return connection
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        The fresh hit, revalidated (304) and miss counters
+        """
+        return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses}
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """
+        :param str key: The url (with its query string) the response was stored for
+        :return: The stored response, or None if there isn't one
+        :rtype: CachedResponse
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT body, etag, last_modified, stored FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, stored = row
+        return CachedResponse(zlib.decompress(body), etag, last_modified, stored)
+
+    def head(self, key: str) -> Optional[CachedResponse]:
+        """
+        Like :meth:`get` without reading the body, which is None
+
+        :param str key: The url (with its query string) the response was stored for
+        :rtype: CachedResponse
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT etag, last_modified, stored FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        return CachedResponse(None, *row) if row is not None else None
+
+    def generation(self, key: str) -> int:
+        """
+        :param str key: The url (with its query string) the response was stored for
+        :return: Which body is stored for the key, it changes every time a new one is stored
+        :rtype: int
+        """
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def parsed(self, key: str, variant: Hashable) -> Tuple[bool, Any]:
+        """
+        :param str key: The url (with its query string) the response was stored for
+        :param variant: What the body was parsed into, like the parse function and its arguments
+        :return: If the stored body has been parsed into variant, and the result
+        :rtype: tuple
+        """
+        with self._lock:
+            entry = self._parsed.get(key)
+            if entry is None or entry[0] != self._generations.get(key, 0) or variant not in entry[1]:
+                return False, None
+            self._parsed.move_to_end(key)
+            return True, entry[1][variant]
+
+    def keep_parsed(self, key: str, variant: Hashable, generation: int, result: Any):
+        """
+        Keeps what a stored body was parsed into, it's ignored if another body has been stored since
+
+        :param str key: The url (with its query string) the response was stored for
+        :param variant: What the body was parsed into, like the parse function and its arguments
+        :param int generation: The :meth:`generation` of the body that was parsed
+        :param result: What it was parsed into
+        """
+        if self.parsed_size <= 0:
+            return
+        with self._lock:
+            if generation != self._generations.get(key, 0):
+                return
+            entry = self._parsed.get(key)
+            if entry is None or entry[0] != generation:
+                entry = self._parsed[key] = (generation, {})
+            entry[1][variant] = result
+            self._parsed.move_to_end(key)
+            while len(self._parsed) > self.parsed_size:
+                self._parsed.popitem(last=False)
+
+    def _forget(self, key: str) -> int:
+        # Called with the lock held whenever the body of a key changes
+        self._generation += 1
+        self._generations[key] = self._generation
+        self._parsed.pop(key, None)
+        return self._generation
+
+    def is_fresh(self, endpoint: str, cached: CachedResponse) -> bool:
+        """
+        :param str endpoint: The name of the endpoint, used to pick the ttl
+        :param CachedResponse cached: The stored response
+        :return: If the response can be used without revalidating it
+        :rtype: bool
+        """
+        return time.time() - cached.stored < self.ttls.get(endpoint, 0)
+
+    def set(self, key: str, body: bytes, etag: str = None, last_modified: str = None):
+        """
+        :param str key: The url (with its query string) the response is for
+        :param bytes body: The raw response body
+        :param str etag: The ETag header of the response
+        :param str last_modified: The Last-Modified header of the response
+        :return: The :meth:`generation` of the body
+        :rtype: int
+        """
+        compressed = zlib.compress(body, self.compression_level)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, etag, last_modified, stored, body) VALUES (?, ?, ?, ?, ?)",
+                (key, etag, last_modified, time.time(), compressed)
+            )
+            self._connection.commit()
+            return self._forget(key)
+
+    def touch(self, key: str):
+        """
+        Marks a stored response as fresh again, used once `myanimelist`_ says it hasn't changed
+
+        :param str key: The url (with its query string) the response was stored for
+        """
+        with self._lock:
+            self._connection.execute("UPDATE responses SET stored = ? WHERE key = ?", (time.time(), key))
+            self._connection.commit()
+
+    def delete(self, key: str):
+        """
+        :param str key: The url (with its query string) to forget the response for
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._connection.commit()
+            self._forget(key)
+
+    def clear(self):
+        """
+        Removes every stored response and resets the counters
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+            self._connection.commit()
+            for key in list(self._generations):
+                self._forget(key)
+            self._parsed.clear()
+        self.hits = self.revalidated = self.misses = 0
+
+    def close(self):
+        """
+        Closes the underlying database connection
+        """
+        with self._lock:
+            self._connection.close()
+
+    def _after_fork(self) -> Any:
+        """
+        Opens a connection of the child process's own, SQLite connections can't be used across a fork, and replaces
+        the lock which another thread of the parent could have been holding. The parent's connection is returned
+        instead of closed so the caller can keep it alive, it's never used again. A ``":memory:"`` database starts
+        out empty
+        """
+        self._lock = threading.Lock()
+        inherited, self._connection = self._connection, self._connect()
+        return inherited
+
+
+class CredentialCache(object):
+
+    """
+    Remembers the outcome of :meth:`pyanimelist.PyAnimeList.verify_credentials` per account, so services checking the
+    same accounts over and over only ask `myanimelist`_ once per ttl.
+
+    Accounts are keyed by a salted SHA-256 hash of their username and password, the passwords themselves are never
+    kept. Rejected credentials are remembered as well for ``negative_ttl`` so retrying a bad password doesn't hit MAL
+    each time, any other failure (MAL being down, a timeout) isn't cached. Checks of the same account made while one
+    is already in flight wait on it. Share one between the client and its :meth:`~pyanimelist.PyAnimeList.for_user`
+    views, which it is by default.
+    """
+
+    def __init__(self, ttl: float = 900, negative_ttl: float = 60, max_size: int = 10000, metrics=None):
+        """
+        :param float ttl: How many seconds verified credentials are trusted for
+        :param float negative_ttl: How many seconds rejected credentials are remembered for, 0 to not remember them
+        :param int max_size: The maximum amount of accounts kept at once, the least recently checked is evicted
+        :param pyanimelist.metrics.Metrics metrics: Where hits and misses are reported, set by the client it's given
+                                                    to when None
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.metrics = metrics
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries = MemoryCache(max_size)
+        self._in_flight = {}  # type: Dict[bytes, asyncio.Future]
+        # Per process, so the keys are useless outside of it
+        self._salt = os.urandom(16)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        The hit, miss and coalesced check counters
+        """
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced}
+
+    def key(self, username: str, password: str) -> bytes:
+        """
+        :return: What an account is stored under
+        :rtype: bytes
+        """
+        return hashlib.sha256(
+            self._salt + username.encode("utf-8") + b"\0" + password.encode("utf-8")
+        ).digest()
+
+    def _count(self, result: str):
+        if self.metrics is not None:
+            self.metrics.cache("credentials", result)
+
+    async def fetch(self, username: str, password: str, verifier: Callable[[], Awaitable[Tuple[str, str]]]
+                    ) -> Tuple[str, str]:
+        """
+        Returns the cached outcome for an account, calling verifier to check (and cache) it if there isn't one
+
+        :param str username: The username being checked
+        :param str password: The password being checked
+        :param verifier: A coroutine function which asks MAL, returning the id and username or raising
+                         :class:`pyanimelist.errors.InvalidCredentials`
+        :raises pyanimelist.errors.InvalidCredentials: If MAL rejected the credentials, now or within negative_ttl
+        """
+        key = self.key(username, password)
+        found, value = self._entries.get(key)
+        if found:
+            self.hits += 1
+            self._count("hit")
+            verified, result = value
+            if not verified:
+                raise InvalidCredentials(result)
+            return result
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            self._count("coalesced")
+            return await asyncio.shield(in_flight)
+        self.misses += 1
+        self._count("miss")
+        task = asyncio.ensure_future(self._fetch(key, verifier))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: bytes, verifier: Callable[[], Awaitable[Tuple[str, str]]]) -> Tuple[str, str]:
+        try:
+            result = await verifier()
+        except InvalidCredentials as e:
+            if self.negative_ttl > 0:
+                self._entries.set(key, (False, e.args[0] if e.args else None), self.negative_ttl)
+            raise
+        self._entries.set(key, (True, result), self.ttl)
+        return result
+
+    def _finished(self, key: bytes, task: asyncio.Future):
+        self._in_flight.pop(key, None)
+        # Retrieve the exception so it isn't logged as never retrieved if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def invalidate(self, username: str, password: str):
+        """
+        Forgets the outcome for an account, like after its password was changed
+        """
+        self._entries.delete(self.key(username, password))
+
+    def clear(self):
+        """
+        Forgets every account and resets the counters
+        """
+        self._entries.clear()
+        self.hits = self.misses = self.coalesced = 0
+
+    def _after_fork(self) -> Any:
+        """
+        Drops the checks the parent process had in flight, see :meth:`ResponseCache._after_fork`
+        """
+        in_flight, self._in_flight = self._in_flight, {}
+        return in_flight
@@ -1,16 +1,27 @@
-import html
-from datetime import datetime
-from typing import List, Tuple
+import asyncio
+import copy
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, Iterable, List, Tuple, Union
+from urllib.parse import urlencode
 
-import bs4
 import aiohttp
 from lxml import etree
-from dicttoxml import dicttoxml
 
-from util.web import fetch_url
-from .abstractions import Titles, Dates
-from .objects import Anime, Manga, UserInfo
-from .errors import InvalidSeriesTypeException, ResponseError, InvalidCredentials
+from .cache import ResponseCache, HTTPCache, CredentialCache
+from .ratelimit import RateLimiter, EndpointLimiter, parse_retry_after
+from .entries import ANIME_ENTRY, MANGA_ENTRY
+from .bulk import BulkOperation, BulkResult, ADD, UPDATE, DELETE, _plan as _plan_bulk
+from .util.parsing import drain_events, detach_events
+from .util.transfer import ACCEPT_ENCODING, BodyDecoder, decompresses
+from .objects import Anime, Manga, UserAnime, UserManga, UserInfo, UserSeries, UserResult
+from .columnar import UserList
+from .executor import ParseExecutor
+from .metrics import Metrics
+from .index import TitleIndex
+from .writequeue import WriteQueue
+from .scraper import Scraper
+from .errors import InvalidSeriesTypeException, ResponseError, InvalidCredentials, OperationDropped
 from .constants import (
     UA,
     MAL_APP_INFO,
@@ -27,115 +38,586 @@ from .constants import (
 
 __all__ = ["PyAnimeList"]  # We only want them to be able to import the Client from here
 
+# What each entry of a users list is built into
+_SERIES_TYPES = {
+    "anime": UserAnime,
+    "manga": UserManga
+}
+
+# Which rate limiter group each cacheable endpoint belongs to
+_ENDPOINT_GROUPS = {
+    "anime_search": "search",
+    "manga_search": "search",
+    "malappinfo": "malappinfo"
+}
+
+# How many bytes are read off the connection at once when a body is decompressed or parsed as it arrives
+_CHUNK_SIZE = 65536
+
 
 class PyAnimeList(object):
     """
     An asynchronous API wrapper for the MyAnimeList API (Which is awful, where's this new one we were promised?)
     """
-    def __init__(self, username: str, password: str, enable_scraper: bool = False, user_agent: str = None):
+    def __init__(self, username: str, password: str, enable_scraper: bool = False, user_agent: str = None,
+                 connection_limit: int = 100, connection_limit_per_host: int = 0, keepalive_timeout: float = 30,
+                 dns_cache_ttl: int = 300, session: aiohttp.ClientSession = None, cache: ResponseCache = None,
+                 http_cache: HTTPCache = None, rate_limiter: RateLimiter = None,
+                 parse_executor: ParseExecutor = None, metrics: Metrics = None, title_index: TitleIndex = None,
+                 credential_cache: CredentialCache = None, write_queue: WriteQueue = None,
+                 scraper_limiter: EndpointLimiter = None, stream_parse: bool = False):
         """
         :param str username: The username of the account that is being used to access the API
         :param str password: The password of the account that is being used to access the API
-        :param bool enable_scraper:
+        :param bool enable_scraper: Allows :attr:`scraper` to be used, it reads what the API doesn't return off
+                                    `myanimelist`_'s pages
         :param str user_agent: UserAgent of the application
+        :param int connection_limit: Total amount of simultaneous connections kept in the pool (0 for no limit)
+        :param int connection_limit_per_host: Amount of simultaneous connections to a single host (0 for no limit)
+        :param float keepalive_timeout: How long in seconds an idle connection is kept alive for reuse
+        :param int dns_cache_ttl: How long in seconds resolved DNS entries are cached for (None to cache forever)
+        :param aiohttp.ClientSession session: An existing session to use instead of creating our own,
+                                              it won't be closed by :meth:`close`
+        :param ResponseCache cache: Caches search results when passed, nothing is cached by default
+        :param HTTPCache http_cache: Stores raw search and malappinfo responses on disk and revalidates them with
+                                     conditional requests, nothing is stored by default
+        :param RateLimiter rate_limiter: Limits how fast requests are made and retries throttled ones when passed
+        :param ParseExecutor parse_executor: Decides which responses are parsed off the event loop, by default bodies
+                                             of 256KiB or more are parsed in the loops default executor
+        :param Metrics metrics: Records timings, sizes, retries and cache results of every request when passed, the
+                                cache and parse executor report to it as well unless they already have metrics
+        :param TitleIndex title_index: Learns the titles of every search result and users list entry the client sees,
+                                       searches can be answered from it with ``from_index=True``
+        :param CredentialCache credential_cache: Remembers what :meth:`verify_credentials` found out per account when
+                                                 passed, every call asks MAL by default
+        :param WriteQueue write_queue: Merges and delays the updates made with :meth:`queue_update_anime` and
+                                       :meth:`queue_update_manga` when passed, they're sent straight away by default
+        :param EndpointLimiter scraper_limiter: Limits how fast :attr:`scraper` fetches pages, see
+                                                :class:`pyanimelist.scraper.Scraper` for the default
+        :param bool stream_parse: Feed searches and malappinfo responses into lxml as they download and decompress
+                                  instead of reading the whole body first, so the body is never held whole. Parsing
+                                  then happens on the event loop a chunk at a time, and the objects are built from
+                                  the tree through :attr:`parse_executor`, it's ignored when there's a
+                                  :attr:`http_cache`
         """
         self.user_agent = user_agent or UA
         self._auth = aiohttp.BasicAuth(login=username, password=password)
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self._session = session
+        self._owns_session = session is None
+        # Our own sessions leave decompressing to us so the bytes on the wire can be counted, a session we're given
+        # usually does it itself
+        self._raw_bodies = session is not None and not decompresses(session)
+        self.stream_parse = stream_parse
+        self.cache = cache
+        self.http_cache = http_cache
+        self.rate_limiter = rate_limiter
+        self.parse_executor = parse_executor or ParseExecutor()
+        self.metrics = metrics
+        self.title_index = title_index
+        self.credential_cache = credential_cache
+        self.write_queue = write_queue
+        self.scraper = Scraper(self, enable_scraper, scraper_limiter)
+        # The client a for_user view was made from, its session is the one the view uses
+        self._parent = None  # type: PyAnimeList
+        if metrics is not None:
+            if cache is not None and cache.metrics is None:
+                cache.metrics = metrics
+            if credential_cache is not None and credential_cache.metrics is None:
+                credential_cache.metrics = metrics
+            if self.parse_executor.metrics is None:
+                self.parse_executor.metrics = metrics
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        The shared :class:`aiohttp.ClientSession` every request goes through, created on first use so it's bound to the
+        running event loop. Views made by :meth:`for_user` use the session of the client they were made from
+        """
+        if self._parent is not None:
+            return self._parent.session
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.connection_limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+                use_dns_cache=True
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                auth=self._auth,
+                headers={"User-Agent": self.user_agent, "Accept-Encoding": ACCEPT_ENCODING},
+                trace_configs=[self.metrics.trace_config()] if self.metrics is not None else None,
+                auto_decompress=False
+            )
+            self._owns_session = True
+            self._raw_bodies = True
+        return self._session
+
+    def for_user(self, username: str, password: str) -> "PyAnimeList":
+        """
+        Makes a view of the client which acts as another account, for services working on behalf of many users.
+
+        The view goes through the same session and connection pool as this client and shares its caches, rate
+        limiter, parse executor, metrics and title index, only the Basic auth sent with its requests differs. Views
+        are cheap to make, and closing one does nothing, the pool is closed along with this client.
+
+        :param str username: The username of the account the view acts as
+        :param str password: The password of the account the view acts as
+        :rtype: PyAnimeList
+        """
+        view = copy.copy(self)
+        view._auth = aiohttp.BasicAuth(login=username, password=password)
+        view._parent = self._parent or self
+        view._session = None
+        view._owns_session = False
+        return view
+
+    async def close(self):
+        """
+        Closes the shared session and every pooled connection it holds, a new one is made if the client is used again.
+        Anything waiting in :attr:`write_queue` is sent first
+        """
+        if self._parent is not None:
+            return
+        if self.write_queue is not None:
+            await self.write_queue.flush()
+        if self._session is not None and self._owns_session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _after_fork(self) -> List[Any]:
+        """
+        Called in a forked child before the client is used from a new loop, everything bound to the parent's loop or
+        process is replaced: the session and its connections, and the in flight state, locks and database connection
+        of the caches, rate limiters and write queue. A parse executor given to the client isn't replaced, pools of
+        threads or processes don't survive a fork, make the client in the child when using one
+
+        :return: What was dropped, for the caller to keep alive instead of having it destroyed, it can't be closed
+                 without affecting the parent
+        """
+        inherited = [self._session]
+        self._session = None
+        components = [self.cache, self.http_cache, self.credential_cache, self.write_queue, self.rate_limiter,
+                      self.scraper.limiter]
+        inherited.extend(component._after_fork() for component in components if component is not None)
+        return inherited
+
+    @asynccontextmanager
+    async def _request(self, group: str, url: str, params: Dict[str, str] = None, headers: Dict[str, str] = None,
+                       endpoint: str = None):
+        """
+        Makes a GET request through the shared session, every request the client makes goes through here.
+
+        When there's a :attr:`rate_limiter` the request waits for its groups limiter first and throttled responses
+        are retried with backoff, the last response is handed back if it's still throttled after every retry.
+
+        :param str group: The group of endpoints the request is for, see :class:`pyanimelist.ratelimit.RateLimiter`
+        :param str url: The URL being requested
+        :param dict params: The query string parameters
+        :param dict headers: Extra headers for this request
+        :param str endpoint: What the request is for in :attr:`metrics`, the group by default
+        """
+        limiter = self.rate_limiter
+        metrics = self.metrics
+        endpoint = endpoint or group
+        # Only tag requests for the trace config when something is listening
+        kwargs = {"trace_request_ctx": endpoint} if metrics is not None else {}
+        if self._parent is not None:
+            # Views share their parents session, so their own credentials are sent per request
+            kwargs["auth"] = self._auth
+        if limiter is None:
+            async with self.session.get(url, params=params, headers=headers, **kwargs) as response:
+                yield response
+            return
+        attempt = 0
+        while True:
+            await limiter.acquire(group)
+            try:
+                response = await self.session.get(url, params=params, headers=headers, **kwargs)
+            except BaseException:
+                limiter.release(group)
+                raise
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if limiter.should_retry(response.status, attempt, group):
+                response.release()
+                limiter.release(group, response.status, retry_after)
+                limiter.retries += 1
+                if metrics is not None:
+                    metrics.retried(endpoint, response.status)
+                await asyncio.sleep(limiter.backoff(attempt, retry_after))
+                attempt += 1
+                continue
+            try:
+                yield response
+            finally:
+                response.release()
+                limiter.release(group, response.status, retry_after)
+            return
+
+    async def _read(self, endpoint: str, url: str, params: Dict[str, str] = None) -> bytes:
+        """
+        Gets the body of a GET request which should return 200
+
+        :param str endpoint: The name of the endpoint
+        :param str url: The URL being requested
+        :param dict params: The query string parameters
+        :rtype: bytes
+        """
+        async with self._request(_ENDPOINT_GROUPS[endpoint], url, params=params, endpoint=endpoint) as response:
+            # Raise an error if we get the wrong response code
+            if response.status != 200:
+                raise ResponseError(response.status)
+            return await self._read_body(endpoint, response)
+
+    async def _read_cached(self, endpoint: str, url: str, params: Dict[str, str], key: str,
+                           variant: Hashable) -> Tuple[bool, Any, bytes, int]:
+        """
+        Gets the body of a GET request which should return 200 through :attr:`http_cache`. When the stored response is
+        still fresh or `myanimelist`_ says it hasn't changed, what it was already parsed into for variant is handed
+        back instead of its body when there is one. SQLite and zlib are run in the loops default executor.
+
+        :param str endpoint: The name of the endpoint, used to pick the cache ttl
+        :param str url: The URL being requested
+        :param dict params: The query string parameters
+        :param str key: What the response is stored under
+        :param variant: What the body is going to be parsed into, see :meth:`pyanimelist.cache.HTTPCache.parsed`
+        :return: If a parsed result was found, the result, otherwise the body and its generation
+        :rtype: tuple
+        """
+        cache = self.http_cache
+        metrics = self.metrics
+        loop = asyncio.get_event_loop()
+        cached = await loop.run_in_executor(None, cache.head, key)
+        headers = {}
+        if cached is not None:
+            if cache.is_fresh(endpoint, cached):
+                cache.hits += 1
+                if metrics is not None:
+                    metrics.cache("http", "hit")
+                return await self._read_stored(endpoint, url, params, key, variant)
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        async with self._request(_ENDPOINT_GROUPS[endpoint], url, params=params, headers=headers,
+                                 endpoint=endpoint) as response:
+            if response.status == 304 and cached is not None:
+                cache.revalidated += 1
+                if metrics is not None:
+                    metrics.cache("http", "revalidated")
+                revalidated = True
+            else:
+                # Raise an error if we get the wrong response code
+                if response.status != 200:
+                    raise ResponseError(response.status)
+                cache.misses += 1
+                if metrics is not None:
+                    metrics.cache("http", "miss")
+                revalidated = False
+                body = await self._read_body(endpoint, response)
+                etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if revalidated:
+            await loop.run_in_executor(None, cache.touch, key)
+            return await self._read_stored(endpoint, url, params, key, variant)
+        generation = await loop.run_in_executor(None, cache.set, key, body, etag, last_modified)
+        return False, None, body, generation
+
+    async def _read_stored(self, endpoint: str, url: str, params: Dict[str, str], key: str,
+                           variant: Hashable) -> Tuple[bool, Any, bytes, int]:
+        """
+        The parsed result or the body of a response :attr:`http_cache` has, see :meth:`_read_cached`
+        """
+        cache = self.http_cache
+        found, result = cache.parsed(key, variant)
+        if self.metrics is not None:
+            self.metrics.cache("parsed", "hit" if found else "miss")
+        if found:
+            return True, result, None, None
+        # Taken before the body so a body stored in between can't be mistaken for this one
+        generation = cache.generation(key)
+        cached = await asyncio.get_event_loop().run_in_executor(None, cache.get, key)
+        if cached is None:
+            # Deleted since we looked, so it's fetched again
+            return await self._read_cached(endpoint, url, params, key, variant)
+        return False, None, cached.body, generation
+
+    async def _read_body(self, endpoint: str, response: aiohttp.ClientResponse) -> bytes:
+        decoder = self._decoder(response)
+        metrics = self.metrics
+        if decoder.encoding == "identity":
+            if metrics is None:
+                return await response.read()
+            start = time.perf_counter()
+            body = decoder.decode(await response.read())
+        else:
+            start = time.perf_counter()
+            parts = []
+            async for chunk in self._chunks(response, _CHUNK_SIZE, decoder):
+                parts.append(chunk)
+                decoder.hold(len(chunk))
+            body = b"".join(parts)
+            # Joining copies the parts, so for a moment the body is held twice
+            decoder.hold(len(body))
+        if metrics is not None:
+            metrics.downloaded(endpoint, len(body), time.perf_counter() - start)
+            metrics.transferred(endpoint, decoder.wire, decoder.decoded, decoder.peak)
+        return body
+
+    def _decoder(self, response: aiohttp.ClientResponse) -> BodyDecoder:
+        """
+        :return: What decompresses the body of a response, if the session hasn't already
+        :rtype: BodyDecoder
+        """
+        raw = (self._parent or self)._raw_bodies
+        return BodyDecoder(response.headers.get("Content-Encoding") if raw else None)
+
+    @staticmethod
+    async def _chunks(response: aiohttp.ClientResponse, chunk_size: int, decoder: BodyDecoder) -> AsyncIterator[bytes]:
+        """
+        Yields the body of a response decompressed a chunk at a time as it comes off the connection
+        """
+        async for chunk in response.content.iter_chunked(chunk_size):
+            chunk = decoder.decode(chunk)
+            if chunk:
+                yield chunk
+        chunk = decoder.flush()
+        if chunk:
+            yield chunk
+
+    async def _read_tree(self, endpoint: str, url: str,
+                         params: Dict[str, str] = None) -> Tuple[etree._Element, int, float]:
+        """
+        Feeds the body of a GET request which should return 200 into lxml as it downloads and decompresses, only the
+        chunk being parsed is ever held besides the tree
+
+        :return: The root element, how many bytes the body decoded to and how many seconds were spent parsing
+        :rtype: tuple
+        """
+        metrics = self.metrics
+        async with self._request(_ENDPOINT_GROUPS[endpoint], url, params=params, endpoint=endpoint) as response:
+            # Raise an error if we get the wrong response code
+            if response.status != 200:
+                raise ResponseError(response.status)
+            decoder = self._decoder(response)
+            parser = etree.XMLParser()
+            parsing = 0.0
+            start = time.perf_counter()
+            async for chunk in self._chunks(response, _CHUNK_SIZE, decoder):
+                fed = time.perf_counter()
+                parser.feed(chunk)
+                parsing += time.perf_counter() - fed
+            fed = time.perf_counter()
+            root = parser.close()
+            parsing += time.perf_counter() - fed
+            if metrics is not None:
+                metrics.downloaded(endpoint, decoder.decoded, time.perf_counter() - start - parsing)
+                metrics.transferred(endpoint, decoder.wire, decoder.decoded, decoder.peak)
+            return root, decoder.decoded, parsing
+
+    async def _load(self, endpoint: str, url: str, params: Dict[str, str], parse: Callable, build: Callable, *args):
+        """
+        Gets a response and parses it with ``parse(body, *args)`` through :attr:`parse_executor`, or with
+        :attr:`stream_parse` builds the result with ``build(root, *args)`` from the tree it was streamed into, also
+        through :attr:`parse_executor`
+        """
+        if self.http_cache is not None:
+            key = url + "?" + urlencode(sorted(params.items()))
+            variant = (parse.__name__,) + args
+            found, result, body, generation = await self._read_cached(endpoint, url, params, key, variant)
+            if not found:
+                result = await self.parse_executor.run(parse, body, *args)
+                self.http_cache.keep_parsed(key, variant, generation, result)
+            # The kept result is shared with every later call, each gets its own copy of the list
+            return copy.copy(result)
+        if not self.stream_parse:
+            body = await self._read(endpoint, url, params=params)
+            return await self.parse_executor.run(parse, body, *args)
+        root, size, parsing = await self._read_tree(endpoint, url, params=params)
+        return await self.parse_executor.build(build, parse.__name__, root, size, parsing, *args)
 
     async def verify_credentials(self) -> Tuple[str, str]:
         """
         This function is used for verifying if a users information is correct, it uses the username and password passed into self._auth)
+
+        With a :attr:`credential_cache` the outcome is remembered, see :class:`pyanimelist.cache.CredentialCache`
+
         :return: The id and the username of the verified user
         :rtype: tuple
+        :raises InvalidCredentials: If MAL rejected the username and password
+        :raises ResponseError: If MAL failed some other way, like being down or throttling us
         """
-        with aiohttp.ClientSession(auth=self._auth, headers={"User-Agent": self.user_agent}) as session:
-            async with session.get(VERIFY_CREDENTIALS) as response:
-                if response.status != 200:
-                    raise InvalidCredentials
-                response_data = await response.read()
-                user = etree.fromstring(response_data)
-                return user.find("id").text, user.find("username").text
+        if self.credential_cache is not None:
+            return await self.credential_cache.fetch(self._auth.login, self._auth.password, self._verify_credentials)
+        return await self._verify_credentials()
 
-    async def search_all_anime(self, search_query: str) -> List[Anime]:
+    async def _verify_credentials(self) -> Tuple[str, str]:
+        async with self._request("account", VERIFY_CREDENTIALS, endpoint="verify_credentials") as response:
+            # Only a refusal means the credentials are wrong, anything else is MAL failing and mustn't be cached
+            if response.status in (401, 403):
+                raise InvalidCredentials(response.status)
+            if response.status != 200:
+                raise ResponseError(response.status)
+            response_data = await self._read_body("verify_credentials", response)
+            user = etree.fromstring(response_data)
+            return user.find("id").text, user.find("username").text
+
+    async def search_all_anime(self, search_query: str, fields: Iterable[str] = None,
+                               from_index: bool = False) -> List[Anime]:
         """
         A function to get data for all search results from a query
+
+        Results are decoded lazily, each attribute is only read out of the response the first time it's accessed and
+        entries missing a field have it set to None
+
         :param str search_query: is what'll be queried for the search results
+        :param fields: Only decode these attributes (e.g. ``("id", "titles")``), the rest are None
+        :param bool from_index: Answer from :attr:`title_index` when anything in it matches every word of the query,
+                                MAL is only asked when nothing does or a match was only seen on a users list and
+                                is missing fields. The index only knows what the client has seen
         :return: List of anime objects
         :rtype: List
         """
-        with aiohttp.ClientSession(auth=self._auth, headers={"User-Agent": self.user_agent}) as session:
-            async with session.get(ANIME_SEARCH_URL, params={"q": search_query}) as response:
-                # Raise an error if we get the wrong response code
-                if response.status != 200:
-                    raise ResponseError(response.status)
-                response_data = await response.read()
-                entries = etree.fromstring(response_data)
-                animes = []
-                for entry in entries:
-                    try:
-                        animes.append(
-                            Anime(
-                                id=entry.find("id").text,
-                                titles=Titles(
-                                    jp=entry.find("title").text,
-                                    english=entry.find("english").text,
-                                    synonyms=entry.find("synonyms").text.split(";")
-                                ),
-                                episode_count=entry.find("episodes").text,
-                                dates=Dates(
-                                    start=entry.find("start_date").text,
-                                    end=entry.find("end_date").text
-                                ),
-                                type=entry.find("type").text,
-                                status=entry.find("status").text,
-                                synopsis=html.unescape(entry.find("synopsis").text.replace("<br />", "").replace("[i]", "").replace("[/i]", "")),
-                                cover=entry.find("image").text
-                            )
-                        )
-                    except AttributeError:
-                        continue
-                return animes
-
-    async def search_all_manga(self, search_query: str) -> List[Manga]:
+        fields = tuple(fields) if fields is not None else None
+        if from_index and self.title_index is not None:
+            indexed = self._search_index(search_query, "anime", fields)
+            if indexed is not None:
+                return indexed
+        if self.cache is not None:
+            return await self.cache.fetch(
+                "anime_search", search_query, lambda: self._search_all_anime(search_query, fields),
+                variant=",".join(fields) if fields is not None else None
+            )
+        return await self._search_all_anime(search_query, fields)
+
+    def _search_index(self, search_query: str, series_type: str,
+                      fields: Tuple[str, ...] = None) -> Union[List[Anime], List[Manga], None]:
+        """
+        Copies of what :attr:`title_index` has matching every word of the query, None when nothing matches or a match
+        doesn't have every field that's wanted
+        """
+        index = self.title_index
+        matches = index.search(search_query, series_type, fuzzy=False)
+        if not matches or not all(index.has_fields(series_type, match.id, fields) for match in matches):
+            return None
+        return [_from_index(match.item, fields) for match in matches]
+
+    async def _search_all_anime(self, search_query: str, fields: Tuple[str, ...] = None) -> List[Anime]:
+        results = await self._load("anime_search", ANIME_SEARCH_URL, {"q": search_query},
+                                   _parse_anime_search, _build_anime_search, fields)
+        if self.title_index is not None:
+            self.title_index.update(results)
+        return results
+
+    async def search_all_manga(self, search_query: str, fields: Iterable[str] = None,
+                               from_index: bool = False) -> List[Manga]:
         """
         A function to get data for all search results from a query
+
+        Results are decoded lazily, each attribute is only read out of the response the first time it's accessed and
+        entries missing a field have it set to None
+
         :param str search_query: is what'll be queried for the search results
-        :return: List of anime objects
+        :param fields: Only decode these attributes (e.g. ``("id", "titles")``), the rest are None
+        :param bool from_index: Answer from :attr:`title_index` when anything in it matches every word of the query,
+                                MAL is only asked when nothing does or a match was only seen on a users list and
+                                is missing fields. The index only knows what the client has seen
+        :return: List of manga objects
         :rtype: List
         """
-        with aiohttp.ClientSession(auth=self._auth, headers={"User-Agent": self.user_agent}) as session:
-            async with session.get(MANGA_SEARCH_URL, params={"q": search_query}) as response:
-                # Raise an error if we get the wrong response code
-                if response.status != 200:
-                    raise ResponseError(response.status)
-                response_data = await response.read()
-                entries = etree.fromstring(response_data)
-                mangas = []
-                for entry in entries:
-                    try:
-                        mangas.append(
-                            Manga(
-                                id=entry.find("id").text,
-                                titles=Titles(
-                                    jp=entry.find("title").text,
-                                    english=entry.find("english").text,
-                                    synonyms=entry.find("synonyms").text.split(";")
-                                ),
-                                volumes=entry.find("volumes").text,
-                                chapters=entry.find("chapters").text,
-                                type=entry.find("type").text,
-                                status=entry.find("status").text,
-                                dates=Dates(
-                                    start=entry.find("start_date").text,
-                                    end=entry.find("end_date").text
-                                ),
-                                synopsis=html.unescape(entry.find("synopsis").text.replace("<br />", "").replace("[i]", "").replace("[/i]", "")),
-                                cover=entry.find("image").text
-                            )
-                        )
-                    except AttributeError:
-                        continue
-                return mangas
+        fields = tuple(fields) if fields is not None else None
+        if from_index and self.title_index is not None:
+            indexed = self._search_index(search_query, "manga", fields)
+            if indexed is not None:
+                return indexed
+        if self.cache is not None:
+            return await self.cache.fetch(
+                "manga_search", search_query, lambda: self._search_all_manga(search_query, fields),
+                variant=",".join(fields) if fields is not None else None
+            )
+        return await self._search_all_manga(search_query, fields)
+
+    async def _search_all_manga(self, search_query: str, fields: Tuple[str, ...] = None) -> List[Manga]:
+        results = await self._load("manga_search", MANGA_SEARCH_URL, {"q": search_query},
+                                   _parse_manga_search, _build_manga_search, fields)
+        if self.title_index is not None:
+            self.title_index.update(results)
+        return results
+
+    async def iter_search_anime(self, search_query: str, limit: int = None, fields: Iterable[str] = None,
+                                chunk_size: int = 16384) -> AsyncIterator[Anime]:
+        """
+        Streaming version of :meth:`search_all_anime`, the response is fed into an incremental parser as it downloads
+        and each result is yielded as soon as it's complete, so the first ones can be used before broad queries have
+        finished downloading. Results are decoded lazily the same way, the caches aren't used.
+
+        :param str search_query: is what'll be queried for the search results
+        :param int limit: Stop after this many results, the connection is closed instead of downloading the rest
+        :param fields: Only decode these attributes (e.g. ``("id", "titles")``), the rest are None
+        :param int chunk_size: How many bytes are read off the connection at once
+        :return type AsyncIterator[Anime]:
+        """
+        results = self._iter_search("anime_search", ANIME_SEARCH_URL, Anime, search_query, limit, fields, chunk_size)
+        try:
+            async for anime in results:
+                yield anime
+        finally:
+            await results.aclose()
+
+    async def iter_search_manga(self, search_query: str, limit: int = None, fields: Iterable[str] = None,
+                                chunk_size: int = 16384) -> AsyncIterator[Manga]:
+        """
+        Streaming version of :meth:`search_all_manga`, see :meth:`iter_search_anime`
+
+        :param str search_query: is what'll be queried for the search results
+        :param int limit: Stop after this many results, the connection is closed instead of downloading the rest
+        :param fields: Only decode these attributes (e.g. ``("id", "titles")``), the rest are None
+        :param int chunk_size: How many bytes are read off the connection at once
+        :return type AsyncIterator[Manga]:
+        """
+        results = self._iter_search("manga_search", MANGA_SEARCH_URL, Manga, search_query, limit, fields, chunk_size)
+        try:
+            async for manga in results:
+                yield manga
+        finally:
+            await results.aclose()
+
+    async def _iter_search(self, endpoint: str, url: str, series_type: type, search_query: str, limit: int,
+                           fields: Iterable[str], chunk_size: int) -> AsyncIterator[Union[Anime, Manga]]:
+        if limit is not None and limit <= 0:
+            return
+        fields = tuple(fields) if fields is not None else None
+        async with self._request("search", url, params={"q": search_query}, endpoint=endpoint) as response:
+            # Raise an error if we get the wrong response code
+            if response.status != 200:
+                raise ResponseError(response.status)
+            # Entries are detached rather than cleared since lazily decoded results hold on to them
+            stream = self._stream(response, "entry", lambda entry: series_type.from_element_lazy(entry, fields),
+                                  detach_events, chunk_size, endpoint, "iter_" + endpoint)
+            count = 0
+            index = self.title_index
+            try:
+                async for result in stream:
+                    if index is not None:
+                        index.add(result)
+                    yield result
+                    count += 1
+                    if count == limit:
+                        # Drop the connection instead of downloading results nobody wants
+                        response.close()
+                        return
+            finally:
+                await stream.aclose()
 
     async def add_anime(self, anime_id: int, status: int, **kwargs) -> bool:
         """
@@ -161,16 +643,17 @@ class PyAnimeList(object):
                                                              if 6 it's total drive space, if 7 it's total drive space,
                                                              if 8 it's number of blu-rays)
         :rtype: bool
+        :raises InvalidEntryField: If a field is unknown or has an invalid value
         """
         kwargs["status"] = status
-        xml = dicttoxml(kwargs, attr_type=False, custom_root="entry")
-        with aiohttp.ClientSession(auth=self._auth, headers={"User-Agent": self.user_agent}) as session:
-            async with session.get(ANIME_ADD_URL.format(str(anime_id)), params={"data": xml}) as response:
-                # Raise an error if we get the wrong response code
-                if response.status != 201:
-                    raise ResponseError(response.status)
-                # Return True to show adding the item worked
-                return True
+        xml = ANIME_ENTRY.to_xml(kwargs)
+        async with self._request("writes", ANIME_ADD_URL.format(str(anime_id)), params={"data": xml},
+                                 endpoint="anime_add") as response:
+            # Raise an error if we get the wrong response code
+            if response.status != 201:
+                raise ResponseError(response.status)
+            # Return True to show adding the item worked
+            return True
 
     async def add_manga(self, manga_id: int, status: int, **kwargs) -> bool:
         """
@@ -192,16 +675,17 @@ class PyAnimeList(object):
         :param str tags: Tags related to the novel, seperated by comma
         :param retail_volumes: How many volumes you own
         :rtype: bool
+        :raises InvalidEntryField: If a field is unknown or has an invalid value
         """
         kwargs["status"] = status
-        xml = dicttoxml(kwargs, attr_type=False, custom_root="entry")
-        with aiohttp.ClientSession(auth=self._auth, headers={"User-Agent": self.user_agent}) as session:
-            async with session.get(MANGA_ADD_URL.format(str(manga_id)), params={"data": xml}) as response:
-                # Raise an error if we get the wrong response code
-                if response.status != 201:
-                    raise ResponseError(response.status)
-                # Return True to show adding the item worked
-                return True
+        xml = MANGA_ENTRY.to_xml(kwargs)
+        async with self._request("writes", MANGA_ADD_URL.format(str(manga_id)), params={"data": xml},
+                                 endpoint="manga_add") as response:
+            # Raise an error if we get the wrong response code
+            if response.status != 201:
+                raise ResponseError(response.status)
+            # Return True to show adding the item worked
+            return True
 
     async def update_anime(self, anime_id: int, **kwargs) -> bool:
         """
@@ -227,16 +711,17 @@ class PyAnimeList(object):
                                                          if 6 it's total drive space, if 7 it's total drive space,
                                                          if 8 it's number of blu-rays)
         :return type boolean:
+        :raises InvalidEntryField: If a field is unknown or has an invalid value
         """
-        # Turns kwargs into valid XML
-        xml = dicttoxml(kwargs, attr_type=False, custom_root="entry")
-        with aiohttp.ClientSession(auth=self._auth, headers={"User-Agent": self.user_agent}) as session:
-            async with session.get(ANIME_UPDATE_URL.format(anime_id), params={"data": xml}) as response:
-                # Raise an error if we get the wrong response code
-                if response.status != 200:
-                    raise ResponseError(response.status)
-                # Return true to show the item has been updated fine
-                return True
+        # Checks the fields and turns them into the entry XML before anything is sent
+        xml = ANIME_ENTRY.to_xml(kwargs)
+        async with self._request("writes", ANIME_UPDATE_URL.format(anime_id), params={"data": xml},
+                                 endpoint="anime_update") as response:
+            # Raise an error if we get the wrong response code
+            if response.status != 200:
+                raise ResponseError(response.status)
+            # Return true to show the item has been updated fine
+            return True
 
     async def update_manga(self, manga_id: int, **kwargs) -> bool:
         """
@@ -258,67 +743,209 @@ class PyAnimeList(object):
         :param tags: Tags related to the novel, seperated by comma
         :param retail_volumes: How many volumes you own
         :return type boolean:
+        :raises InvalidEntryField: If a field is unknown or has an invalid value
         """
-        xml = dicttoxml(kwargs, attr_type=False, custom_root="entry")
-        with aiohttp.ClientSession(auth=self._auth, headers={"User-Agent": self.user_agent}) as session:
-            async with session.get(MANGA_UPDATE_URL.format(manga_id), params={"data": xml}) as response:
-                # Raise an error if we get the wrong response code
-                if response.status != 200:
-                    raise ResponseError(response.status)
-                # Return True to show the item has been updated
-                return True
+        xml = MANGA_ENTRY.to_xml(kwargs)
+        async with self._request("writes", MANGA_UPDATE_URL.format(manga_id), params={"data": xml},
+                                 endpoint="manga_update") as response:
+            # Raise an error if we get the wrong response code
+            if response.status != 200:
+                raise ResponseError(response.status)
+            # Return True to show the item has been updated
+            return True
+
+    def queue_update_anime(self, anime_id: int, **kwargs) -> asyncio.Future:
+        """
+        Write-behind version of :meth:`update_anime`, the update waits in :attr:`write_queue` and is merged with any
+        other update of the same anime queued before it's sent, see :class:`pyanimelist.writequeue.WriteQueue`
+
+        :param int anime_id: The id of the anime being updated
+        :param kwargs: The fields :meth:`update_anime` takes
+        :return: A future resolving to True once the update has been sent
+        :rtype: asyncio.Future
+        :raises InvalidEntryField: If a field is unknown or has an invalid value, straight away
+        """
+        return self._queue_update("anime", anime_id, ANIME_ENTRY, self.update_anime, kwargs)
+
+    def queue_update_manga(self, manga_id: int, **kwargs) -> asyncio.Future:
+        """
+        Write-behind version of :meth:`update_manga`, see :meth:`queue_update_anime`
+
+        :param int manga_id: The id of the manga being updated
+        :param kwargs: The fields :meth:`update_manga` takes
+        :return: A future resolving to True once the update has been sent
+        :rtype: asyncio.Future
+        :raises InvalidEntryField: If a field is unknown or has an invalid value, straight away
+        """
+        return self._queue_update("manga", manga_id, MANGA_ENTRY, self.update_manga, kwargs)
+
+    def _queue_update(self, series_type: str, series_id: int, schema, update: Callable,
+                      kwargs: Dict[str, object]) -> asyncio.Future:
+        # Checked now so bad fields fail the call instead of the whole merged request later on
+        schema.validate(kwargs)
+        if self.write_queue is None:
+            return asyncio.ensure_future(update(series_id, **kwargs))
+        # Aliases are resolved so the same field passed under two names is still last write wins
+        fields = {schema.aliases.get(name, name): value for name, value in kwargs.items()}
+        # Keyed by account as well, views made by for_user share the queue
+        return self.write_queue.put(
+            (self._auth, series_type, series_id), fields, lambda merged: update(series_id, **merged)
+        )
+
+    async def flush_writes(self):
+        """
+        Sends every update waiting in :attr:`write_queue` now and waits until they're done
+        """
+        if self.write_queue is not None:
+            await self.write_queue.flush()
 
     async def delete_anime(self, anime_id: int) -> bool:
         """
         :param anime_id: the id of the anime on myanimelist
         :return type boolean:
         """
-        with aiohttp.ClientSession(auth=self._auth, headers={"User-Agent": self.user_agent}) as session:
-            async with session.get(ANIME_DELETE_URL.format(anime_id)) as response:
-                # Raise an error if we get the wrong response code
-                if response.status != 200:
-                    raise ResponseError(response.status)
-                # Return True to indicate that deleting the item worked
-                return True
+        async with self._request("writes", ANIME_DELETE_URL.format(anime_id), endpoint="anime_delete") as response:
+            # Raise an error if we get the wrong response code
+            if response.status != 200:
+                raise ResponseError(response.status)
+            # Return True to indicate that deleting the item worked
+            return True
 
     async def delete_manga(self, manga_id: int) -> bool:
         """
         :param manga_id: the id of the manga on myanimelist
         :return type boolean:
         """
-        with aiohttp.ClientSession(auth=self._auth, headers={"User-Agent": self.user_agent}) as session:
-            async with session.get(MANGA_DELETE_URL.format(manga_id)) as response:
-                # Raise an error if we get the wrong response code
-                if response.status != 200:
-                    raise ResponseError(response.status)
-                # Return True to indicate that deleting the item worked
-                return True
+        async with self._request("writes", MANGA_DELETE_URL.format(manga_id), endpoint="manga_delete") as response:
+            # Raise an error if we get the wrong response code
+            if response.status != 200:
+                raise ResponseError(response.status)
+            # Return True to indicate that deleting the item worked
+            return True
 
-    # Zeta wrote this bit
-    @staticmethod
-    def process_(child) -> Tuple[str, datetime]:
-        name, text = child.name, child.get_text()
-        try:
-            # Try converting text to an integer
-            text = int(text)
-        # Ignore if we get a value we can't cast to int
-        except ValueError:
-            pass
-        if name == "my_last_updated":
-            text = datetime.fromtimestamp(float(text))
-        if name in ('my_finish_date', "my_start_date", "series_end", "series_start"):
-            try:
-                text = datetime.strptime(text, "%Y-%m-%d")
-            except ValueError:
-                text = datetime.fromtimestamp(0)
-        # Return name and text in tuple
-        return name, text
+    async def _run_bulk(self, operations: Iterable[BulkOperation], handlers: Dict[str, Callable],
+                        concurrency: int) -> List[BulkResult]:
+        """
+        Coalesces the operations then runs them, operations on the same id run one after another in order while
+        different ids run at the same time, at most concurrency of them at once. There's a result for every operation
+        given, in the order they were given in
+        """
+        operations = list(operations)
+        grouped, dropped = _plan_bulk(operations)
+        results = [None] * len(operations)  # type: List[BulkResult]
+        for index in dropped:
+            results[index] = BulkResult(operations[index], False, OperationDropped(
+                "{} {} follows a delete of it".format(operations[index].action, operations[index].series_id)
+            ))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_chain(chain: list):
+            async with semaphore:
+                for operation, indexes in chain:
+                    try:
+                        await handlers[operation.action](operation)
+                    except Exception as e:
+                        # Failures are reported per item instead of stopping the whole batch
+                        success, error = False, e
+                    else:
+                        success, error = True, None
+                    # Operations that were merged together all point at the request that was actually sent
+                    coalesced = operation if len(indexes) > 1 else None
+                    for index in indexes:
+                        results[index] = BulkResult(operations[index], success, error, coalesced)
+
+        await asyncio.gather(*(run_chain(chain) for chain in grouped.values()))
+        return results
+
+    async def bulk_anime(self, operations: Iterable[BulkOperation], concurrency: int = 10) -> List[BulkResult]:
+        """
+        Makes a batch of mixed changes to the users anime list, see :func:`pyanimelist.bulk.coalesce_operations` for
+        how redundant operations on the same id are dropped
+
+        :param operations: The :class:`pyanimelist.bulk.BulkOperation` being made
+        :param int concurrency: How many requests can be in flight at once
+        :return: A :class:`pyanimelist.bulk.BulkResult` for every operation, in the order they were given in
+        :rtype: List[BulkResult]
+        """
+        return await self._run_bulk(operations, {
+            ADD: lambda operation: self.add_anime(operation.series_id, **operation.fields),
+            UPDATE: lambda operation: self.update_anime(operation.series_id, **operation.fields),
+            DELETE: lambda operation: self.delete_anime(operation.series_id)
+        }, concurrency)
+
+    async def bulk_manga(self, operations: Iterable[BulkOperation], concurrency: int = 10) -> List[BulkResult]:
+        """
+        Makes a batch of mixed changes to the users manga list, see :func:`pyanimelist.bulk.coalesce_operations` for
+        how redundant operations on the same id are dropped
+
+        :param operations: The :class:`pyanimelist.bulk.BulkOperation` being made
+        :param int concurrency: How many requests can be in flight at once
+        :return: A :class:`pyanimelist.bulk.BulkResult` for every operation, in the order they were given in
+        :rtype: List[BulkResult]
+        """
+        return await self._run_bulk(operations, {
+            ADD: lambda operation: self.add_manga(operation.series_id, **operation.fields),
+            UPDATE: lambda operation: self.update_manga(operation.series_id, **operation.fields),
+            DELETE: lambda operation: self.delete_manga(operation.series_id)
+        }, concurrency)
+
+    async def bulk_add_anime(self, entries: Iterable[Tuple[int, dict]], concurrency: int = 10) -> List[BulkResult]:
+        """
+        :param entries: (anime_id, fields) pairs, fields are what :meth:`add_anime` takes and must include status
+        :param int concurrency: How many requests can be in flight at once
+        :rtype: List[BulkResult]
+        """
+        return await self.bulk_anime((BulkOperation(ADD, i, fields) for i, fields in entries), concurrency)
+
+    async def bulk_update_anime(self, entries: Iterable[Tuple[int, dict]], concurrency: int = 10) -> List[BulkResult]:
+        """
+        :param entries: (anime_id, fields) pairs, fields are what :meth:`update_anime` takes
+        :param int concurrency: How many requests can be in flight at once
+        :rtype: List[BulkResult]
+        """
+        return await self.bulk_anime((BulkOperation(UPDATE, i, fields) for i, fields in entries), concurrency)
+
+    async def bulk_delete_anime(self, anime_ids: Iterable[int], concurrency: int = 10) -> List[BulkResult]:
+        """
+        :param anime_ids: The ids of the anime being removed from the list
+        :param int concurrency: How many requests can be in flight at once
+        :rtype: List[BulkResult]
+        """
+        return await self.bulk_anime((BulkOperation(DELETE, i, {}) for i in anime_ids), concurrency)
+
+    async def bulk_add_manga(self, entries: Iterable[Tuple[int, dict]], concurrency: int = 10) -> List[BulkResult]:
+        """
+        :param entries: (manga_id, fields) pairs, fields are what :meth:`add_manga` takes and must include status
+        :param int concurrency: How many requests can be in flight at once
+        :rtype: List[BulkResult]
+        """
+        return await self.bulk_manga((BulkOperation(ADD, i, fields) for i, fields in entries), concurrency)
+
+    async def bulk_update_manga(self, entries: Iterable[Tuple[int, dict]], concurrency: int = 10) -> List[BulkResult]:
+        """
+        :param entries: (manga_id, fields) pairs, fields are what :meth:`update_manga` takes
+        :param int concurrency: How many requests can be in flight at once
+        :rtype: List[BulkResult]
+        """
+        return await self.bulk_manga((BulkOperation(UPDATE, i, fields) for i, fields in entries), concurrency)
 
-    async def get_user_series(self, username: str, series_type: str):
+    async def bulk_delete_manga(self, manga_ids: Iterable[int], concurrency: int = 10) -> List[BulkResult]:
+        """
+        :param manga_ids: The ids of the manga being removed from the list
+        :param int concurrency: How many requests can be in flight at once
+        :rtype: List[BulkResult]
+        """
+        return await self.bulk_manga((BulkOperation(DELETE, i, {}) for i in manga_ids), concurrency)
+
+    async def get_user_series(self, username: str, series_type: str,
+                              columnar: bool = False) -> Union[UserSeries, UserList]:
         """
         :param username: The name of the accounts information you're trying to get
         :param series_type: If you're looking for manga or anime
-        :return type list:
+        :param columnar: Return a column based :class:`pyanimelist.columnar.UserList` for analytics instead
+        :return: The users :class:`pyanimelist.objects.UserAnime` or :class:`pyanimelist.objects.UserManga` entries,
+                 with their :class:`pyanimelist.objects.UserInfo` on ``info``
+        :rtype: UserSeries
         """
         params = {
             "u": username,
@@ -328,38 +955,204 @@ class PyAnimeList(object):
         if series_type not in ("anime", "manga"):
             raise InvalidSeriesTypeException
         else:
-            with aiohttp.ClientSession(auth=self._auth, headers={"User-Agent": self.user_agent}) as session:
-                async with session.get(MAL_APP_INFO, params=params) as response:
-                    # Raise an error if we get the wrong response code
-                    if response.status != 200:
-                        raise ResponseError(response.status)
-                    # Get the response text and set parser
-                    soup = bs4.BeautifulSoup(await response.text(), "lxml")
-                    return [dict(self.process_(child) for child in anime.children) for anime in soup.find_all(series_type)]
+            series = await self._load("malappinfo", MAL_APP_INFO, params, _parse_user_series, _build_user_series,
+                                      series_type, columnar)
+            if self.title_index is not None and not columnar:
+                self.title_index.update(series)
+            return series
     # End of bit Zeta wrote
 
+    async def iter_user_series(self, username: str, series_type: str,
+                               chunk_size: int = 16384) -> AsyncIterator[Union[UserAnime, UserManga]]:
+        """
+        Streaming version of :meth:`get_user_series`, the response is fed into an incremental parser as it downloads and
+        each entry is yielded as soon as it's complete, so memory use doesn't grow with the size of the users list
+
+        :param username: The name of the accounts information you're trying to get
+        :param series_type: If you're looking for manga or anime
+        :param chunk_size: How many bytes are read off the connection at once
+        :return type AsyncIterator[Union[UserAnime, UserManga]]:
+        """
+        params = {
+            "u": username,
+            "status": "all",
+            "type": series_type
+        }
+        if series_type not in ("anime", "manga"):
+            raise InvalidSeriesTypeException
+        async with self._request("malappinfo", MAL_APP_INFO, params=params, endpoint="malappinfo") as response:
+            # Raise an error if we get the wrong response code
+            if response.status != 200:
+                raise ResponseError(response.status)
+            stream = self._stream(response, series_type, _SERIES_TYPES[series_type].from_element, drain_events,
+                                  chunk_size, "malappinfo", "iter_user_series")
+            index = self.title_index
+            try:
+                async for entry in stream:
+                    if index is not None:
+                        index.add(entry)
+                    yield entry
+            finally:
+                await stream.aclose()
+
+    async def _stream(self, response: aiohttp.ClientResponse, tag: str, build: Callable, events: Callable,
+                      chunk_size: int, endpoint: str, name: str) -> AsyncIterator:
+        """
+        Feeds a response into an incremental parser as it downloads and yields ``build(element)`` for every ``tag``
+        element as soon as it's complete, ``events`` is :func:`pyanimelist.util.parsing.drain_events` or
+        :func:`pyanimelist.util.parsing.detach_events` depending on whether the elements are needed afterwards.
+
+        With :attr:`metrics` the reads and the parsing are timed apart from the time spent in the caller, and reported
+        under endpoint and name.
+        """
+        parser = etree.XMLPullParser(events=("end",), tag=tag)
+        metrics = self.metrics
+        decoder = self._decoder(response)
+        if metrics is None:
+            async for chunk in self._chunks(response, chunk_size, decoder):
+                parser.feed(chunk)
+                for element in events(parser):
+                    yield build(element)
+            parser.close()
+            # Anything left over after the final chunk
+            for element in events(parser):
+                yield build(element)
+            return
+        chunks = self._chunks(response, chunk_size, decoder).__aiter__()
+        size = count = 0
+        downloading = parsing = 0.0
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                chunk = None
+            read = time.perf_counter()
+            downloading += read - start
+            if chunk is None:
+                parser.close()
+            else:
+                size += len(chunk)
+                parser.feed(chunk)
+            built = [build(element) for element in events(parser)]
+            parsing += time.perf_counter() - read
+            count += len(built)
+            if chunk is None:
+                metrics.downloaded(endpoint, size, downloading)
+                metrics.transferred(endpoint, decoder.wire, decoder.decoded, decoder.peak)
+                metrics.parsed(name, parsing, count)
+            for item in built:
+                yield item
+            if chunk is None:
+                return
+
     async def get_user_data(self, user: str) -> UserInfo:
         """
         :param user: username who's information we're getting
-        :return type list:
+        :rtype: UserInfo
         """
-        # List that stores all the UserInfo Objects to return
-        with aiohttp.ClientSession(auth=self._auth, headers={"User-Agent": self.user_agent}) as session:
-            async with session.get(MAL_APP_INFO, params={"u": user}) as response:
-                # Raise an error if we get the wrong response code
-                if response.status != 200:
-                    raise ResponseError(response.status)
-                response_data = await response.read()
-                # We want the [0] index as myanimelist always returns the user data first
-                user_info = etree.fromstring(response_data)[0]
-                # Add to list containing UserInfo objects
-                return UserInfo(
-                    id=user_info.find("user_id").text,
-                    username=user_info.find("user_name").text,
-                    watching=user_info.find("user_watching").text,
-                    completed=user_info.find("user_completed").text,
-                    on_hold=user_info.find("user_onhold").text,
-                    dropped=user_info.find("user_dropped").text,
-                    plan_to_watch=user_info.find("user_plantowatch").text,
-                    days_spent_watching=user_info.find("user_days_spent_watching").text
-                )
+        return await self._load("malappinfo", MAL_APP_INFO, {"u": user}, _parse_user_data, _build_user_data)
+
+    async def fetch_many_users(self, usernames: Iterable[str], series_type: str = None, concurrency: int = 10,
+                               ordered: bool = False, columnar: bool = False) -> AsyncIterator[UserResult]:
+        """
+        Fetches the lists (or the :class:`pyanimelist.objects.UserInfo` when series_type is None) of many users at once.
+
+        Big responses are parsed through :attr:`parse_executor` so parsing one doesn't hold up the requests for the
+        others, a user failing is reported on their result instead of stopping the rest. Closing the generator early
+        cancels whatever is still in flight.
+
+        :param usernames: The users being fetched
+        :param str series_type: anime or manga to fetch their lists, None for their user data
+        :param int concurrency: How many users are fetched at once
+        :param bool ordered: Yield results in the order the usernames were given instead of as they complete
+        :param bool columnar: Build lists as :class:`pyanimelist.columnar.UserList`, see :meth:`get_user_series`
+        :return type AsyncIterator[UserResult]:
+        """
+        if series_type is not None and series_type not in _SERIES_TYPES:
+            raise InvalidSeriesTypeException
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(username: str) -> UserResult:
+            async with semaphore:
+                try:
+                    if series_type is None:
+                        result = await self._load("malappinfo", MAL_APP_INFO, {"u": username}, _parse_user_data,
+                                                  _build_user_data)
+                    else:
+                        params = {"u": username, "status": "all", "type": series_type}
+                        result = await self._load("malappinfo", MAL_APP_INFO, params, _parse_user_series,
+                                                  _build_user_series, series_type, columnar)
+                        if self.title_index is not None and not columnar:
+                            self.title_index.update(result)
+                except Exception as e:
+                    return UserResult(username, None, e)
+                return UserResult(username, result, None)
+
+        tasks = [asyncio.ensure_future(fetch(username)) for username in usernames]
+        try:
+            for task in (tasks if ordered else asyncio.as_completed(tasks)):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _parse_user_series(body: bytes, series_type: str, columnar: bool = False) -> Union[UserSeries, UserList]:
+    return _build_user_series(etree.fromstring(body), series_type, columnar)
+
+
+def _build_user_series(root: etree._Element, series_type: str, columnar: bool = False) -> Union[UserSeries, UserList]:
+    if columnar:
+        return UserList.from_xml(root, series_type)
+    entry_type = _SERIES_TYPES[series_type]
+    info = root.find("myinfo")
+    return UserSeries(
+        (entry_type.from_element(entry) for entry in root.iterchildren(series_type)),
+        info=UserInfo.from_element(info) if info is not None else None
+    )
+
+
+def _parse_user_data(body: bytes) -> UserInfo:
+    return _build_user_data(etree.fromstring(body))
+
+
+def _build_user_data(root: etree._Element) -> UserInfo:
+    # We want the [0] index as myanimelist always returns the user data first
+    return UserInfo.from_element(root[0])
+
+
+def _parse_anime_search(body: bytes, fields: Tuple[str, ...] = None) -> List[Anime]:
+    return _build_anime_search(etree.fromstring(body), fields)
+
+
+def _build_anime_search(root: etree._Element, fields: Tuple[str, ...] = None) -> List[Anime]:
+    return [Anime.from_element_lazy(entry, fields) for entry in root]
+
+
+def _parse_manga_search(body: bytes, fields: Tuple[str, ...] = None) -> List[Manga]:
+    return _build_manga_search(etree.fromstring(body), fields)
+
+
+def _build_manga_search(root: etree._Element, fields: Tuple[str, ...] = None) -> List[Manga]:
+    return [Manga.from_element_lazy(entry, fields) for entry in root]
+
+
+def _from_index(item: Union[Anime, Manga], fields: Tuple[str, ...] = None) -> Union[Anime, Manga]:
+    # Deep copied so callers can't change what the index holds, and like a search only the fields asked for are set
+    copied = copy.deepcopy(item)
+    if fields is None:
+        return copied
+    cls = type(copied)
+    kept = set(fields)
+    for name in kept:
+        if name not in cls._fields:
+            raise ValueError("{} has no field {!r}".format(cls.__name__, name))
+    if "synopsis" in kept:
+        # The synopsis property is backed by these
+        kept.update(("_raw_synopsis", "_synopsis"))
+    for name in cls.__slots__:
+        if name not in kept:
+            setattr(copied, name, None)
+    return copied
@@ -0,0 +1,229 @@
+import sys
+from array import array
+from collections import Counter
+from itertools import compress
+from typing import Dict, Iterable, List, Optional
+
+from lxml import etree
+
+from .enumerations import AnimeStatus, MangaStatus
+from .errors import InvalidSeriesTypeException
+from .objects import UserInfo
+from .util.parsing import to_int
+
+try:
+    import numpy
+except ImportError:  # NumPy is only needed for to_numpy
+    numpy = None
+
+__all__ = ["UserList"]
+
+# The tag each numeric column is read from, for anime then manga
+_NUMERIC_COLUMNS = {
+    "anime": {
+        "series_animedb_id": "ids",
+        "series_type": "types",
+        "series_episodes": "totals",
+        "my_watched_episodes": "progress",
+        "my_score": "scores",
+        "my_status": "statuses",
+        "my_last_updated": "last_updated"
+    },
+    "manga": {
+        "series_mangadb_id": "ids",
+        "series_type": "types",
+        "series_chapters": "totals",
+        "my_read_chapters": "progress",
+        "my_score": "scores",
+        "my_status": "statuses",
+        "my_last_updated": "last_updated"
+    }
+}
+
+# The array typecode of each numeric column
+_TYPECODES = {
+    "ids": "q",
+    "types": "b",
+    "totals": "l",
+    "progress": "l",
+    "scores": "b",
+    "statuses": "b",
+    "last_updated": "q"
+}
+
+_STATUSES = {
+    "anime": AnimeStatus,
+    "manga": MangaStatus
+}
+
+
+class UserList(object):
+
+    """
+    A users list stored column by column for analytics over lots of entries.
+
+    Numeric columns (:attr:`ids`, :attr:`types`, :attr:`totals`, :attr:`progress`, :attr:`scores`, :attr:`statuses`
+    and :attr:`last_updated` as a unix timestamp) are :class:`array.array` buffers, :attr:`titles` is a list of
+    interned strings. ``totals`` and ``progress`` are episodes for anime and chapters for manga, missing numbers are 0.
+    """
+
+    __slots__ = ("series_type", "info", "titles") + tuple(_TYPECODES)
+
+    def __init__(self, series_type: str, info: UserInfo = None):
+        """
+        :param str series_type: Either anime or manga
+        :param UserInfo info: The myinfo header of the list
+        """
+        if series_type not in _STATUSES:
+            raise InvalidSeriesTypeException
+        self.series_type = series_type
+        self.info = info
+        self.titles = []  # type: List[str]
+        for name, typecode in _TYPECODES.items():
+            setattr(self, name, array(typecode))
+
+    @classmethod
+    def from_xml(cls, root: etree._Element, series_type: str) -> "UserList":
+        """
+        Builds a list straight from a parsed malappinfo response
+
+        :param lxml.etree._Element root: The ``<myanimelist>`` element
+        :param str series_type: Either anime or manga
+        :rtype: UserList
+        """
+        info = root.find("myinfo")
+        user_list = cls(series_type, UserInfo.from_element(info) if info is not None else None)
+        user_list.extend_elements(root.iterchildren(series_type))
+        return user_list
+
+    def extend_elements(self, entries: Iterable[etree._Element]):
+        """
+        Appends malappinfo ``<anime>``/``<manga>`` elements to the columns
+
+        :param entries: The elements being appended
+        """
+        tags = _NUMERIC_COLUMNS[self.series_type]
+        columns = {tag: getattr(self, name) for tag, name in tags.items()}
+        intern = sys.intern
+        for entry in entries:
+            title = None
+            seen = set()
+            for child in entry:
+                column = columns.get(child.tag)
+                if column is not None and child.tag not in seen:
+                    column.append(to_int(child.text) or 0)
+                    seen.add(child.tag)
+                elif child.tag == "series_title":
+                    title = child.text
+            for tag in tags.keys() - seen:
+                columns[tag].append(0)
+            self.titles.append(intern(title) if title is not None else None)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> Dict[str, object]:
+        row = {name: getattr(self, name)[index] for name in _TYPECODES}
+        row["title"] = self.titles[index]
+        return row
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+    def __copy__(self) -> "UserList":
+        # The columns are copied (a memcpy for the arrays) so appending to or editing the copy leaves this one alone
+        copied = UserList(self.series_type, self.info)
+        for name in _TYPECODES:
+            setattr(copied, name, array(getattr(self, name).typecode, getattr(self, name)))
+        copied.titles = list(self.titles)
+        return copied
+
+    def filter(self, mask: Iterable[bool]) -> "UserList":
+        """
+        :param mask: A truthy value per entry, entries with a falsy one are left out
+        :return: A new list holding only the selected entries
+        :rtype: UserList
+        """
+        mask = list(mask)
+        filtered = UserList(self.series_type, self.info)
+        for name, typecode in _TYPECODES.items():
+            setattr(filtered, name, array(typecode, compress(getattr(self, name), mask)))
+        filtered.titles = list(compress(self.titles, mask))
+        return filtered
+
+    def with_status(self, status) -> "UserList":
+        """
+        :param status: A :class:`pyanimelist.enumerations.AnimeStatus`/:class:`pyanimelist.enumerations.MangaStatus`
+                       or its value
+        :rtype: UserList
+        """
+        value = getattr(status, "value", status)
+        return self.filter(code == value for code in self.statuses)
+
+    def group_by_status(self) -> Dict[object, "UserList"]:
+        """
+        :return: A list per status present, keyed by its enumeration member (or the raw code if it's unknown)
+        :rtype: dict
+        """
+        statuses = _STATUSES[self.series_type]
+        members = {member.value: member for member in statuses}
+        return {members.get(code, code): self.with_status(code) for code in sorted(set(self.statuses))}
+
+    def status_counts(self) -> Dict[object, int]:
+        """
+        :return: How many entries have each status, keyed like :meth:`group_by_status`
+        :rtype: dict
+        """
+        members = {member.value: member for member in _STATUSES[self.series_type]}
+        return {members.get(code, code): count for code, count in Counter(self.statuses).items()}
+
+    def score_distribution(self) -> Dict[int, int]:
+        """
+        :return: How many entries were given each score, unscored (0) entries are left out
+        :rtype: dict
+        """
+        distribution = Counter(self.scores)
+        distribution.pop(0, None)
+        return dict(sorted(distribution.items()))
+
+    def mean_score(self) -> Optional[float]:
+        """
+        :return: The average score of the scored entries, None if nothing is scored
+        :rtype: float
+        """
+        scored = [score for score in self.scores if score]
+        return sum(scored) / len(scored) if scored else None
+
+    def completion_rate(self) -> Optional[float]:
+        """
+        :return: The fraction of entries that are completed, None for an empty list
+        :rtype: float
+        """
+        if not self:
+            return None
+        return self.statuses.count(_STATUSES[self.series_type].COMPLETED.value) / len(self)
+
+    def total_progress(self) -> int:
+        """
+        :return: The total episodes watched (anime) or chapters read (manga)
+        :rtype: int
+        """
+        return sum(self.progress)
+
+    def to_numpy(self) -> Dict[str, "numpy.ndarray"]:
+        """
+        Exposes the numeric columns as NumPy arrays, they share memory with the columns so nothing is copied (and the
+        columns can't grow while the arrays are alive). Titles are copied into an object array.
+
+        :raises ImportError: If NumPy isn't installed
+        :rtype: dict
+        """
+        if numpy is None:
+            raise ImportError("NumPy is required for UserList.to_numpy")
+        columns = {}
+        for name in _TYPECODES:
+            column = getattr(self, name)
+            columns[name] = numpy.frombuffer(column, dtype=numpy.dtype(column.typecode)) if column else \
+                numpy.empty(0, dtype=numpy.dtype(column.typecode))
+        columns["titles"] = numpy.array(self.titles, dtype=object)
+        return columns
@@ -23,3 +23,12 @@ MANGA_SEARCH_URL = API_BASE_URL + "manga/search.xml"
 MANGA_ADD_URL = API_BASE_URL + "mangalist/add/{}.xml"
 MANGA_UPDATE_URL = API_BASE_URL + "mangalist/update/{}.xml"
 MANGA_DELETE_URL = API_BASE_URL + "mangalist/delete/{}.xml"
+
+# Pages read by pyanimelist.scraper.Scraper
+SITE_URL = "https://myanimelist.net/"
+
+ANIME_PAGE_URL = SITE_URL + "anime/{}"
+ANIME_STATS_URL = ANIME_PAGE_URL + "/_/stats"
+
+MANGA_PAGE_URL = SITE_URL + "manga/{}"
+MANGA_STATS_URL = MANGA_PAGE_URL + "/_/stats"
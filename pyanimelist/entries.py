@@ -0,0 +1,174 @@
+from datetime import date
+from enum import Enum
+from typing import Any, Callable, Dict, Type
+from xml.sax.saxutils import escape
+
+from .enumerations import AnimeStatus, MangaStatus
+from .errors import InvalidEntryField
+
+__all__ = ["EntrySchema", "ANIME_ENTRY", "MANGA_ENTRY"]
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>'
+
+
+def _integer(minimum: int = 0, maximum: int = None) -> Callable[[str, Any], str]:
+    def convert(name: str, value: Any) -> str:
+        # bool is an int but True as a score is almost certainly a mistake
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise InvalidEntryField(name, value, "expected an int")
+        if value < minimum:
+            raise InvalidEntryField(name, value, "expected at least {}".format(minimum))
+        if maximum is not None and value > maximum:
+            raise InvalidEntryField(name, value, "expected at most {}".format(maximum))
+        return str(value)
+    return convert
+
+
+def _flag(name: str, value: Any) -> str:
+    # 1.0 == 1 as well, so the type is checked before the value
+    if isinstance(value, bool) or (isinstance(value, int) and value in (0, 1)):
+        return "1" if value else "0"
+    raise InvalidEntryField(name, value, "expected a bool")
+
+
+def _date(name: str, value: Any) -> str:
+    # MAL wants dates as mmddyyyy
+    if isinstance(value, date):
+        return value.strftime("%m%d%Y")
+    if isinstance(value, str) and len(value) == 8 and value.isdigit():
+        return value
+    raise InvalidEntryField(name, value, "expected a date or a mmddyyyy string")
+
+
+def _text(name: str, value: Any) -> str:
+    if not isinstance(value, str):
+        raise InvalidEntryField(name, value, "expected a str")
+    return escape(value)
+
+
+def _tags(name: str, value: Any) -> str:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        for tag in value:
+            if not isinstance(tag, str):
+                raise InvalidEntryField(name, value, "expected every tag to be a str, got {!r}".format(tag))
+        value = ",".join(value)
+    return _text(name, value)
+
+
+def _status(enumeration: Type[Enum]) -> Callable[[str, Any], str]:
+    values = {member.value for member in enumeration}
+
+    def convert(name: str, value: Any) -> str:
+        if isinstance(value, enumeration):
+            return str(value.value)
+        if isinstance(value, int) and not isinstance(value, bool) and value in values:
+            return str(value)
+        raise InvalidEntryField(name, value, "expected a {} or one of its values".format(enumeration.__name__))
+    return convert
+
+
+class EntrySchema(object):
+
+    """
+    The fields `myanimelist`_ accepts for an anime or manga list entry, used to turn keyword arguments into the XML
+    the add and update endpoints take.
+
+    Every value is checked and converted before anything is sent, so bad input fails straight away with
+    :class:`pyanimelist.errors.InvalidEntryField` instead of being sent to MAL.
+    """
+
+    def __init__(self, fields: Dict[str, Callable[[str, Any], str]], aliases: Dict[str, str] = None):
+        """
+        :param dict fields: The XML element name of each field and the function converting its value to text
+        :param dict aliases: Other names each field can be passed as, mapped onto the element name
+        """
+        self.fields = fields
+        self.aliases = aliases or {}
+        # The opening and closing tag of every field, built once instead of on every call
+        self._templates = {name: ("<{}>".format(name), "</{}>".format(name)) for name in fields}
+        self._order = {name: index for index, name in enumerate(fields)}
+
+    def validate(self, values: Dict[str, Any]) -> Dict[str, str]:
+        """
+        :param dict values: The fields being set, by element name or alias
+        :return: The converted text of each field keyed by element name
+        :rtype: dict
+        :raises InvalidEntryField: If a field is unknown or its value isn't valid
+        """
+        converted = {}
+        for name, value in values.items():
+            name = self.aliases.get(name, name)
+            converter = self.fields.get(name)
+            if converter is None:
+                raise InvalidEntryField(name, value, "unknown field")
+            if value is None:
+                continue
+            converted[name] = converter(name, value)
+        return converted
+
+    def to_xml(self, values: Dict[str, Any]) -> str:
+        """
+        :param dict values: The fields being set, by element name or alias
+        :return: The ``<entry>`` document for the fields, in the order MAL lists them
+        :rtype: str
+        :raises InvalidEntryField: If a field is unknown or its value isn't valid
+        """
+        converted = self.validate(values)
+        templates = self._templates
+        parts = [XML_HEADER, "<entry>"]
+        for name in sorted(converted, key=self._order.__getitem__):
+            opening, closing = templates[name]
+            parts.append(opening)
+            parts.append(converted[name])
+            parts.append(closing)
+        parts.append("</entry>")
+        return "".join(parts)
+
+
+# Names the client docstrings have used over time for the same fields
+_COMMON_ALIASES = {
+    "date_started": "date_start",
+    "date_finished": "date_finish",
+}
+
+ANIME_ENTRY = EntrySchema(
+    {
+        "episode": _integer(),
+        "status": _status(AnimeStatus),
+        "score": _integer(0, 10),
+        "storage_type": _integer(0, 8),
+        "storage_value": _integer(),
+        "times_rewatched": _integer(),
+        "rewatch_value": _integer(0, 5),
+        "date_start": _date,
+        "date_finish": _date,
+        "priority": _integer(0, 2),
+        "enable_discussion": _flag,
+        "enable_rewatching": _flag,
+        "comments": _text,
+        "fansub_group": _text,
+        "tags": _tags
+    },
+    dict(_COMMON_ALIASES, episodes="episode", storage_types="storage_type")
+)
+
+MANGA_ENTRY = EntrySchema(
+    {
+        "chapter": _integer(),
+        "volume": _integer(),
+        "status": _status(MangaStatus),
+        "score": _integer(0, 10),
+        "times_reread": _integer(),
+        "reread_value": _integer(0, 5),
+        "date_start": _date,
+        "date_finish": _date,
+        "priority": _integer(0, 2),
+        "enable_discussion": _flag,
+        "enable_rereading": _flag,
+        "comments": _text,
+        "scan_group": _text,
+        "retail_volumes": _integer(),
+        "tags": _tags
+    },
+    dict(_COMMON_ALIASES, chapters="chapter", volumes="volume")
+)
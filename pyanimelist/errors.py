@@ -1,6 +1,3 @@
-import warnings
-
-
 class PyAnimeListException(Exception):
     """
     Base exception class for pyanimelist exceptions
@@ -31,8 +28,30 @@ class InvalidCredentials(ResponseError):
     pass
 
 
-class ScraperDisabled(PyAnimeListException, warnings.Warning):
+class ScraperDisabled(PyAnimeListException, UserWarning):
     """
     Raised when user tries using a method on :class:`pyanimelist.Client.scraper`
     """
     pass
+
+
+class OperationDropped(PyAnimeListException):
+    """
+    Set as the error of a :class:`pyanimelist.bulk.BulkResult` whose update wasn't sent because an earlier operation
+    in the batch deleted the entry
+    """
+    pass
+
+
+class InvalidEntryField(PyAnimeListException, ValueError):
+    """
+    Raised before anything is sent when a list entry field is unknown or has a value MAL won't accept
+
+    Inherits from :class:`ValueError` as well
+    """
+
+    def __init__(self, field: str, value, reason: str):
+        super().__init__("{}={!r}: {}".format(field, value, reason))
+        self.field = field
+        self.value = value
+        self.reason = reason
@@ -0,0 +1,108 @@
+import asyncio
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict
+
+from lxml import etree
+
+__all__ = ["ParseExecutor"]
+
+
+class ParseExecutor(object):
+
+    """
+    Decides where responses are parsed so big ones don't block the event loop.
+
+    Bodies smaller than ``threshold`` bytes are parsed inline (handing them off would cost more than parsing them),
+    bigger ones go to ``executor`` (the loops default thread pool if None) and ones of ``process_threshold`` bytes or
+    more go to ``process_executor`` when there is one. Time spent parsing inline is recorded as time the loop was
+    blocked for.
+
+    When it has :attr:`metrics` every parse is timed and reported along with how many entries it produced, for
+    offloaded parses that includes the time spent waiting for a worker.
+    """
+
+    def __init__(self, threshold: int = 256 * 1024, executor: Executor = None, process_executor: Executor = None,
+                 process_threshold: int = 4 * 1024 * 1024, metrics=None):
+        """
+        :param int threshold: Bodies this many bytes or bigger are parsed off the loop
+        :param concurrent.futures.Executor executor: Where bodies over the threshold are parsed, usually a thread pool
+        :param concurrent.futures.Executor process_executor: Where the biggest bodies are parsed, usually a process
+                                                             pool, the parse functions and results have to be picklable
+        :param int process_threshold: Bodies this many bytes or bigger are parsed in process_executor
+        :param pyanimelist.metrics.Metrics metrics: Where parse times are reported, set by the client it's given to
+                                                    when None
+        """
+        self.threshold = threshold
+        self.executor = executor
+        self.process_executor = process_executor
+        self.process_threshold = process_threshold
+        self.metrics = metrics
+        self.inline = 0
+        self.offloaded = 0
+        self.blocked = 0.0
+        self.max_blocked = 0.0
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """
+        How many bodies were parsed inline and offloaded, and the total and longest time the loop was blocked for in
+        seconds
+        """
+        return {
+            "inline": self.inline,
+            "offloaded": self.offloaded,
+            "blocked": self.blocked,
+            "max_blocked": self.max_blocked
+        }
+
+    async def run(self, func: Callable[..., Any], body: bytes, *args) -> Any:
+        """
+        Calls ``func(body, *args)`` inline or in an executor depending on the size of the body
+
+        :param func: The parse function, a module level function if a process executor might be used
+        :param bytes body: The raw response body
+        """
+        return await self._call(func, func.__name__, len(body), True, 0.0, body, *args)
+
+    async def build(self, func: Callable[..., Any], name: str, root: etree._Element, size: int, fed: float,
+                    *args) -> Any:
+        """
+        Calls ``func(root, *args)`` on a tree that was already parsed, inline or in :attr:`executor` depending on the
+        size of the body it was parsed from. Finished trees can be read from another thread but can't be pickled, so
+        :attr:`process_executor` is never used.
+
+        :param func: The build function
+        :param str name: The name of the parse function it stands in for, what it's reported as
+        :param lxml.etree._Element root: The root of the tree
+        :param int size: How many bytes the tree was parsed from
+        :param float fed: How many seconds were spent feeding the body to the parser on the loop, they're added to
+                          the reported parse time, to :attr:`blocked` and count towards :attr:`max_blocked`
+        """
+        self.blocked += fed
+        self.max_blocked = max(self.max_blocked, fed)
+        return await self._call(func, name, size, False, fed, root, *args)
+
+    async def _call(self, func: Callable[..., Any], name: str, size: int, picklable: bool, elapsed: float,
+                    *args) -> Any:
+        start = time.perf_counter()
+        if size < self.threshold:
+            try:
+                result = func(*args)
+            finally:
+                blocked = time.perf_counter() - start
+                self.inline += 1
+                self.blocked += blocked
+                self.max_blocked = max(self.max_blocked, blocked)
+        else:
+            executor = self.executor
+            if picklable and self.process_executor is not None and size >= self.process_threshold:
+                executor = self.process_executor
+            self.offloaded += 1
+            result = await asyncio.get_event_loop().run_in_executor(executor, func, *args)
+        if self.metrics is not None:
+            self.metrics.parsed(
+                name.lstrip("_"), elapsed + time.perf_counter() - start,
+                len(result) if hasattr(result, "__len__") else None
+            )
+        return result
@@ -0,0 +1,341 @@
+import gzip
+import json
+import os
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict, namedtuple
+from datetime import date
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .abstractions import Titles, Dates
+from .errors import InvalidSeriesTypeException
+from .objects import Anime, Manga, UserAnime, UserManga
+
+__all__ = ["TitleIndex", "TitleMatch"]
+
+TitleMatch = namedtuple("TitleMatch", "series_type id title score item")
+TitleMatch.__doc__ = """
+A result from :meth:`TitleIndex.search`, title is the title (or synonym) that matched best, score is between 0 and 1
+and item is the :class:`pyanimelist.objects.Anime`/:class:`pyanimelist.objects.Manga` the index holds for it
+"""
+
+_SERIES_TYPES = {
+    "anime": Anime,
+    "manga": Manga
+}
+
+_FORMAT_VERSION = 1
+
+_SEPARATORS = re.compile(r"[\W_]+")
+
+Key = Tuple[str, int]
+
+# The fields items built from users lists have in full, their titles are missing the english one
+_USER_ENTRY_FIELDS = {
+    "anime": frozenset(("id", "episode_count", "dates", "cover")),
+    "manga": frozenset(("id", "chapters", "volumes", "dates", "cover"))
+}
+
+
+def normalize(title: str) -> str:
+    """
+    Folds a title down to what's compared when matching, accents and case are dropped and anything that isn't a letter
+    or digit separates words
+
+    :param str title: The title being normalized
+    :rtype: str
+    """
+    if not title.isascii():
+        # Splits accented letters into the letter and its accent so the accent can be dropped
+        title = "".join(
+            character for character in unicodedata.normalize("NFKD", title) if not unicodedata.combining(character)
+        )
+    return " ".join(_SEPARATORS.sub(" ", title.casefold()).split())
+
+
+def _trigrams(normalized: str) -> Set[str]:
+    padded = "  " + normalized + " "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _from_user_entry(entry: Union[UserAnime, UserManga]) -> Union[Anime, Manga]:
+    # malappinfo only has some of what a search result has, the rest is left as None
+    titles = Titles(entry.title, None, list(entry.synonyms))
+    dates = Dates(entry.series_start, entry.series_end)
+    if isinstance(entry, UserAnime):
+        return Anime(id=entry.id, titles=titles, episode_count=entry.episodes, dates=dates, cover=entry.cover)
+    return Manga(id=entry.id, titles=titles, chapters=entry.chapters, volumes=entry.volumes, dates=dates,
+                 cover=entry.cover)
+
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError("{!r} is not JSON serializable".format(value))
+
+
+class TitleIndex(object):
+
+    """
+    An in-process index of the titles of the anime and manga seen so far, for resolving titles to ids without asking
+    MAL.
+
+    Every title, english title and synonym is normalized (see :func:`normalize`) and indexed by word for prefix
+    matching, and by trigram for fuzzy matching. Items can be added one at a time as they're seen, search results
+    replace entries built from users lists since they hold more. :meth:`save` and :meth:`load` keep it on disk.
+    """
+
+    def __init__(self, fuzzy_threshold: float = 0.45):
+        """
+        :param float fuzzy_threshold: How similar (0 to 1) a title has to be to a query to be a fuzzy match
+        """
+        self.fuzzy_threshold = fuzzy_threshold
+        self._items = {}  # type: Dict[Key, Union[Anime, Manga]]
+        self._complete = set()  # type: Set[Key]
+        self._titles = {}  # type: Dict[Key, List[Tuple[str, str]]]
+        self._words = {}  # type: Dict[str, Set[Key]]
+        # Only built by the first fuzzy search, most lookups never need it
+        self._trigrams = None  # type: Optional[Dict[str, Set[Key]]]
+        self._exact = defaultdict(set)  # type: Dict[str, Set[Key]]
+        # Sorted words for prefix lookups, rebuilt on the first lookup after words are added
+        self._sorted_words = None  # type: Optional[List[str]]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key: Key) -> bool:
+        return key in self._items
+
+    def get(self, series_type: str, series_id: int) -> Optional[Union[Anime, Manga]]:
+        """
+        :return: The item held for a series, None if it hasn't been seen
+        """
+        return self._items.get((series_type, series_id))
+
+    def has_fields(self, series_type: str, series_id: int, fields: Iterable[str] = None) -> bool:
+        """
+        :param fields: The attributes wanted, None for all of them
+        :return: Whether the item held for a series has those attributes as a search would, items built from users
+                 lists only have some
+        :rtype: bool
+        """
+        key = (series_type, series_id)
+        if key in self._complete:
+            return True
+        return key in self._items and fields is not None and _USER_ENTRY_FIELDS[series_type].issuperset(fields)
+
+    def add(self, item: Union[Anime, Manga, UserAnime, UserManga]) -> bool:
+        """
+        Indexes (or reindexes) one series, items without an id or titles are skipped
+
+        :param item: A search result, or an entry from a users list
+        :return: Whether anything was indexed
+        :rtype: bool
+        """
+        complete = isinstance(item, (Anime, Manga))
+        if not complete:
+            if not isinstance(item, (UserAnime, UserManga)):
+                raise TypeError("can't index {!r}".format(type(item).__name__))
+            item = _from_user_entry(item)
+        series_type = "anime" if isinstance(item, Anime) else "manga"
+        titles = item.titles
+        if item.id is None or titles is None:
+            return False
+        key = (series_type, item.id)
+        if not complete and key in self._complete:
+            # Don't swap a search result for the less detailed version from a users list
+            return False
+        if getattr(item, "_element", None) is not None:
+            # Lazily decoded results keep their whole response alive, the index keeps a decoded copy instead so the
+            # callers object stays lazy
+            item = item._detached()
+        self._unindex(key)
+        self._items[key] = item
+        if complete:
+            self._complete.add(key)
+        else:
+            self._complete.discard(key)
+        seen = set()
+        entries = []
+        for title in [titles.jp, titles.english] + list(titles.synonyms or ()):
+            if not title:
+                continue
+            normalized = normalize(title)
+            if not normalized or normalized in seen:
+                continue
+            seen.add(normalized)
+            entries.append((title, normalized))
+            self._exact[normalized].add(key)
+            for word in normalized.split():
+                keys = self._words.get(word)
+                if keys is None:
+                    keys = self._words[word] = set()
+                    self._sorted_words = None
+                keys.add(key)
+            if self._trigrams is not None:
+                for trigram in _trigrams(normalized):
+                    self._trigrams[trigram].add(key)
+        self._titles[key] = entries
+        return True
+
+    def update(self, items: Iterable[Union[Anime, Manga, UserAnime, UserManga]]) -> int:
+        """
+        :param items: Search results or entries from users lists
+        :return: How many were indexed
+        :rtype: int
+        """
+        return sum(self.add(item) for item in items)
+
+    def remove(self, series_type: str, series_id: int):
+        """
+        Drops a series from the index, nothing happens if it isn't there
+        """
+        key = (series_type, series_id)
+        self._unindex(key)
+        self._items.pop(key, None)
+        self._complete.discard(key)
+
+    def _unindex(self, key: Key):
+        for _, normalized in self._titles.pop(key, ()):
+            tables = [(self._exact, (normalized,)), (self._words, normalized.split())]
+            if self._trigrams is not None:
+                tables.append((self._trigrams, _trigrams(normalized)))
+            for table, names in tables:
+                for name in names:
+                    keys = table.get(name)
+                    if keys is not None:
+                        keys.discard(key)
+                        if not keys:
+                            del table[name]
+                            if table is self._words:
+                                self._sorted_words = None
+
+    def _prefixed(self, prefix: str) -> Set[Key]:
+        if self._sorted_words is None:
+            self._sorted_words = sorted(self._words)
+        words = self._sorted_words
+        keys = set()
+        for i in range(bisect_left(words, prefix), len(words)):
+            if not words[i].startswith(prefix):
+                break
+            keys |= self._words[words[i]]
+        return keys
+
+    def _best_title(self, key: Key, query: str) -> Tuple[str, float]:
+        best, score = None, -1.0
+        for title, normalized in self._titles[key]:
+            ratio = 1.0 if normalized == query else SequenceMatcher(None, query, normalized).ratio()
+            if ratio > score:
+                best, score = title, ratio
+        return best, score
+
+    def search(self, query: str, series_type: str = None, limit: int = None, fuzzy: bool = True) -> List[TitleMatch]:
+        """
+        Finds the series with a title containing every word of the query, each word can be the start of a word
+        (``"shingeki kyo"`` matches Shingeki no Kyojin). When nothing matches that way and fuzzy is True, titles
+        sharing enough trigrams with the query are returned instead, which catches typos.
+
+        :param str query: The title being looked for
+        :param str series_type: anime or manga to only search one, None for both
+        :param int limit: The most matches returned
+        :param bool fuzzy: Fall back to fuzzy matching when nothing matches by word
+        :return: The matches, best first, exact matches score 1
+        :rtype: List[TitleMatch]
+        """
+        if series_type is not None and series_type not in _SERIES_TYPES:
+            raise InvalidSeriesTypeException
+        query = normalize(query)
+        if not query:
+            return []
+        candidates = None
+        for word in query.split():
+            keys = self._prefixed(word)
+            candidates = keys if candidates is None else candidates & keys
+            if not candidates:
+                break
+        scale = 1.0
+        if not candidates and fuzzy:
+            candidates = self._similar(query)
+            # Fuzzy matches rank below anything that matched by word
+            scale = 0.9
+        matches = []
+        for key in candidates or ():
+            if series_type is not None and key[0] != series_type:
+                continue
+            title, score = self._best_title(key, query)
+            if scale != 1.0 and score < self.fuzzy_threshold:
+                continue
+            matches.append(TitleMatch(key[0], key[1], title, score * scale if score < 1.0 else score, self._items[key]))
+        matches.sort(key=lambda match: (-match.score, len(match.title), match.id))
+        return matches[:limit] if limit is not None else matches
+
+    def _similar(self, query: str) -> Set[Key]:
+        if self._trigrams is None:
+            self._trigrams = defaultdict(set)
+            for key, titles in self._titles.items():
+                for _, normalized in titles:
+                    for trigram in _trigrams(normalized):
+                        self._trigrams[trigram].add(key)
+        trigrams = _trigrams(query)
+        shared = {}
+        for trigram in trigrams:
+            for key in self._trigrams.get(trigram, ()):
+                shared[key] = shared.get(key, 0) + 1
+        # Titles need a decent share of the queries trigrams before they're worth comparing properly
+        needed = max(1, int(len(trigrams) * self.fuzzy_threshold))
+        return {key for key, count in shared.items() if count >= needed}
+
+    def resolve(self, title: str, series_type: str = "anime", fuzzy: bool = True) -> Optional[int]:
+        """
+        :param str title: The title of the series
+        :param str series_type: anime or manga
+        :param bool fuzzy: Allow a fuzzy match when nothing matches exactly or by word
+        :return: The id of the series that matches the title best, None if nothing does
+        :rtype: int
+        """
+        exact = [key for key in self._exact.get(normalize(title), ()) if key[0] == series_type]
+        if exact:
+            return min(exact)[1]
+        matches = self.search(title, series_type, limit=1, fuzzy=fuzzy)
+        return matches[0].id if matches else None
+
+    def save(self, path: str):
+        """
+        Writes the indexed items to a gzipped JSON file, replacing it atomically
+
+        :param str path: Where the index is written
+        """
+        data = {
+            "version": _FORMAT_VERSION,
+            "items": [
+                {"series_type": key[0], "complete": key in self._complete, "item": item.to_dict()}
+                for key, item in self._items.items()
+            ]
+        }
+        temporary = path + ".tmp"
+        with gzip.open(temporary, "wt", encoding="utf-8") as f:
+            json.dump(data, f, default=_json_default, separators=(",", ":"))
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str, fuzzy_threshold: float = 0.45) -> "TitleIndex":
+        """
+        Rebuilds an index written by :meth:`save`
+
+        :param str path: Where the index was written
+        :param float fuzzy_threshold: See :class:`TitleIndex`
+        :rtype: TitleIndex
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != _FORMAT_VERSION:
+            raise ValueError("unsupported title index version {!r}".format(data.get("version")))
+        index = cls(fuzzy_threshold)
+        for entry in data["items"]:
+            item = _SERIES_TYPES[entry["series_type"]].from_dict(entry["item"])
+            index.add(item)
+            if not entry["complete"]:
+                index._complete.discard((entry["series_type"], item.id))
+        return index
@@ -0,0 +1,339 @@
+import logging
+import time
+from bisect import bisect_left
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import aiohttp
+
+__all__ = ["Metrics", "MetricsSink", "MemorySink", "LoggingSink", "PrometheusSink", "Histogram"]
+
+# Label sets are tuples of (name, value) pairs so they can be used as dict keys without building anything
+Labels = Tuple[Tuple[str, str], ...]
+
+# Upper bounds in seconds, from a cached parse to a slow MAL
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MetricsSink(object):
+
+    """
+    Where :class:`Metrics` sends what it records, subclass this to forward them somewhere else (statsd, OpenTelemetry)
+    """
+
+    def increment(self, name: str, labels: Labels, value: float = 1):
+        """
+        Adds to a counter
+
+        :param str name: The name of the counter, like ``pyanimelist_requests_total``
+        :param tuple labels: (name, value) pairs telling apart the series of the counter
+        :param float value: How much to add
+        """
+        raise NotImplementedError
+
+    def observe(self, name: str, labels: Labels, value: float):
+        """
+        Records a value in a histogram
+
+        :param str name: The name of the histogram, like ``pyanimelist_ttfb_seconds``
+        :param tuple labels: (name, value) pairs telling apart the series of the histogram
+        :param float value: The value observed
+        """
+        raise NotImplementedError
+
+
+class Histogram(object):
+
+    """
+    Counts of observed values per bucket, along with their total and how many there were
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # The last count is for values over the biggest bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        :param float q: Between 0 and 1, 0.99 for the p99
+        :return: The upper bound of the bucket the quantile falls in (inf if it's past the biggest bucket), None if
+                 nothing has been observed
+        :rtype: float
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class MemorySink(MetricsSink):
+
+    """
+    Keeps counters and histograms in memory for reading back with :meth:`counter`, :meth:`histogram` or :meth:`snapshot`
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        :param tuple buckets: The upper bounds every histogram counts values into
+        """
+        self.buckets = buckets
+        self.counters = {}  # type: Dict[Tuple[str, Labels], float]
+        self.histograms = {}  # type: Dict[Tuple[str, Labels], Histogram]
+
+    def increment(self, name: str, labels: Labels, value: float = 1):
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, labels: Labels, value: float):
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def counter(self, name: str, **labels: str) -> float:
+        """
+        :return: The value of a counter, summed over every series matching the labels given
+        :rtype: float
+        """
+        wanted = set(labels.items())
+        return sum(value for (key, series), value in self.counters.items() if key == name and wanted <= set(series))
+
+    def histogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        """
+        :return: The histogram with exactly these labels, None if nothing was observed in it
+        :rtype: Histogram
+        """
+        return self.histograms.get((name, tuple(sorted(labels.items()))))
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Hashable]]]:
+        """
+        :return: Every series of every metric, counters with their value and histograms with their count, sum, mean,
+                 p50 and p99
+        :rtype: dict
+        """
+        metrics = {}
+        for (name, labels), value in sorted(self.counters.items()):
+            metrics.setdefault(name, []).append(dict(labels, value=value))
+        for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+            metrics.setdefault(name, []).append(dict(
+                labels, count=histogram.count, sum=histogram.sum, mean=histogram.mean,
+                p50=histogram.quantile(0.5), p99=histogram.quantile(0.99)
+            ))
+        return metrics
+
+    def clear(self):
+        self.counters.clear()
+        self.histograms.clear()
+
+
+class PrometheusSink(MemorySink):
+
+    """
+    A :class:`MemorySink` which can render what it holds in the Prometheus text exposition format, to be served on a
+    ``/metrics`` endpoint
+    """
+
+    @staticmethod
+    def _labels(labels: Labels, extra: str = None) -> str:
+        pairs = ['{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"')) for name, value in labels]
+        if extra is not None:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> str:
+        """
+        :rtype: str
+        """
+        lines = []
+        typed = set()
+        for (name, labels), value in sorted(self.counters.items()):
+            if name not in typed:
+                lines.append("# TYPE {} counter".format(name))
+                typed.add(name)
+            lines.append("{}{} {}".format(name, self._labels(labels), value))
+        for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+            if name not in typed:
+                lines.append("# TYPE {} histogram".format(name))
+                typed.add(name)
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append("{}_bucket{} {}".format(name, self._labels(labels, 'le="{}"'.format(le)), cumulative))
+            lines.append("{}_sum{} {}".format(name, self._labels(labels), histogram.sum))
+            lines.append("{}_count{} {}".format(name, self._labels(labels), histogram.count))
+        return "\n".join(lines) + "\n"
+
+
+class LoggingSink(MetricsSink):
+
+    """
+    Logs every value as it's recorded, mostly useful for debugging
+    """
+
+    def __init__(self, logger: logging.Logger = None, level: int = logging.DEBUG):
+        """
+        :param logging.Logger logger: Where values are logged, ``pyanimelist.metrics`` by default
+        :param int level: The level values are logged at
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+
+    def increment(self, name: str, labels: Labels, value: float = 1):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, "%s%s +%s", name, dict(labels), value)
+
+    def observe(self, name: str, labels: Labels, value: float):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, "%s%s %.6f", name, dict(labels), value)
+
+
+class Metrics(object):
+
+    """
+    Records how each request made by :class:`pyanimelist.client.PyAnimeList` went and sends it to a sink.
+
+    Pass it as ``metrics`` to the client. Per endpoint it records the time spent waiting for a pooled connection,
+    resolving DNS, connecting, until the response headers arrive (TTFB) and downloading the body, along with the
+    status, bytes received and retries, and per call the bytes that came over the wire and the most of the body the
+    client held at once (histograms of bytes are best read by their sum and mean with the default buckets). Per
+    parser it records parse time and how many entries came out, and the caches report hits and misses. Nothing is
+    recorded, and nothing costs anything, when the client has no metrics.
+
+    The timings up to TTFB come from an :class:`aiohttp.TraceConfig`, clients given their own session need
+    :meth:`trace_config` added to it for those.
+    """
+
+    def __init__(self, sink: MetricsSink = None):
+        """
+        :param MetricsSink sink: Where everything recorded goes, a new :class:`MemorySink` by default
+        """
+        self.sink = sink if sink is not None else MemorySink()
+
+    @staticmethod
+    def _endpoint(context) -> str:
+        request_context = context.trace_request_ctx
+        return request_context if isinstance(request_context, str) else "other"
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """
+        :return: A trace config recording connection and TTFB timings, for adding to an :class:`aiohttp.ClientSession`
+        :rtype: aiohttp.TraceConfig
+        """
+        sink = self.sink
+        clock = time.perf_counter
+        endpoint = self._endpoint
+
+        async def request_start(session, context, params):
+            context.start = clock()
+
+        async def request_end(session, context, params):
+            labels = (("endpoint", endpoint(context)),)
+            sink.observe("pyanimelist_ttfb_seconds", labels, clock() - context.start)
+            sink.increment("pyanimelist_requests_total", labels + (("status", str(params.response.status)),))
+
+        async def request_exception(session, context, params):
+            sink.increment("pyanimelist_request_errors_total", (("endpoint", endpoint(context)),
+                                                                ("error", type(params.exception).__name__)))
+
+        async def queued_start(session, context, params):
+            context.queued = clock()
+
+        async def queued_end(session, context, params):
+            sink.observe("pyanimelist_pool_wait_seconds", (("endpoint", endpoint(context)),), clock() - context.queued)
+
+        async def create_start(session, context, params):
+            context.connecting = clock()
+
+        async def create_end(session, context, params):
+            sink.observe("pyanimelist_connect_seconds", (("endpoint", endpoint(context)),),
+                         clock() - context.connecting)
+
+        async def reuse(session, context, params):
+            sink.increment("pyanimelist_connections_reused_total", (("endpoint", endpoint(context)),))
+
+        async def dns_start(session, context, params):
+            context.resolving = clock()
+
+        async def dns_end(session, context, params):
+            sink.observe("pyanimelist_dns_seconds", (("endpoint", endpoint(context)),), clock() - context.resolving)
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(request_start)
+        trace_config.on_request_end.append(request_end)
+        trace_config.on_request_exception.append(request_exception)
+        trace_config.on_connection_queued_start.append(queued_start)
+        trace_config.on_connection_queued_end.append(queued_end)
+        trace_config.on_connection_create_start.append(create_start)
+        trace_config.on_connection_create_end.append(create_end)
+        trace_config.on_connection_reuseconn.append(reuse)
+        trace_config.on_dns_resolvehost_start.append(dns_start)
+        trace_config.on_dns_resolvehost_end.append(dns_end)
+        return trace_config
+
+    def downloaded(self, endpoint: str, size: int, seconds: float):
+        """
+        :param str endpoint: What was requested
+        :param int size: How many bytes the body was
+        :param float seconds: How long reading the body took after the headers arrived
+        """
+        labels = (("endpoint", endpoint),)
+        self.sink.increment("pyanimelist_response_bytes_total", labels, size)
+        self.sink.observe("pyanimelist_download_seconds", labels, seconds)
+
+    def transferred(self, endpoint: str, wire: int, decoded: int, peak: int):
+        """
+        :param str endpoint: What was requested
+        :param int wire: How many bytes came over the wire, compressed if the response was
+        :param int decoded: How many bytes they decompressed to
+        :param int peak: The most bytes of the body the client held at once while reading it
+        """
+        labels = (("endpoint", endpoint),)
+        self.sink.increment("pyanimelist_wire_bytes_total", labels, wire)
+        self.sink.observe("pyanimelist_wire_bytes", labels, wire)
+        self.sink.observe("pyanimelist_peak_body_bytes", labels, peak)
+        if decoded:
+            self.sink.observe("pyanimelist_compression_ratio", labels, wire / decoded)
+
+    def parsed(self, parser: str, seconds: float, entries: int = None):
+        """
+        :param str parser: What parsed the response
+        :param float seconds: How long parsing took
+        :param int entries: How many entries came out, None if the result isn't a collection
+        """
+        labels = (("parser", parser),)
+        self.sink.observe("pyanimelist_parse_seconds", labels, seconds)
+        if entries is not None:
+            self.sink.increment("pyanimelist_entries_total", labels, entries)
+
+    def retried(self, endpoint: str, status: int):
+        """
+        :param str endpoint: What was requested
+        :param int status: The status which caused the retry
+        """
+        self.sink.increment("pyanimelist_retries_total", (("endpoint", endpoint), ("status", str(status))))
+
+    def cache(self, cache: str, result: str):
+        """
+        :param str cache: ``response``, ``http``, ``parsed`` or ``credentials``
+        :param str result: ``hit``, ``miss``, ``coalesced`` or ``revalidated``
+        """
+        self.sink.increment("pyanimelist_cache_total", (("cache", cache), ("result", result)))
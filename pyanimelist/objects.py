@@ -1,66 +1,361 @@
-class Anime(object):
+from collections import namedtuple
+from typing import List
+
+from .abstractions import Titles, Dates
+from .enumerations import AnimeStatus, MangaStatus
+from .util.models import SlottedObject
+from .util.parsing import (
+    to_int,
+    to_float,
+    to_bool,
+    to_date,
+    to_text,
+    to_timestamp,
+    to_synonyms,
+    to_enum,
+    intern_text,
+    clean_synopsis
+)
+
+__all__ = ["Anime", "Manga", "UserAnime", "UserManga", "UserInfo", "UserSeries", "UserResult", "SeriesDetails",
+           "SeriesStatistics", "RelatedEntry", "ScrapeResult"]
+
+_anime_status = to_enum(AnimeStatus)
+_manga_status = to_enum(MangaStatus)
+
+
+def _child(tag: str, converter=to_text):
+    # Decodes one child of a search result, findtext gives None for missing children so they end up as None
+    return lambda element: converter(element.findtext(tag))
+
+
+def _titles(element) -> Titles:
+    return Titles(
+        jp=element.findtext("title"),
+        english=element.findtext("english"),
+        synonyms=to_synonyms(element.findtext("synonyms"))
+    )
+
+
+def _dates(element) -> Dates:
+    return Dates(start=element.findtext("start_date"), end=element.findtext("end_date"))
+
+
+# How search results decode the fields Anime and Manga share
+_SEARCH_FIELDS = {
+    "id": _child("id", to_int),
+    "titles": _titles,
+    "dates": _dates,
+    "type": _child("type", intern_text),
+    "status": _child("status", intern_text),
+    "_raw_synopsis": _child("synopsis"),
+    "_synopsis": lambda element: None,
+    "cover": _child("image")
+}
+
+
+class Anime(SlottedObject):
 
     """
     Represents a `myanimelist`_ anime
     """
 
+    __slots__ = ("id", "titles", "episode_count", "dates", "type", "status", "_raw_synopsis", "_synopsis", "cover",
+                 "_element")
+    _fields = ("id", "titles", "episode_count", "dates", "type", "status", "synopsis", "cover")
+    _nested = {"titles": Titles, "dates": Dates}
+    _lazy_fields = dict(_SEARCH_FIELDS, episode_count=_child("episodes", to_int))
+
     def __init__(self, **kwargs):
-        self.id = kwargs.get("id")
+        self.id = to_int(kwargs.get("id"))
         self.titles = kwargs.get("titles")
-        self.episode_count = kwargs.get("episode_count")
+        self.episode_count = to_int(kwargs.get("episode_count"))
         self.dates = kwargs.get("dates")
-        self.type = kwargs.get("type")
-        self.status = kwargs.get("status")
-        self.synopsis = kwargs.get("synopsis")
+        self.type = intern_text(kwargs.get("type"))
+        self.status = intern_text(kwargs.get("status"))
+        # Kept as MAL sent it, it's only cleaned up the first time someone reads it
+        self._raw_synopsis = kwargs.get("synopsis")
+        self._synopsis = None
         self.cover = kwargs.get("cover")
+        self._element = None
+
+    @property
+    def synopsis(self) -> str:
+        """
+        The synopsis with its BBCode and HTML stripped out and entities unescaped
+        """
+        if self._synopsis is None and self._raw_synopsis is not None:
+            self._synopsis = clean_synopsis(self._raw_synopsis)
+        return self._synopsis
 
 
-class Manga(object):
+class Manga(SlottedObject):
 
     """
     Represents a `myanimelist`_ manga
     """
 
+    __slots__ = ("id", "titles", "volumes", "chapters", "type", "status", "dates", "_raw_synopsis", "_synopsis",
+                 "cover", "_element")
+    _fields = ("id", "titles", "volumes", "chapters", "type", "status", "dates", "synopsis", "cover")
+    _nested = {"titles": Titles, "dates": Dates}
+    _lazy_fields = dict(_SEARCH_FIELDS, volumes=_child("volumes", to_int), chapters=_child("chapters", to_int))
+
     def __init__(self, **kwargs):
-        self.id = kwargs.get("id")
+        self.id = to_int(kwargs.get("id"))
         self.titles = kwargs.get("titles")
-        self.volumes = kwargs.get("volumes")
-        self.chapters = kwargs.get("chapters")
-        self.type = kwargs.get("type")
-        self.status = kwargs.get("status")
+        self.volumes = to_int(kwargs.get("volumes"))
+        self.chapters = to_int(kwargs.get("chapters"))
+        self.type = intern_text(kwargs.get("type"))
+        self.status = intern_text(kwargs.get("status"))
         self.dates = kwargs.get("dates")
-        self.synopsis = kwargs.get("synopsis")
+        # Kept as MAL sent it, it's only cleaned up the first time someone reads it
+        self._raw_synopsis = kwargs.get("synopsis")
+        self._synopsis = None
         self.cover = kwargs.get("cover")
+        self._element = None
+
+    @property
+    def synopsis(self) -> str:
+        """
+        The synopsis with its BBCode and HTML stripped out and entities unescaped
+        """
+        if self._synopsis is None and self._raw_synopsis is not None:
+            self._synopsis = clean_synopsis(self._raw_synopsis)
+        return self._synopsis
+
 
+class UserAnime(SlottedObject):
 
-class UserAnime(object):
+    """
+    Represents an anime on a users list from the malappinfo endpoint
+    """
+
+    __slots__ = ("id", "title", "synonyms", "type", "episodes", "series_status", "series_start", "series_end", "cover",
+                 "my_id", "watched_episodes", "start_date", "finish_date", "score", "status", "rewatching",
+                 "rewatching_episode", "last_updated", "tags")
+    _xml_fields = {
+        "series_animedb_id": ("id", to_int),
+        "series_title": ("title", to_text),
+        "series_synonyms": ("synonyms", to_synonyms),
+        "series_type": ("type", to_int),
+        "series_episodes": ("episodes", to_int),
+        "series_status": ("series_status", to_int),
+        "series_start": ("series_start", to_date),
+        "series_end": ("series_end", to_date),
+        "series_image": ("cover", to_text),
+        "my_id": ("my_id", to_int),
+        "my_watched_episodes": ("watched_episodes", to_int),
+        "my_start_date": ("start_date", to_date),
+        "my_finish_date": ("finish_date", to_date),
+        "my_score": ("score", to_int),
+        "my_status": ("status", _anime_status),
+        "my_rewatching": ("rewatching", to_bool),
+        "my_rewatching_ep": ("rewatching_episode", to_int),
+        "my_last_updated": ("last_updated", to_timestamp),
+        "my_tags": ("tags", to_text)
+    }
 
     def __init__(self, **kwargs):
+        self.id = to_int(kwargs.get("id"))
         self.title = kwargs.get("title")
-        self.score = kwargs.get("scores")
-        self.episodes = kwargs.get("episodes")
-        self.my_id = kwargs.get("series")
-        # Remember that there's more to do here
+        self.synonyms = to_synonyms(kwargs.get("synonyms"))
+        self.type = to_int(kwargs.get("type"))
+        self.episodes = to_int(kwargs.get("episodes"))
+        self.series_status = to_int(kwargs.get("series_status"))
+        self.series_start = to_date(kwargs.get("series_start"))
+        self.series_end = to_date(kwargs.get("series_end"))
+        self.cover = kwargs.get("cover")
+        self.my_id = to_int(kwargs.get("my_id"))
+        self.watched_episodes = to_int(kwargs.get("watched_episodes"))
+        self.start_date = to_date(kwargs.get("start_date"))
+        self.finish_date = to_date(kwargs.get("finish_date"))
+        self.score = to_int(kwargs.get("score"))
+        self.status = _anime_status(kwargs.get("status"))
+        self.rewatching = to_bool(kwargs.get("rewatching"))
+        self.rewatching_episode = to_int(kwargs.get("rewatching_episode"))
+        self.last_updated = to_timestamp(kwargs.get("last_updated"))
+        self.tags = kwargs.get("tags")
 
 
-class UserManga(object):
+class UserManga(SlottedObject):
+
+    """
+    Represents a manga on a users list from the malappinfo endpoint
+    """
+
+    __slots__ = ("id", "title", "synonyms", "type", "chapters", "volumes", "series_status", "series_start",
+                 "series_end", "cover", "my_id", "read_chapters", "read_volumes", "start_date", "finish_date", "score",
+                 "status", "rereading", "rereading_chapter", "last_updated", "tags")
+    _xml_fields = {
+        "series_mangadb_id": ("id", to_int),
+        "series_title": ("title", to_text),
+        "series_synonyms": ("synonyms", to_synonyms),
+        "series_type": ("type", to_int),
+        "series_chapters": ("chapters", to_int),
+        "series_volumes": ("volumes", to_int),
+        "series_status": ("series_status", to_int),
+        "series_start": ("series_start", to_date),
+        "series_end": ("series_end", to_date),
+        "series_image": ("cover", to_text),
+        "my_id": ("my_id", to_int),
+        "my_read_chapters": ("read_chapters", to_int),
+        "my_read_volumes": ("read_volumes", to_int),
+        "my_start_date": ("start_date", to_date),
+        "my_finish_date": ("finish_date", to_date),
+        "my_score": ("score", to_int),
+        "my_status": ("status", _manga_status),
+        # MAL really does spell it with two g's
+        "my_rereadingg": ("rereading", to_bool),
+        "my_rereading_chap": ("rereading_chapter", to_int),
+        "my_last_updated": ("last_updated", to_timestamp),
+        "my_tags": ("tags", to_text)
+    }
 
     def __init__(self, **kwargs):
-        pass
+        self.id = to_int(kwargs.get("id"))
+        self.title = kwargs.get("title")
+        self.synonyms = to_synonyms(kwargs.get("synonyms"))
+        self.type = to_int(kwargs.get("type"))
+        self.chapters = to_int(kwargs.get("chapters"))
+        self.volumes = to_int(kwargs.get("volumes"))
+        self.series_status = to_int(kwargs.get("series_status"))
+        self.series_start = to_date(kwargs.get("series_start"))
+        self.series_end = to_date(kwargs.get("series_end"))
+        self.cover = kwargs.get("cover")
+        self.my_id = to_int(kwargs.get("my_id"))
+        self.read_chapters = to_int(kwargs.get("read_chapters"))
+        self.read_volumes = to_int(kwargs.get("read_volumes"))
+        self.start_date = to_date(kwargs.get("start_date"))
+        self.finish_date = to_date(kwargs.get("finish_date"))
+        self.score = to_int(kwargs.get("score"))
+        self.status = _manga_status(kwargs.get("status"))
+        self.rereading = to_bool(kwargs.get("rereading"))
+        self.rereading_chapter = to_int(kwargs.get("rereading_chapter"))
+        self.last_updated = to_timestamp(kwargs.get("last_updated"))
+        self.tags = kwargs.get("tags")
 
 
-class UserInfo(object):
+class UserInfo(SlottedObject):
 
     """
     Represents a users myinfo from the malappinfo endpoint
     """
 
+    __slots__ = ("id", "username", "watching", "reading", "completed", "on_hold", "dropped", "plan_to_watch",
+                 "plan_to_read", "days_spent_watching")
+    _xml_fields = {
+        "user_id": ("id", to_int),
+        "user_name": ("username", to_text),
+        "user_watching": ("watching", to_int),
+        "user_reading": ("reading", to_int),
+        "user_completed": ("completed", to_int),
+        "user_onhold": ("on_hold", to_int),
+        "user_dropped": ("dropped", to_int),
+        "user_plantowatch": ("plan_to_watch", to_int),
+        "user_plantoread": ("plan_to_read", to_int),
+        "user_days_spent_watching": ("days_spent_watching", to_float)
+    }
+
     def __init__(self, **kwargs):
-        self.id = kwargs.get("id")
+        self.id = to_int(kwargs.get("id"))
         self.username = kwargs.get("username")
-        self.watching = kwargs.get("watching")
-        self.completed = kwargs.get("completed")
-        self.on_hold = kwargs.get("on_hold")
-        self.dropped = kwargs.get("dropped")
-        self.plan_to_watch = kwargs.get("plan_to_watch")
-        self.days_spent_watching = kwargs.get("days_spent_watching")
+        self.watching = to_int(kwargs.get("watching"))
+        self.reading = to_int(kwargs.get("reading"))
+        self.completed = to_int(kwargs.get("completed"))
+        self.on_hold = to_int(kwargs.get("on_hold"))
+        self.dropped = to_int(kwargs.get("dropped"))
+        self.plan_to_watch = to_int(kwargs.get("plan_to_watch"))
+        self.plan_to_read = to_int(kwargs.get("plan_to_read"))
+        self.days_spent_watching = to_float(kwargs.get("days_spent_watching"))
+
+
+class UserSeries(list):
+
+    """
+    The entries of a users list as returned by :meth:`pyanimelist.PyAnimeList.get_user_series`, it's a list of
+    :class:`UserAnime` or :class:`UserManga` with the users :class:`UserInfo` header kept on :attr:`info`
+    """
+
+    __slots__ = ("info",)
+
+    def __init__(self, entries: List[SlottedObject] = (), info: UserInfo = None):
+        super().__init__(entries)
+        self.info = info
+
+
+UserResult = namedtuple("UserResult", "username result error")
+UserResult.__doc__ = """
+What :meth:`pyanimelist.PyAnimeList.fetch_many_users` got for one user, error is the exception that was raised if
+fetching them failed (and result is None)
+"""
+
+
+RelatedEntry = namedtuple("RelatedEntry", "relation series_type id title")
+RelatedEntry.__doc__ = """
+A series linked from a :class:`SeriesDetails` page, relation is how MAL labels the link (``Sequel``, ``Adaptation``),
+series_type is anime or manga
+"""
+
+
+class SeriesDetails(SlottedObject):
+
+    """
+    What :class:`pyanimelist.scraper.Scraper` reads off an anime or manga page that the API doesn't return, fields
+    that don't apply to the series type (episodes for manga, authors for anime) are None
+    """
+
+    __slots__ = ("id", "series_type", "title", "type", "status", "episodes", "volumes", "chapters", "aired", "score",
+                 "ranked", "popularity", "members", "favorites", "genres", "studios", "authors", "synopsis", "related")
+
+    def __init__(self, **kwargs):
+        self.id = to_int(kwargs.get("id"))
+        self.series_type = intern_text(kwargs.get("series_type"))
+        self.title = kwargs.get("title")
+        self.type = intern_text(kwargs.get("type"))
+        self.status = intern_text(kwargs.get("status"))
+        self.episodes = to_int(kwargs.get("episodes"))
+        self.volumes = to_int(kwargs.get("volumes"))
+        self.chapters = to_int(kwargs.get("chapters"))
+        self.aired = kwargs.get("aired")
+        self.score = to_float(kwargs.get("score"))
+        self.ranked = to_int(kwargs.get("ranked"))
+        self.popularity = to_int(kwargs.get("popularity"))
+        self.members = to_int(kwargs.get("members"))
+        self.favorites = to_int(kwargs.get("favorites"))
+        self.genres = kwargs.get("genres") or []
+        self.studios = kwargs.get("studios")
+        self.authors = kwargs.get("authors")
+        self.synopsis = kwargs.get("synopsis")
+        self.related = [RelatedEntry(*entry) for entry in kwargs.get("related") or []]
+
+
+class SeriesStatistics(SlottedObject):
+
+    """
+    The statistics page of an anime or manga, how many users have it under each status and how many votes each score
+    from 1 to 10 got (``scores[0]`` is the votes for 1)
+    """
+
+    __slots__ = ("id", "series_type", "watching", "reading", "completed", "on_hold", "dropped", "plan_to_watch",
+                 "plan_to_read", "total", "scores")
+
+    def __init__(self, **kwargs):
+        self.id = to_int(kwargs.get("id"))
+        self.series_type = intern_text(kwargs.get("series_type"))
+        self.watching = to_int(kwargs.get("watching"))
+        self.reading = to_int(kwargs.get("reading"))
+        self.completed = to_int(kwargs.get("completed"))
+        self.on_hold = to_int(kwargs.get("on_hold"))
+        self.dropped = to_int(kwargs.get("dropped"))
+        self.plan_to_watch = to_int(kwargs.get("plan_to_watch"))
+        self.plan_to_read = to_int(kwargs.get("plan_to_read"))
+        self.total = to_int(kwargs.get("total"))
+        self.scores = kwargs.get("scores") or [0] * 10
+
+
+ScrapeResult = namedtuple("ScrapeResult", "series_id result error")
+ScrapeResult.__doc__ = """
+What :meth:`pyanimelist.scraper.Scraper.fetch_many` got for one series, error is the exception that was raised if
+scraping it failed (and result is None)
+"""
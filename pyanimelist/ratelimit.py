@@ -0,0 +1,221 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+__all__ = ["EndpointLimiter", "RateLimiter"]
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Turns a Retry-After header, which is either a number of seconds or a HTTP date, into seconds from now
+
+    :param str value: The value of the header
+    :rtype: float
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class EndpointLimiter(object):
+
+    """
+    A token bucket combined with a concurrency limit for a group of endpoints.
+
+    When adaptive, the concurrency limit is halved every time `myanimelist`_ throttles us or errors and grows back by
+    one for every limits worth of successful requests, a Retry-After header pauses the whole group for that long.
+    """
+
+    def __init__(self, rate: float, burst: int = None, concurrency: int = 4, adaptive: bool = True):
+        """
+        :param float rate: How many requests per second are allowed on average
+        :param int burst: How many requests can be made at once after being idle, defaults to the rate
+        :param int concurrency: The most requests that can be in flight at once
+        :param bool adaptive: If the concurrency limit should shrink when throttled
+        """
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.max_concurrency = concurrency
+        self.adaptive = adaptive
+        self.tokens = float(self.burst)
+        self.concurrency = float(concurrency)
+        self.in_flight = 0
+        self.throttled = 0
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+        self._waiters = []
+
+    @property
+    def state(self) -> Dict[str, float]:
+        """
+        A snapshot of the limiter, useful for running as close to the quota as possible
+        """
+        self._refill()
+        return {
+            "rate": self.rate,
+            "tokens": self.tokens,
+            "concurrency": int(self.concurrency),
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "throttled": self.throttled,
+            "paused_for": max(self.paused_until - time.monotonic(), 0.0)
+        }
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """
+        Waits until a request can be made, every call has to be followed by :meth:`release`
+        """
+        while self.in_flight >= int(self.concurrency):
+            waiter = asyncio.get_event_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+        try:
+            while True:
+                self._refill()
+                pause = self.paused_until - time.monotonic()
+                if pause <= 0 and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep(max(pause, (1 - self.tokens) / self.rate))
+        except BaseException:
+            self._leave()
+            raise
+
+    def release(self, status: int = None, retry_after: float = None):
+        """
+        :param int status: The status code of the response, None if the request failed before getting one
+        :param float retry_after: Seconds `myanimelist`_ asked us to wait for
+        """
+        if status is not None and (status == 429 or status >= 500):
+            self.throttled += 1
+            if self.adaptive:
+                self.concurrency = max(1.0, self.concurrency / 2)
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        elif status is not None and self.adaptive:
+            self.concurrency = min(float(self.max_concurrency), self.concurrency + 1 / self.concurrency)
+        self._leave()
+
+    def _after_fork(self) -> Any:
+        # Requests the parent had in flight or waiting never finish here, and their waiters belong to its loop
+        waiters, self._waiters = self._waiters, []
+        self.in_flight = 0
+        return waiters
+
+    def _leave(self):
+        self.in_flight -= 1
+        # Wake everyone up, they check if there's room again themselves
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+class RateLimiter(object):
+
+    """
+    Client side rate limiting for :class:`pyanimelist.PyAnimeList`, split into groups of endpoints which each have
+    their own :class:`EndpointLimiter`. Throttled requests are retried with jittered exponential backoff.
+
+    The groups are ``"search"``, ``"writes"`` (adding, updating and deleting), ``"malappinfo"``, ``"account"`` and
+    ``"scraper"`` (pages read by :class:`pyanimelist.scraper.Scraper`, which has its own limiter as well), requests in
+    a group without a limiter aren't limited.
+    """
+
+    #: The statuses which are retried, a gateway error can come back after the request was acted on so only
+    #: requests which are safe to repeat are retried on 502 and 504
+    RETRY_STATUSES = (429, 502, 503, 504)
+
+    #: The statuses retried per group where they differ from :attr:`RETRY_STATUSES`, writes aren't idempotent
+    DEFAULT_GROUP_RETRY_STATUSES = {
+        "writes": (429, 503)
+    }
+
+    def __init__(self, limiters: Dict[str, EndpointLimiter] = None, max_retries: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 30, retry_statuses: Dict[str, Tuple[int, ...]] = None):
+        """
+        :param dict limiters: The limiter of each group, defaults to :meth:`default_limiters`
+        :param int max_retries: How many times a throttled request is retried before its error is raised
+        :param float backoff_base: The delay in seconds the exponential backoff starts from
+        :param float backoff_max: The longest delay in seconds between two attempts
+        :param dict retry_statuses: The statuses retried keyed by group, merged over
+                                    :attr:`DEFAULT_GROUP_RETRY_STATUSES`, other groups use :attr:`RETRY_STATUSES`
+        """
+        self.limiters = limiters if limiters is not None else self.default_limiters()
+        self.retry_statuses = dict(self.DEFAULT_GROUP_RETRY_STATUSES)
+        self.retry_statuses.update(retry_statuses or {})
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retries = 0
+
+    @staticmethod
+    def default_limiters() -> Dict[str, EndpointLimiter]:
+        """
+        Conservative limits that stay under what `myanimelist`_ tolerates
+        """
+        return {
+            "search": EndpointLimiter(rate=2, burst=5, concurrency=4),
+            "writes": EndpointLimiter(rate=2, burst=5, concurrency=4),
+            "malappinfo": EndpointLimiter(rate=1, burst=3, concurrency=2),
+            "account": EndpointLimiter(rate=1, burst=2, concurrency=1)
+        }
+
+    @property
+    def state(self) -> Dict[str, Dict[str, float]]:
+        """
+        The :attr:`EndpointLimiter.state` of every group
+        """
+        return {group: limiter.state for group, limiter in self.limiters.items()}
+
+    async def acquire(self, group: str):
+        limiter = self.limiters.get(group)
+        if limiter is not None:
+            await limiter.acquire()
+
+    def release(self, group: str, status: int = None, retry_after: float = None):
+        limiter = self.limiters.get(group)
+        if limiter is not None:
+            limiter.release(status, retry_after)
+
+    def _after_fork(self) -> Any:
+        return [limiter._after_fork() for limiter in self.limiters.values()]
+
+    def should_retry(self, status: int, attempt: int, group: str = None) -> bool:
+        """
+        :param int status: The status code of the response
+        :param int attempt: How many times the request has been retried so far
+        :param str group: The group of endpoints the request was for
+        :rtype: bool
+        """
+        return status in self.retry_statuses.get(group, self.RETRY_STATUSES) and attempt < self.max_retries
+
+    def backoff(self, attempt: int, retry_after: float = None) -> float:
+        """
+        Full jitter exponential backoff, so throttled workers don't all retry at the same moment
+
+        :param int attempt: How many times the request has been retried so far
+        :param float retry_after: Seconds `myanimelist`_ asked us to wait for, the delay is never shorter than this
+        :rtype: float
+        """
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
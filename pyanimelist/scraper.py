@@ -1,9 +1,276 @@
-from util import fetch_url
+import asyncio
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from lxml import etree, html
+
+from .errors import InvalidSeriesTypeException, ResponseError
+from .objects import SeriesDetails, SeriesStatistics, ScrapeResult
+from .ratelimit import EndpointLimiter, parse_retry_after
+from .util.scraper import scraper_enabled
+from .constants import ANIME_PAGE_URL, ANIME_STATS_URL, MANGA_PAGE_URL, MANGA_STATS_URL
+
+__all__ = ["Scraper"]
+
+# The page and statistics page of each series type
+_URLS = {
+    "anime": (ANIME_PAGE_URL, ANIME_STATS_URL),
+    "manga": (MANGA_PAGE_URL, MANGA_STATS_URL)
+}
+
+# Compiled once, every page is searched with the same expressions
+_TITLE = etree.XPath('normalize-space((//h1//*[@itemprop="name"] | //h1)[1])')
+_SYNOPSIS = etree.XPath('(//*[@itemprop="description"])[1]')
+# The sidebar (and the statistics summary) is made of "<span class="dark_text">Label:</span> value" rows
+_LABELS = etree.XPath('//span[@class="dark_text"]')
+_LINKS = etree.XPath('../a[not(ancestor::sup)]/text()')
+# The text of a row without its label or the <sup> footnote markers MAL puts after scores and ranks
+_ROW_TEXT = etree.XPath('..//text()[not(ancestor::sup) and not(ancestor::span[@class="dark_text"])]')
+_RELATED_ROWS = etree.XPath(
+    '//table[contains(@class, "anime_detail_related_anime") or contains(@class, "entries-table")]//tr'
+)
+_RELATION = etree.XPath('normalize-space(td[1])')
+_RELATED_LINKS = etree.XPath('td[2]//a[@href]')
+_SCORE_ROWS = etree.XPath('//tr[.//div[contains(@class, "updatesBar")]]')
+_SCORE = etree.XPath('normalize-space(td[1])')
+_VOTES = etree.XPath('string(.//small)')
+
+_NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+_SERIES_LINK = re.compile(r"/(anime|manga)/(\d+)")
+
+# Which attribute each sidebar label is read into, and whether it's read from its links
+_DETAIL_LABELS = {
+    "Type": ("type", False),
+    "Status": ("status", False),
+    "Episodes": ("episodes", False),
+    "Volumes": ("volumes", False),
+    "Chapters": ("chapters", False),
+    "Aired": ("aired", False),
+    "Published": ("aired", False),
+    "Score": ("score", False),
+    "Ranked": ("ranked", False),
+    "Popularity": ("popularity", False),
+    "Members": ("members", False),
+    "Favorites": ("favorites", False),
+    "Genres": ("genres", True),
+    "Genre": ("genres", True),
+    "Studios": ("studios", True),
+    "Authors": ("authors", True)
+}
+
+_NUMERIC_DETAILS = frozenset(("episodes", "volumes", "chapters", "score", "ranked", "popularity", "members",
+                              "favorites"))
+
+_STATISTIC_LABELS = {
+    "Watching": "watching",
+    "Reading": "reading",
+    "Completed": "completed",
+    "On-Hold": "on_hold",
+    "Dropped": "dropped",
+    "Plan to Watch": "plan_to_watch",
+    "Plan to Read": "plan_to_read",
+    "Total": "total"
+}
+
+
+def _number(text: str) -> Optional[str]:
+    # "#1,234", "8.78 (scored by ...)" and "1,234,567" all become the first number in them, without the commas
+    match = _NUMBER.search(text or "")
+    return match.group().replace(",", "") if match is not None else None
+
+
+def _labelled(root: etree._Element) -> Iterable[Tuple[str, etree._Element, str]]:
+    """
+    Yields the label, label element and the rest of the text of every labelled row on a page
+    """
+    for label in _LABELS(root):
+        name = (label.text or "").strip().rstrip(":")
+        if label.getparent() is None:
+            continue
+        yield name, label, " ".join("".join(_ROW_TEXT(label)).split())
+
+
+def _parse_details(body: bytes, series_type: str, series_id: int) -> SeriesDetails:
+    root = html.document_fromstring(body)
+    fields = {"id": series_id, "series_type": series_type, "title": _TITLE(root) or None}
+    for name, label, text in _labelled(root):
+        target = _DETAIL_LABELS.get(name)
+        if target is None or target[0] in fields:
+            continue
+        attribute, linked = target
+        if linked:
+            fields[attribute] = [link.strip() for link in _LINKS(label) if link.strip()]
+        elif attribute in _NUMERIC_DETAILS:
+            fields[attribute] = _number(text)
+        else:
+            fields[attribute] = text or None
+    synopsis = _SYNOPSIS(root)
+    if synopsis:
+        fields["synopsis"] = "".join(synopsis[0].itertext()).strip() or None
+    related = []
+    for row in _RELATED_ROWS(root):
+        relation = _RELATION(row).rstrip(":")
+        for link in _RELATED_LINKS(row):
+            match = _SERIES_LINK.search(link.get("href"))
+            if match is not None:
+                related.append((relation, match.group(1), int(match.group(2)), link.text_content().strip()))
+    fields["related"] = related
+    return SeriesDetails(**fields)
+
+
+def _parse_statistics(body: bytes, series_type: str, series_id: int) -> SeriesStatistics:
+    root = html.document_fromstring(body)
+    fields = {"id": series_id, "series_type": series_type}
+    for name, _, text in _labelled(root):
+        attribute = _STATISTIC_LABELS.get(name)
+        if attribute is not None and attribute not in fields:
+            fields[attribute] = _number(text)
+    scores = [0] * 10
+    for row in _SCORE_ROWS(root):
+        score = _number(_SCORE(row))
+        votes = _number(_VOTES(row))
+        if score is not None and votes is not None and 1 <= int(score) <= 10:
+            scores[int(score) - 1] = int(votes)
+    fields["scores"] = scores
+    return SeriesStatistics(**fields)
 
 
 class Scraper(object):
+
     """
-    A Scraper class which facilitates all the requests and scraping
+    Scrapes what the XML API doesn't return (series details, statistics and related entries) from `myanimelist`_'s
+    pages, available as :attr:`pyanimelist.PyAnimeList.scraper` once the client is made with ``enable_scraper=True``.
+
+    Pages are fetched through the clients session so their connections are reused, under a politeness
+    :class:`pyanimelist.ratelimit.EndpointLimiter` of its own which also bounds how many are fetched at once. They're
+    parsed with lxml's HTML parser and precompiled XPath expressions, through the clients parse executor.
     """
-    def __init__(self):
-        pass
+
+    def __init__(self, client, enabled: bool = False, limiter: EndpointLimiter = None):
+        """
+        :param pyanimelist.PyAnimeList client: The client whose session pages are fetched through
+        :param bool enabled: If the scraper can be used, methods raise :class:`pyanimelist.errors.ScraperDisabled`
+                             otherwise
+        :param EndpointLimiter limiter: Limits how fast pages are fetched, one page every two seconds and two at
+                                        once by default
+        """
+        self.client = client
+        self.enabled = enabled
+        self.limiter = limiter if limiter is not None else EndpointLimiter(rate=0.5, burst=2, concurrency=2)
+        self.pages = 0
+
+    async def _page(self, url: str, endpoint: str) -> bytes:
+        """
+        Fetches a page once the limiter allows it
+
+        :raises ResponseError: If the page isn't 200
+        """
+        await self.limiter.acquire()
+        status = retry_after = None
+        try:
+            async with self.client._request("scraper", url, endpoint=endpoint) as response:
+                status = response.status
+                if status != 200:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    raise ResponseError(status)
+                body = await self.client._read_body(endpoint, response)
+        finally:
+            self.limiter.release(status, retry_after)
+        self.pages += 1
+        return body
+
+    @staticmethod
+    def _urls(series_type: str) -> Tuple[str, str]:
+        urls = _URLS.get(series_type)
+        if urls is None:
+            raise InvalidSeriesTypeException
+        return urls
+
+    @scraper_enabled
+    async def get_details(self, series_type: str, series_id: int) -> SeriesDetails:
+        """
+        :param str series_type: anime or manga
+        :param int series_id: The id of the series on MAL
+        :rtype: SeriesDetails
+        """
+        url = self._urls(series_type)[0].format(series_id)
+        body = await self._page(url, series_type + "_page")
+        return await self.client.parse_executor.run(_parse_details, body, series_type, int(series_id))
+
+    @scraper_enabled
+    async def get_statistics(self, series_type: str, series_id: int) -> SeriesStatistics:
+        """
+        :param str series_type: anime or manga
+        :param int series_id: The id of the series on MAL
+        :rtype: SeriesStatistics
+        """
+        url = self._urls(series_type)[1].format(series_id)
+        body = await self._page(url, series_type + "_stats")
+        return await self.client.parse_executor.run(_parse_statistics, body, series_type, int(series_id))
+
+    async def get_anime_details(self, anime_id: int) -> SeriesDetails:
+        """
+        :param int anime_id: The id of the anime on MAL
+        :rtype: SeriesDetails
+        """
+        return await self.get_details("anime", anime_id)
+
+    async def get_manga_details(self, manga_id: int) -> SeriesDetails:
+        """
+        :param int manga_id: The id of the manga on MAL
+        :rtype: SeriesDetails
+        """
+        return await self.get_details("manga", manga_id)
+
+    async def get_anime_statistics(self, anime_id: int) -> SeriesStatistics:
+        """
+        :param int anime_id: The id of the anime on MAL
+        :rtype: SeriesStatistics
+        """
+        return await self.get_statistics("anime", anime_id)
+
+    async def get_manga_statistics(self, manga_id: int) -> SeriesStatistics:
+        """
+        :param int manga_id: The id of the manga on MAL
+        :rtype: SeriesStatistics
+        """
+        return await self.get_statistics("manga", manga_id)
+
+    async def get_related(self, series_type: str, series_id: int) -> List:
+        """
+        :param str series_type: anime or manga
+        :param int series_id: The id of the series on MAL
+        :return: The :class:`pyanimelist.objects.RelatedEntry` listed on the series page
+        :rtype: List[RelatedEntry]
+        """
+        return (await self.get_details(series_type, series_id)).related
+
+    @scraper_enabled
+    async def fetch_many(self, series_type: str, series_ids: Iterable[int],
+                         statistics: bool = False) -> List[ScrapeResult]:
+        """
+        Scrapes the details (or statistics) of many series at once, as many pages are in flight as the limiter
+        allows. A series failing is reported on its result instead of stopping the rest
+
+        :param str series_type: anime or manga
+        :param series_ids: The ids of the series
+        :param bool statistics: Scrape the statistics pages instead of the series pages
+        :return: A :class:`pyanimelist.objects.ScrapeResult` for each id, in the order they were given
+        :rtype: List[ScrapeResult]
+        """
+        self._urls(series_type)
+        get = self.get_statistics if statistics else self.get_details
+
+        async def fetch(series_id: int) -> ScrapeResult:
+            try:
+                return ScrapeResult(series_id, await get(series_type, series_id), None)
+            except Exception as e:
+                return ScrapeResult(series_id, None, e)
+        return list(await asyncio.gather(*(fetch(series_id) for series_id in series_ids)))
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """
+        How many pages were fetched, and the :attr:`pyanimelist.ratelimit.EndpointLimiter.state` of the limiter
+        """
+        return dict(self.limiter.state, pages=self.pages)
@@ -0,0 +1,161 @@
+import copy
+import hashlib
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple, Union
+
+from lxml import etree
+
+from .errors import InvalidSeriesTypeException
+from .objects import UserAnime, UserManga, UserInfo
+from .constants import MAL_APP_INFO
+
+__all__ = ["ListChange", "ListSnapshot", "ListSync"]
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+ListChange = namedtuple("ListChange", "kind series_id entry previous")
+ListChange.__doc__ = """
+A difference between two refreshes of a users list, kind is ``"added"``, ``"removed"`` or ``"changed"``.
+
+entry is the current entry (the removed one for removals) and previous is a copy of the entry from before it changed,
+None for anything but changes
+"""
+
+# The entry type and id tag of each series type
+_SERIES_TYPES = {
+    "anime": (UserAnime, "series_animedb_id"),
+    "manga": (UserManga, "series_mangadb_id")
+}
+
+
+class ListSnapshot(object):
+
+    """
+    The local copy of a users list kept by :class:`ListSync`
+    """
+
+    __slots__ = ("entries", "updated", "digest", "info")
+
+    def __init__(self):
+        #: The entries keyed by series id
+        self.entries = {}  # type: Dict[int, Union[UserAnime, UserManga]]
+        #: The raw my_last_updated text keyed by series id, compared before anything is parsed
+        self.updated = {}  # type: Dict[int, str]
+        #: A digest of the last response, an identical response is skipped without parsing it
+        self.digest = None  # type: Optional[bytes]
+        self.info = None  # type: Optional[UserInfo]
+
+
+class ListSync(object):
+
+    """
+    Keeps snapshots of users lists and works out what changed between refreshes using my_last_updated, only entries
+    which were added or changed are parsed into objects and changed entries are updated in place.
+    """
+
+    def __init__(self, client):
+        """
+        :param pyanimelist.PyAnimeList client: The client lists are fetched with
+        """
+        self.client = client
+        self.snapshots = {}  # type: Dict[Tuple[str, str], ListSnapshot]
+
+    def snapshot(self, username: str, series_type: str) -> Optional[ListSnapshot]:
+        """
+        :return: The snapshot of a users list, None if it hasn't been refreshed yet
+        :rtype: ListSnapshot
+        """
+        return self.snapshots.get((username, series_type))
+
+    def forget(self, username: str, series_type: str):
+        """
+        Drops the snapshot of a users list, the next refresh reports every entry as added
+        """
+        self.snapshots.pop((username, series_type), None)
+
+    async def refresh(self, username: str, series_type: str) -> List[ListChange]:
+        """
+        Fetches a users list and applies it to their snapshot
+
+        :param str username: The user whose list is being synced
+        :param str series_type: Either anime or manga
+        :return: What changed since the last refresh, everything is added on the first one
+        :rtype: List[ListChange]
+        """
+        if series_type not in _SERIES_TYPES:
+            raise InvalidSeriesTypeException
+        params = {
+            "u": username,
+            "status": "all",
+            "type": series_type
+        }
+        body = await self.client._read("malappinfo", MAL_APP_INFO, params=params)
+        snapshot = self._snapshot(username, series_type)
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        if digest == snapshot.digest:
+            return []
+        # Parsed like every other list, big responses are parsed off the loop
+        root = await self.client.parse_executor.run(_parse_list, body)
+        return self._apply(snapshot, series_type, digest, root)
+
+    def apply(self, username: str, series_type: str, body: bytes) -> List[ListChange]:
+        """
+        Applies a raw malappinfo response to a users snapshot
+
+        :param str username: The user the response belongs to
+        :param str series_type: Either anime or manga
+        :param bytes body: The raw response body
+        :rtype: List[ListChange]
+        """
+        if series_type not in _SERIES_TYPES:
+            raise InvalidSeriesTypeException
+        snapshot = self._snapshot(username, series_type)
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        if digest == snapshot.digest:
+            return []
+        return self._apply(snapshot, series_type, digest, _parse_list(body))
+
+    def _snapshot(self, username: str, series_type: str) -> ListSnapshot:
+        snapshot = self.snapshots.get((username, series_type))
+        if snapshot is None:
+            snapshot = self.snapshots[(username, series_type)] = ListSnapshot()
+        return snapshot
+
+    @staticmethod
+    def _apply(snapshot: ListSnapshot, series_type: str, digest: bytes, root: etree._Element) -> List[ListChange]:
+        entry_type, id_tag = _SERIES_TYPES[series_type]
+        info = root.find("myinfo")
+        if info is not None:
+            snapshot.info = UserInfo.from_element(info)
+        changes = []
+        entries, updated = snapshot.entries, snapshot.updated
+        seen = set()
+        for element in root.iterchildren(series_type):
+            series_id = element.findtext(id_tag)
+            if not series_id or not series_id.strip().isdigit():
+                # Nothing to key it by, so it can't be tracked between refreshes
+                continue
+            series_id = int(series_id)
+            last_updated = element.findtext("my_last_updated")
+            seen.add(series_id)
+            if series_id not in updated:
+                updated[series_id] = last_updated
+                entry = entries[series_id] = entry_type.from_element(element)
+                changes.append(ListChange(ADDED, series_id, entry, None))
+            elif updated[series_id] != last_updated:
+                updated[series_id] = last_updated
+                entry = entries[series_id]
+                previous = copy.copy(entry)
+                entry.update_from_element(element)
+                changes.append(ListChange(CHANGED, series_id, entry, previous))
+        for series_id in entries.keys() - seen:
+            del updated[series_id]
+            changes.append(ListChange(REMOVED, series_id, entries.pop(series_id), None))
+        snapshot.digest = digest
+        return changes
+
+
+def _parse_list(body: bytes) -> etree._Element:
+    return etree.fromstring(body)
@@ -0,0 +1,169 @@
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from lxml import etree
+
+
+class SlottedObject(object):
+
+    """
+    Base class for the objects pyanimelist hands out, subclasses list their attributes in ``__slots__`` so instances
+    don't carry a ``__dict__``.
+
+    ``_nested`` maps attribute names to the :class:`SlottedObject` they hold so :meth:`from_dict` can rebuild them.
+
+    ``_xml_fields`` maps XML tag names to the (attribute, converter) they're read into by :meth:`from_element`.
+
+    ``_fields`` are the public attributes used for equality, hashing, the repr and :meth:`to_dict`, it defaults to
+    ``__slots__`` and only needs setting when some slots back properties.
+
+    ``_lazy_fields`` maps attribute names to functions which decode them from an XML element, subclasses with an
+    ``_element`` slot can be built by :meth:`from_element_lazy` and only decode each attribute the first time it's read.
+    """
+
+    __slots__ = ()
+    _fields = ()  # type: Tuple[str, ...]
+    _nested = {}  # type: Dict[str, type]
+    _xml_fields = {}  # type: Dict[str, Tuple[str, Callable[[str], Any]]]
+    _lazy_fields = {}  # type: Dict[str, Callable[[etree._Element], Any]]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "_fields" not in cls.__dict__:
+            cls._fields = cls.__slots__
+        # Resolve the attribute names to slot positions once, so building from XML is a list assignment per tag
+        positions = {name: index for index, name in enumerate(cls.__slots__)}
+        cls._xml_positions = {
+            tag: (positions[name], converter) for tag, (name, converter) in cls._xml_fields.items()
+        }
+
+    @classmethod
+    def from_element(cls, element: etree._Element):
+        """
+        Builds an object straight from an XML element using ``_xml_fields``, tags it doesn't know are ignored and
+        attributes the element has no tag for are None
+
+        :param lxml.etree._Element element: The element holding the objects fields as children
+        """
+        positions = cls._xml_positions
+        values = [None] * len(cls.__slots__)
+        for child in element:
+            field = positions.get(child.tag)
+            if field is not None:
+                values[field[0]] = field[1](child.text)
+        instance = cls.__new__(cls)
+        instance.__setstate__(values)
+        return instance
+
+    @classmethod
+    def from_element_lazy(cls, element: etree._Element, fields: Iterable[str] = None):
+        """
+        Builds an object which keeps a reference to its XML element and decodes attributes from it on first access.
+
+        When fields are given only those are decoded, straight away, and the element is let go of, every other
+        attribute is None.
+
+        :param lxml.etree._Element element: The element holding the objects fields
+        :param fields: The names of the only attributes that are wanted
+        """
+        instance = cls.__new__(cls)
+        instance._element = element
+        if fields is not None:
+            for name in fields:
+                if name not in cls._fields:
+                    raise ValueError("{} has no field {!r}".format(cls.__name__, name))
+                getattr(instance, name)
+            instance._element = None
+        return instance
+
+    def __getattr__(self, name):
+        # Only reached when a slot hasn't been set yet, which is how lazily built objects find undecoded attributes
+        decoder = type(self)._lazy_fields.get(name)
+        if decoder is None:
+            raise AttributeError("{!r} object has no attribute {!r}".format(type(self).__name__, name))
+        element = self._element
+        value = decoder(element) if element is not None else None
+        setattr(self, name, value)
+        return value
+
+    def _materialize(self):
+        for name in self._lazy_fields:
+            getattr(self, name)
+
+    def _detached(self):
+        """
+        A fully decoded copy which doesn't hold on to the element, this object is left as it is with whatever it
+        hasn't decoded yet still undecoded
+        """
+        cls = type(self)
+        copy = cls.__new__(cls)
+        for name in self.__slots__:
+            try:
+                # Read through the slot itself, going through getattr would decode (and keep) it on this object
+                value = getattr(cls, name).__get__(self, cls)
+            except AttributeError:
+                continue
+            setattr(copy, name, value)
+        copy._materialize()
+        copy._element = None
+        return copy
+
+    def update_from_element(self, element: etree._Element):
+        """
+        Updates the object in place from an XML element, attributes the element has no tag for are left alone
+
+        :param lxml.etree._Element element: The element holding the objects fields as children
+        """
+        fields = self._xml_fields
+        for child in element:
+            field = fields.get(child.tag)
+            if field is not None:
+                setattr(self, field[0], field[1](child.text))
+
+    def _values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self._fields)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __hash__(self):
+        return hash(tuple(tuple(value) if isinstance(value, list) else value for value in self._values()))
+
+    def __repr__(self):
+        return "<{} {}>".format(
+            type(self).__name__,
+            " ".join("{}={!r}".format(name, getattr(self, name)) for name in self._fields)
+        )
+
+    def __getstate__(self):
+        # Elements can't be pickled, so anything that hasn't been decoded yet is decoded now
+        self._materialize()
+        return tuple(None if name == "_element" else getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        :return: The attributes of the object, nested objects are turned into dicts as well
+        :rtype: dict
+        """
+        return {
+            name: value.to_dict() if isinstance(value, SlottedObject) else value
+            for name, value in zip(self._fields, self._values())
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        """
+        Rebuilds an object from what :meth:`to_dict` returned
+
+        :param dict data: The attributes of the object
+        """
+        data = dict(data)
+        for name, nested in cls._nested.items():
+            if isinstance(data.get(name), dict):
+                data[name] = nested.from_dict(data[name])
+        return cls(**data)
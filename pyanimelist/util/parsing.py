@@ -0,0 +1,191 @@
+import html
+import re
+import sys
+from datetime import date, datetime
+from enum import Enum
+from functools import lru_cache
+from typing import Callable, Iterator, List, Optional, Type
+
+from lxml import etree
+
+_INTEGER = re.compile(r"\s*[-+]?\d+\s*\Z")
+
+
+def to_int(value) -> Optional[int]:
+    """
+    :param value: An int, or the text of an XML element
+    :return: The value as an int, None if it's missing or not a number
+    :rtype: int
+    """
+    if value is None or isinstance(value, int):
+        return value
+    return int(value) if _INTEGER.match(value) else None
+
+
+def to_float(value) -> Optional[float]:
+    """
+    :param value: A number, or the text of an XML element
+    :return: The value as a float, None if it's missing or not a number
+    :rtype: float
+    """
+    if value is None or isinstance(value, float):
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _text_to_date(text: str) -> Optional[date]:
+    try:
+        return datetime.strptime(text, "%Y-%m-%d").date()
+    except ValueError:
+        # MAL uses 0000-00-00 (and zeroed parts) for dates it doesn't know
+        return None
+
+
+def to_date(value) -> Optional[date]:
+    """
+    :param value: A date, datetime or YYYY-MM-DD string
+    :return: The value as a date, None if it's missing or unknown
+    :rtype: datetime.date
+    """
+    if value is None or type(value) is date:
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    return _text_to_date(value)
+
+
+def intern_text(value: Optional[str]) -> Optional[str]:
+    """
+    Interns strings which only ever have a handful of values (types, statuses) so every object shares one copy
+
+    :param str value: The string being interned
+    :rtype: str
+    """
+    return sys.intern(value) if value is not None else None
+
+
+def to_text(value: Optional[str]) -> Optional[str]:
+    """
+    Used for fields which are kept as text as is, lxml has already unescaped it
+
+    :param str value: The text of an XML element
+    :rtype: str
+    """
+    return value
+
+
+def to_timestamp(value) -> Optional[datetime]:
+    """
+    :param value: A datetime, or a unix timestamp as text
+    :return: The value as a local datetime, None if it's missing
+    :rtype: datetime.datetime
+    """
+    if value is None or isinstance(value, datetime):
+        return value
+    seconds = to_int(value)
+    return datetime.fromtimestamp(seconds) if seconds is not None else None
+
+
+def to_bool(value) -> bool:
+    """
+    :param value: A bool, or the 0/1 text MAL uses for flags
+    :rtype: bool
+    """
+    if isinstance(value, bool):
+        return value
+    return to_int(value) == 1
+
+
+def to_synonyms(value) -> List[str]:
+    """
+    :param value: A list of synonyms, or the ; separated text MAL sends them as
+    :rtype: List[str]
+    """
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    return [synonym.strip() for synonym in value.split(";") if synonym.strip()]
+
+
+def to_enum(enumeration: Type[Enum]) -> Callable[[object], Optional[Enum]]:
+    """
+    Makes a converter which maps MAL's numbers onto the members of an enumeration
+
+    :param enumeration: The enumeration the numbers belong to
+    :return: A converter returning the member, or None for numbers the enumeration doesn't have
+    """
+    members = {member.value: member for member in enumeration}
+
+    def convert(value) -> Optional[Enum]:
+        if value is None or isinstance(value, enumeration):
+            return value
+        return members.get(to_int(value))
+    return convert
+
+
+# Everything MAL puts in synopses that isn't text, matched in a single pass: BBCode tags, the HTML tags it leaves in
+# (escaped once, so they survive XML parsing) and HTML entities, which are the only matches that aren't just dropped
+_SYNOPSIS_MARKUP = re.compile(
+    r"\[/?(?:b|i|u|s|sub|sup|center|left|right|justify|spoiler|quote|code|pre|list|url|img|color|size|font|yt)"
+    r"(?:=[^\]]*)?\]"
+    r"|\[\*\]"
+    r"|</?(?:br|p|b|i|u|s|em|strong|span|div|a|sub|sup|center|font)(?:\s[^<>]*)?/?>"
+    r"|(&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]*);)",
+    re.IGNORECASE
+)
+
+
+def _replace_markup(match) -> str:
+    entity = match.group(1)
+    return html.unescape(entity) if entity is not None else ""
+
+
+def clean_synopsis(value: Optional[str]) -> Optional[str]:
+    """
+    Strips the BBCode and HTML tags out of a synopsis and unescapes its HTML entities
+
+    :param str value: The synopsis as MAL sends it
+    :rtype: str
+    """
+    if not value:
+        return value
+    return _SYNOPSIS_MARKUP.sub(_replace_markup, value)
+
+
+def drain_events(parser: etree.XMLPullParser) -> Iterator[etree._Element]:
+    """
+    Yields every element a :class:`lxml.etree.XMLPullParser` has finished since it was last read, once the caller is
+    done with an element it and all of its already handled siblings are dropped from the tree so memory stays flat
+
+    :param lxml.etree.XMLPullParser parser: A parser created with ``events=("end",)``
+    :rtype: Iterator[lxml.etree._Element]
+    """
+    for _, element in parser.read_events():
+        yield element
+        element.clear()
+        parent = element.getparent()
+        if parent is not None:
+            # Remove the entries before this one, they've already been handed out
+            while element.getprevious() is not None:
+                del parent[0]
+
+
+def detach_events(parser: etree.XMLPullParser) -> Iterator[etree._Element]:
+    """
+    Yields every element a :class:`lxml.etree.XMLPullParser` has finished since it was last read, like
+    :func:`drain_events`, but each one is removed from the tree whole instead of being cleared so it can outlive the
+    parser (as the element of a lazily decoded object), the tree itself still doesn't grow
+
+    :param lxml.etree.XMLPullParser parser: A parser created with ``events=("end",)``
+    :rtype: Iterator[lxml.etree._Element]
+    """
+    for _, element in parser.read_events():
+        parent = element.getparent()
+        if parent is not None:
+            parent.remove(element)
+        yield element
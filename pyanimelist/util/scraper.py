@@ -1,24 +1,26 @@
-import warnings
 from functools import wraps
 
+from ..errors import ScraperDisabled
+
 
 def scraper_enabled(func):
     """
-    Decorator which ensures that a :class:`pyanimelist.Client.scraper` isn't used without it being explictly allowed
+    Decorator which ensures that a :class:`pyanimelist.Client.scraper` isn't used without it being explictly allowed,
+    :class:`pyanimelist.errors.ScraperDisabled` is raised when the object's ``enabled`` isn't set
 
     Example usage:
 
     .. code-block:: py
 
-       from pyanimelist.util.web import scraper_enabled
+       from pyanimelist.util.scraper import scraper_enabled
 
        @scraper_enabled
-       async def function(func):
+       async def function(self, func):
            return await func()
     """
     @wraps(func)
     async def wrapped(self, *args, **kwargs):
-        if not self.scraper:
-            warnings.warn("Usage of scraper is set to {0}. Set to {1} to silence warning".format(self.scraper, not(self.scraper)))
+        if not self.enabled:
+            raise ScraperDisabled("The scraper is disabled, pass enable_scraper=True to PyAnimeList to use it")
         return await func(self, *args, **kwargs)
     return wrapped
@@ -0,0 +1,84 @@
+import zlib
+
+# What the client asks responses to be compressed with, both are decoded by zlib
+ACCEPT_ENCODING = "gzip, deflate"
+
+
+def decompresses(session) -> bool:
+    """
+    :param aiohttp.ClientSession session: A session
+    :return: If the session decompresses response bodies itself, which is the aiohttp default
+    :rtype: bool
+    """
+    # The public property is newer than the option
+    return getattr(session, "auto_decompress", getattr(session, "_auto_decompress", True))
+
+
+class BodyDecoder(object):
+
+    """
+    Decompresses a response body chunk by chunk as it's read off the connection, so the compressed body is never
+    held whole, while counting the bytes that came over the wire and the bytes they decoded to.
+
+    ``peak`` is the most response data held at once by whoever reads the chunks, the caller adds to it with
+    :meth:`hold` when it buffers chunks instead of handing them on.
+    """
+
+    __slots__ = ("encoding", "wire", "decoded", "peak", "_held", "_decompressor")
+
+    def __init__(self, encoding: str = None):
+        """
+        :param str encoding: The Content-Encoding of the response, None (or identity) if it isn't compressed
+        """
+        self.encoding = (encoding or "identity").strip().lower()
+        self.wire = 0
+        self.decoded = 0
+        self.peak = 0
+        self._held = 0
+        if self.encoding in ("gzip", "x-gzip"):
+            self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif self.encoding == "deflate":
+            self._decompressor = zlib.decompressobj()
+        elif self.encoding == "identity":
+            self._decompressor = None
+        else:
+            raise ValueError("Unsupported Content-Encoding {!r}".format(encoding))
+
+    def decode(self, chunk: bytes) -> bytes:
+        """
+        :param bytes chunk: The next chunk as it came over the wire
+        :return: What it decompresses to, which can be empty
+        :rtype: bytes
+        """
+        self.wire += len(chunk)
+        if self._decompressor is not None:
+            try:
+                chunk = self._decompressor.decompress(chunk)
+            except zlib.error:
+                if self.encoding != "deflate" or self.decoded:
+                    raise
+                # Some servers send raw deflate streams without the zlib header
+                self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                chunk = self._decompressor.decompress(chunk)
+        self.decoded += len(chunk)
+        self.peak = max(self.peak, self._held + len(chunk))
+        return chunk
+
+    def flush(self) -> bytes:
+        """
+        :return: Whatever the decompressor still holds once the body has been read
+        :rtype: bytes
+        """
+        if self._decompressor is None:
+            return b""
+        chunk = self._decompressor.flush()
+        self.decoded += len(chunk)
+        self.peak = max(self.peak, self._held + len(chunk))
+        return chunk
+
+    def hold(self, size: int):
+        """
+        Records that size more bytes of the decoded body are being kept around by the reader
+        """
+        self._held += size
+        self.peak = max(self.peak, self._held)
@@ -2,14 +2,18 @@ from typing import Dict
 
 import aiohttp
 
+from .transfer import BodyDecoder, decompresses
 
-async def fetch_url(url: str, auth: aiohttp.BasicAuth, headers: Dict["str", "str"] = None):
+
+async def fetch_url(session: aiohttp.ClientSession, url: str, params: Dict[str, str] = None) -> bytes:
     """
-    Function used to eliminate code reuse with creating ClientSessions
+    Function used to eliminate code reuse with making requests, it goes through an existing pooled session so the
+    connection is kept alive for the next request instead of being torn down. Compressed bodies are decompressed
+    when the session leaves that to us, like the clients own session does
 
+    :param aiohttp.ClientSession session: The session (and its connection pool) the request is made through
     :param str url: The URL you're fetching
-    :param aiohttp.BasicAuth auth: The BasicAuth object being passed to aiohttp.ClientSession
-    :param dict headers: The headers to be passed to `myanimelist`_
+    :param dict params: The query string parameters to be passed to `myanimelist`_
 
     :rtype: bytes
 
@@ -19,11 +23,18 @@ async def fetch_url(url: str, auth: aiohttp.BasicAuth, headers: Dict["str", "str
 
        import asyncio
 
+       import pyanimelist
+
+       async def main():
+           async with pyanimelist.PyAnimeList("username", "password") as client:
+               return await fetch_url(client.session, "url")
+
        loop = asyncio.get_event_loop()
-       loop.run_until_complete(fetch_url("url", aiohttp.BasicAuth(login="username", password="password"), {"User-Agent": "PyAnimeList"}))
+       loop.run_until_complete(main())
     """
-    if not headers:
-        headers = {}
-    with aiohttp.ClientSession(auth=auth, headers=headers) as session:
-        async with session.get(url) as response:
-            return response.read()
+    async with session.get(url, params=params) as response:
+        body = await response.read()
+        if decompresses(session):
+            return body
+        decoder = BodyDecoder(response.headers.get("Content-Encoding"))
+        return decoder.decode(body) + decoder.flush()
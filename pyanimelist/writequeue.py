@@ -0,0 +1,188 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+__all__ = ["WriteQueue"]
+
+
+class _PendingWrite(object):
+
+    __slots__ = ("send", "fields", "futures", "first", "deadline")
+
+    def __init__(self, send: Callable[[Dict[str, Any]], Awaitable], now: float):
+        self.send = send
+        self.fields = {}  # type: Dict[str, Any]
+        self.futures = []  # type: List[asyncio.Future]
+        self.first = now
+        self.deadline = now
+
+
+class WriteQueue(object):
+
+    """
+    Holds list updates back for a moment so bursts of them on the same entry go out as one request, like a UI
+    sending ``update_anime(id, episode=n)`` for every episode ticked.
+
+    Pass it as ``write_queue`` to :class:`pyanimelist.client.PyAnimeList` and use
+    :meth:`~pyanimelist.client.PyAnimeList.queue_update_anime`/:meth:`~pyanimelist.client.PyAnimeList.queue_update_manga`.
+    Updates waiting for the same series of the same account are merged, later fields win. An entry is sent once it's
+    gone ``debounce`` seconds without another update or has waited ``max_delay`` seconds, and every waiting entry is
+    sent as soon as ``max_pending`` of them are waiting. Each update gets a future which resolves once the merged
+    request holding it was accepted by `myanimelist`_, or with the error it failed with.
+
+    Writes to the same entry are sent one after another in the order they were made, different entries go out at
+    the same time over the pooled connections, at most ``concurrency`` at once.
+    """
+
+    def __init__(self, debounce: float = 1.0, max_delay: float = 10.0, max_pending: int = 50, concurrency: int = 4):
+        """
+        :param float debounce: How many seconds an entry waits for more updates before it's sent
+        :param float max_delay: The longest an entry is held back for, however often it's updated
+        :param int max_pending: How many entries can wait at once before all of them are sent
+        :param int concurrency: How many requests can be in flight at once
+        """
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.concurrency = concurrency
+        self.queued = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.failed = 0
+        self._pending = OrderedDict()  # type: Dict[Hashable, _PendingWrite]
+        self._in_flight = {}  # type: Dict[Hashable, asyncio.Task]
+        self._timer = None  # type: asyncio.TimerHandle
+        # Created on first use so it belongs to the running loop
+        self._semaphore = None  # type: asyncio.Semaphore
+
+    def __len__(self):
+        return len(self._pending)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        How many updates were queued and merged into another, how many requests were sent or failed, and how many
+        entries are waiting or in flight
+        """
+        return {
+            "queued": self.queued,
+            "coalesced": self.coalesced,
+            "sent": self.sent,
+            "failed": self.failed,
+            "pending": len(self._pending),
+            "in_flight": len(self._in_flight)
+        }
+
+    def put(self, key: Hashable, fields: Dict[str, Any],
+            send: Callable[[Dict[str, Any]], Awaitable]) -> asyncio.Future:
+        """
+        Queues an update, merging it into the one already waiting under the same key
+
+        :param key: What the update is for, updates are only merged with others of the same key
+        :param dict fields: The fields being set
+        :param send: A coroutine function making the request with the merged fields, the latest one given is used
+        :return: A future resolving to what send returned once the update has been sent
+        :rtype: asyncio.Future
+        """
+        loop = asyncio.get_event_loop()
+        now = loop.time()
+        future = loop.create_future()
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _PendingWrite(send, now)
+        else:
+            self.coalesced += 1
+            pending.send = send
+        pending.fields.update(fields)
+        pending.futures.append(future)
+        pending.deadline = min(pending.first + self.max_delay, now + self.debounce)
+        self.queued += 1
+        if len(self._pending) >= self.max_pending:
+            self._send_due(None)
+        else:
+            self._schedule(loop)
+        return future
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending:
+            deadline = min(pending.deadline for pending in self._pending.values())
+            self._timer = loop.call_at(deadline, self._send_due, deadline)
+
+    def _send_due(self, now: float = None):
+        """
+        Sends every entry whose deadline is before now, or every entry when now is None
+        """
+        due = [
+            key for key, pending in self._pending.items() if now is None or pending.deadline <= now
+        ]
+        for key in due:
+            pending = self._pending.pop(key)
+            task = asyncio.ensure_future(self._send(pending, self._in_flight.get(key)))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done, key=key: self._finished(key, done))
+        self._schedule(asyncio.get_event_loop())
+
+    async def _send(self, pending: _PendingWrite, previous: asyncio.Task = None):
+        try:
+            if previous is not None:
+                # Writes to the same entry land in the order they were made
+                await asyncio.wait([previous])
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.concurrency)
+            async with self._semaphore:
+                result = await pending.send(pending.fields)
+        except Exception as e:
+            self.failed += 1
+            for future in pending.futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            self.sent += 1
+            for future in pending.futures:
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            # Only left undone if we were cancelled
+            for future in pending.futures:
+                future.cancel()
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    async def flush(self):
+        """
+        Sends every waiting entry now and waits until everything in flight is done, failures are left on the futures
+        """
+        if self._pending:
+            self._send_due(None)
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight.values(), return_exceptions=True)
+
+    def cancel(self):
+        """
+        Drops every waiting entry without sending it, their futures are cancelled
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for pending in self._pending.values():
+            for future in pending.futures:
+                future.cancel()
+        self._pending.clear()
+
+    def _after_fork(self) -> Any:
+        """
+        Drops everything the parent process has waiting or in flight, the parent sends it and sending it from the child
+        as well would write it twice. Timers, tasks and futures belong to the parents loop, they're returned so the
+        caller can keep them alive instead of having them destroyed while pending
+        """
+        inherited = (self._pending, self._in_flight, self._timer, self._semaphore)
+        self._pending = OrderedDict()
+        self._in_flight = {}
+        self._timer = None
+        self._semaphore = None
+        return inherited
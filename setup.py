@@ -22,7 +22,7 @@ setup(
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',
         'License :: OSI Approved :: MIT License',
-        'Programming Language :: Python :: 3.5',
+        'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3 :: Only',
         'Topic :: Software Development :: Libraries'
     ],
@@ -33,5 +33,7 @@ setup(
         "xml",
         "parsing"
     ],
-    install_requires=['aiohttp', 'bs4', 'lxml', 'dicttoxml'],
+    python_requires='>=3.7',
+    install_requires=['aiohttp', 'lxml'],
+    extras_require={'numpy': ['numpy']},
 )
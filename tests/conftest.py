@@ -0,0 +1,33 @@
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The tests drive the client against the fake server the benchmarks use
+for path in (ROOT, os.path.join(ROOT, "benchmarks")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from fake_mal import FakeMAL, redirect_client  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    """
+    A :class:`FakeMAL` every client URL points at, served from its own loop thread so blocking code can be tested
+    """
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    fake = FakeMAL(size=5)
+    url = asyncio.run_coroutine_threadsafe(fake.start(), loop).result()
+    with redirect_client(url):
+        yield fake
+    asyncio.run_coroutine_threadsafe(fake.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
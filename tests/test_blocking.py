@@ -0,0 +1,90 @@
+import asyncio
+import os
+import signal
+import threading
+from collections import Counter
+
+import pytest
+
+from pyanimelist import HTTPCache, SyncPyAnimeList, WriteQueue
+
+
+def test_http_cache_made_in_another_thread(server):
+    cache = HTTPCache(":memory:")
+    with SyncPyAnimeList("bench", "bench", http_cache=cache) as client:
+        assert len(client.search_all_anime("naruto")) == 5
+        assert len(client.search_all_anime("naruto")) == 5
+    assert cache.stats == {"hits": 1, "revalidated": 0, "misses": 1}
+    assert server.requests == 1
+
+
+def test_close_in_fork_before_any_call():
+    client = SyncPyAnimeList("bench", "bench")
+    pid = os.fork()
+    if pid == 0:
+        try:
+            client.close()
+            with pytest.raises(RuntimeError):
+                client.run(asyncio.sleep(0))
+        except BaseException:
+            os._exit(1)
+        os._exit(0)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    # The parent's loop is untouched by the child closing
+    assert client.run(asyncio.sleep(0, "still running")) == "still running"
+    client.close()
+
+
+def test_fork_after_calls(server):
+    cache = HTTPCache(":memory:")
+    client = SyncPyAnimeList("bench", "bench", http_cache=cache, write_queue=WriteQueue(debounce=10))
+    client.search_all_anime("naruto")
+    client.queue_update_anime(1, episode=2)
+    # As if a thread of the parent was halfway through a cache write when it forked
+    cache._lock.acquire()
+    pid = os.fork()
+    if pid == 0:
+        # Deadlocking kills the child instead of hanging the tests
+        signal.alarm(10)
+        try:
+            assert len(client.search_all_manga("naruto")) == 5
+            assert cache.stats["misses"] == 2
+            # The parent sends what it had queued
+            assert len(client.client.write_queue) == 0
+            client.close()
+        except BaseException:
+            os._exit(1)
+        os._exit(0)
+    cache._lock.release()
+    _, status = os.waitpid(pid, 0)
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+    assert len(client.search_all_anime("naruto")) == 5
+    client.close()
+    # The parent's search, the child's search and the update the parent flushed on close
+    assert server.requests == 3
+
+
+def test_queue_update_from_worker_thread(server):
+    with SyncPyAnimeList("bench", "bench", write_queue=WriteQueue(debounce=0.05)) as client:
+        futures = []
+
+        def tick():
+            futures.extend(client.queue_update_anime(1, episode=episode) for episode in range(3, 7))
+        worker = threading.Thread(target=tick)
+        worker.start()
+        worker.join()
+        assert [future.result(5) for future in futures] == [True] * 4
+    # The four updates went out as one request
+    assert server.requests == 1
+
+
+def test_for_user(server):
+    with SyncPyAnimeList("bench", "bench") as client:
+        view = client.for_user("other", "secret")
+        assert view.verify_credentials() == ("1", "bench")
+        view.close()
+        client.verify_credentials()
+        client.verify_credentials()
+    assert server.logins == Counter({"bench": 2, "other": 1})
+    assert view.closed
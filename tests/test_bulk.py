@@ -0,0 +1,80 @@
+import asyncio
+
+from pyanimelist import PyAnimeList
+from pyanimelist.bulk import ADD, DELETE, UPDATE, BulkOperation, coalesce_operations
+from pyanimelist.errors import OperationDropped
+
+
+def test_updates_merge_into_add():
+    operations = [
+        BulkOperation(ADD, 1, {"status": 1}),
+        BulkOperation(UPDATE, 1, {"episode": 3}),
+        BulkOperation(UPDATE, 1, {"episode": 4, "score": 8}),
+        BulkOperation(UPDATE, 2, {"score": 5})
+    ]
+    assert coalesce_operations(operations) == {
+        1: [BulkOperation(ADD, 1, {"status": 1, "episode": 4, "score": 8})],
+        2: [BulkOperation(UPDATE, 2, {"score": 5})]
+    }
+    # The given operations are left alone
+    assert operations[0].fields == {"status": 1}
+
+
+def test_delete_replaces_earlier_and_drops_later_updates():
+    operations = [
+        BulkOperation(ADD, 1, {"status": 1}),
+        BulkOperation(DELETE, 1, {}),
+        BulkOperation(UPDATE, 1, {"episode": 3}),
+        BulkOperation(ADD, 1, {"status": 6}),
+        BulkOperation(UPDATE, 1, {"score": 2})
+    ]
+    assert coalesce_operations(operations) == {
+        1: [BulkOperation(DELETE, 1, {}), BulkOperation(ADD, 1, {"status": 6, "score": 2})]
+    }
+
+
+def _run(operations, failing=()):
+    sent = []
+
+    async def send(operation):
+        sent.append(operation)
+        await asyncio.sleep(0)
+        if operation.series_id in failing:
+            raise ValueError(operation.series_id)
+
+    async def main():
+        client = PyAnimeList("bench", "bench")
+        try:
+            return await client._run_bulk(operations, {ADD: send, UPDATE: send, DELETE: send}, 2)
+        finally:
+            await client.close()
+    return asyncio.run(main()), sent
+
+
+def test_one_result_per_operation_in_order():
+    operations = [
+        BulkOperation(UPDATE, 2, {"score": 5}),
+        BulkOperation(ADD, 1, {"status": 1}),
+        BulkOperation(DELETE, 3, {}),
+        BulkOperation(UPDATE, 1, {"episode": 3}),
+        BulkOperation(UPDATE, 3, {"episode": 1})
+    ]
+    results, sent = _run(operations, failing=(2,))
+    assert [result.operation for result in results] == operations
+    assert len(sent) == 3
+    merged = BulkOperation(ADD, 1, {"status": 1, "episode": 3})
+    assert [(result.success, result.coalesced) for result in results] == [
+        (False, None), (True, merged), (True, None), (True, merged), (False, None)
+    ]
+    assert isinstance(results[0].error, ValueError)
+    # Nothing was sent for the update of a deleted entry
+    assert isinstance(results[4].error, OperationDropped)
+    assert all(operation.series_id != 3 or operation.action == DELETE for operation in sent)
+
+
+def test_replaced_operations_share_the_delete_result():
+    operations = [BulkOperation(ADD, 1, {"status": 1}), BulkOperation(DELETE, 1, {})]
+    results, sent = _run(operations, failing=(1,))
+    assert sent == [BulkOperation(DELETE, 1, {})]
+    assert [result.coalesced for result in results] == [operations[1]] * 2
+    assert not any(result.success for result in results)
@@ -0,0 +1,151 @@
+import asyncio
+
+import pytest
+
+from pyanimelist import CredentialCache, ResponseCache
+from pyanimelist.errors import InvalidCredentials, ResponseError
+
+
+class Fetcher(object):
+
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.error is not None:
+            raise self.error
+        return ["Cowboy Bebop", "Trigun"]
+
+
+class Verifier(object):
+
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.error is not None:
+            raise self.error
+        return "1", "bench"
+
+
+def test_concurrent_checks_are_coalesced():
+    cache = CredentialCache()
+    verifier = Verifier()
+
+    async def main():
+        return await asyncio.gather(*(cache.fetch("bench", "password", verifier) for _ in range(5)))
+    assert asyncio.run(main()) == [("1", "bench")] * 5
+    assert verifier.calls == 1
+    assert cache.stats == {"hits": 0, "misses": 1, "coalesced": 4}
+    # Remembered afterwards
+    assert asyncio.run(cache.fetch("bench", "password", verifier)) == ("1", "bench")
+    assert verifier.calls == 1
+    assert cache.hits == 1
+
+
+def test_accounts_are_kept_apart():
+    cache = CredentialCache()
+    verifier = Verifier()
+
+    async def main():
+        await asyncio.gather(cache.fetch("bench", "password", verifier), cache.fetch("bench", "other", verifier))
+    asyncio.run(main())
+    assert verifier.calls == 2
+    assert len(cache) == 2
+
+
+def test_rejected_credentials_are_remembered():
+    cache = CredentialCache()
+    verifier = Verifier(InvalidCredentials("bench"))
+
+    async def main():
+        results = await asyncio.gather(*(cache.fetch("bench", "wrong", verifier) for _ in range(3)),
+                                       return_exceptions=True)
+        assert all(isinstance(result, InvalidCredentials) for result in results)
+        with pytest.raises(InvalidCredentials):
+            await cache.fetch("bench", "wrong", verifier)
+    asyncio.run(main())
+    assert verifier.calls == 1
+
+
+def test_other_errors_are_not_remembered():
+    cache = CredentialCache()
+    verifier = Verifier(ResponseError(503))
+
+    async def main():
+        for _ in range(2):
+            with pytest.raises(ResponseError):
+                await cache.fetch("bench", "password", verifier)
+        verifier.error = None
+        return await cache.fetch("bench", "password", verifier)
+    assert asyncio.run(main()) == ("1", "bench")
+    assert verifier.calls == 3
+
+
+def test_invalidate():
+    cache = CredentialCache()
+    verifier = Verifier()
+    asyncio.run(cache.fetch("bench", "password", verifier))
+    cache.invalidate("bench", "password")
+    asyncio.run(cache.fetch("bench", "password", verifier))
+    assert verifier.calls == 2
+
+
+def test_concurrent_searches_are_coalesced():
+    cache = ResponseCache()
+    fetcher = Fetcher()
+
+    async def main():
+        return await asyncio.gather(*(cache.fetch("anime_search", query, fetcher)
+                                      for query in ("Bebop", " bebop", "BEBOP  ")))
+    results = asyncio.run(main())
+    assert results == [["Cowboy Bebop", "Trigun"]] * 3
+    assert fetcher.calls == 1
+    assert cache.stats == {"hits": 0, "misses": 1, "coalesced": 2}
+    assert asyncio.run(cache.fetch("anime_search", "bebop", fetcher)) == ["Cowboy Bebop", "Trigun"]
+    assert fetcher.calls == 1
+    assert cache.hits == 1
+
+
+def test_variants_and_endpoints_are_kept_apart():
+    cache = ResponseCache()
+    fetcher = Fetcher()
+
+    async def main():
+        await asyncio.gather(cache.fetch("anime_search", "bebop", fetcher),
+                             cache.fetch("anime_search", "bebop", fetcher, variant="stream"),
+                             cache.fetch("manga_search", "bebop", fetcher))
+    asyncio.run(main())
+    assert fetcher.calls == 3
+
+
+def test_callers_get_their_own_list():
+    cache = ResponseCache()
+    fetcher = Fetcher()
+
+    async def main():
+        first, second = await asyncio.gather(*(cache.fetch("anime_search", "bebop", fetcher) for _ in range(2)))
+        first.append("Outlaw Star")
+        second.sort(reverse=True)
+        return await cache.fetch("anime_search", "bebop", fetcher)
+    assert asyncio.run(main()) == ["Cowboy Bebop", "Trigun"]
+
+
+def test_failed_searches_are_not_cached():
+    cache = ResponseCache()
+    fetcher = Fetcher(ResponseError(503))
+
+    async def main():
+        results = await asyncio.gather(*(cache.fetch("anime_search", "bebop", fetcher) for _ in range(3)),
+                                       return_exceptions=True)
+        assert all(isinstance(result, ResponseError) for result in results)
+        fetcher.error = None
+        return await cache.fetch("anime_search", "bebop", fetcher)
+    assert asyncio.run(main()) == ["Cowboy Bebop", "Trigun"]
+    assert fetcher.calls == 2
@@ -0,0 +1,84 @@
+import copy
+
+import pytest
+from fake_mal import user_series
+from lxml import etree
+
+from pyanimelist.columnar import UserList
+from pyanimelist.enumerations import AnimeStatus, MangaStatus
+from pyanimelist.errors import InvalidSeriesTypeException
+
+
+def _anime(size: int = 10) -> UserList:
+    return UserList.from_xml(etree.fromstring(user_series(size, "anime")), "anime")
+
+
+def test_from_xml_fills_every_column():
+    user_list = _anime()
+    assert len(user_list) == 10
+    assert list(user_list.ids) == list(range(10))
+    assert list(user_list.totals) == list(range(1, 11))
+    assert list(user_list.progress) == list(range(10))
+    assert list(user_list.statuses) == [1, 2, 3, 4, 6] * 2
+    assert user_list.titles[3] == "Title 3"
+    assert user_list.info is not None
+    assert user_list[3] == {"ids": 3, "types": 1, "totals": 4, "progress": 3, "scores": 3, "statuses": 4,
+                            "last_updated": 1400000003, "title": "Title 3"}
+    assert [row["ids"] for row in user_list] == list(range(10))
+
+
+def test_manga_columns():
+    user_list = UserList.from_xml(etree.fromstring(user_series(5, "manga")), "manga")
+    assert list(user_list.totals) == [1, 2, 3, 4, 5]
+    assert user_list.status_counts()[MangaStatus.PLAN_TO_READ] == 1
+
+
+def test_missing_numbers_are_zero():
+    root = etree.fromstring(
+        b"<myanimelist><anime><series_animedb_id>1</series_animedb_id><series_title>Bebop</series_title>"
+        b"<my_score></my_score></anime></myanimelist>"
+    )
+    user_list = UserList.from_xml(root, "anime")
+    assert user_list[0] == {"ids": 1, "types": 0, "totals": 0, "progress": 0, "scores": 0, "statuses": 0,
+                            "last_updated": 0, "title": "Bebop"}
+    assert user_list.info is None
+
+
+def test_unknown_series_type():
+    with pytest.raises(InvalidSeriesTypeException):
+        UserList("novel")
+
+
+def test_filter_and_status():
+    user_list = _anime()
+    filtered = user_list.filter(score >= 5 for score in user_list.scores)
+    assert list(filtered.scores) == [5, 6, 7, 8, 9]
+    assert filtered.titles == ["Title 5", "Title 6", "Title 7", "Title 8", "Title 9"]
+    completed = user_list.with_status(AnimeStatus.COMPLETED)
+    assert list(completed.ids) == [1, 6]
+    assert list(user_list.with_status(2).ids) == [1, 6]
+    groups = user_list.group_by_status()
+    assert list(groups) == list(AnimeStatus)
+    assert all(len(group) == 2 for group in groups.values())
+    assert user_list.status_counts() == {status: 2 for status in AnimeStatus}
+
+
+def test_aggregates():
+    user_list = _anime()
+    assert user_list.score_distribution() == {score: 1 for score in range(1, 10)}
+    assert user_list.mean_score() == 5.0
+    assert user_list.completion_rate() == 0.2
+    assert user_list.total_progress() == 45
+    empty = UserList("anime")
+    assert empty.mean_score() is None
+    assert empty.completion_rate() is None
+    assert empty.total_progress() == 0
+
+
+def test_copies_have_their_own_columns():
+    user_list = _anime(3)
+    copied = copy.copy(user_list)
+    copied.ids.append(99)
+    copied.titles.append("Extra")
+    assert len(user_list) == 3 and user_list.titles == ["Title 0", "Title 1", "Title 2"]
+    assert copied.info is user_list.info
@@ -0,0 +1,55 @@
+from datetime import date
+
+import pytest
+
+from pyanimelist import ANIME_ENTRY, MANGA_ENTRY, AnimeStatus, MangaStatus
+from pyanimelist.errors import InvalidEntryField
+
+
+def test_to_xml_orders_escapes_and_resolves_aliases():
+    xml = ANIME_ENTRY.to_xml({
+        "tags": ["mecha", "space"], "comments": "<great> & fun", "episodes": 3, "status": AnimeStatus.WATCHING,
+        "date_started": date(2017, 1, 2), "enable_rewatching": True, "score": None
+    })
+    assert xml == (
+        '<?xml version="1.0" encoding="UTF-8"?><entry><episode>3</episode><status>1</status>'
+        '<date_start>01022017</date_start><enable_rewatching>1</enable_rewatching>'
+        '<comments>&lt;great&gt; &amp; fun</comments><tags>mecha,space</tags></entry>'
+    )
+
+
+def test_manga_fields():
+    assert MANGA_ENTRY.validate({"chapters": 10, "volumes": 2, "status": 6, "date_finish": "12312016"}) == {
+        "chapter": "10", "volume": "2", "status": "6", "date_finish": "12312016"
+    }
+    assert MANGA_ENTRY.validate({"status": MangaStatus.PLAN_TO_READ}) == {"status": "6"}
+
+
+@pytest.mark.parametrize("value, expected", [(True, "1"), (False, "0"), (1, "1"), (0, "0")])
+def test_flag_accepts_bools_and_0_or_1(value, expected):
+    assert ANIME_ENTRY.validate({"enable_discussion": value}) == {"enable_discussion": expected}
+
+
+@pytest.mark.parametrize("field, value", [
+    ("enable_discussion", 1.0),
+    ("enable_discussion", 0.0),
+    ("enable_discussion", 2),
+    ("enable_discussion", "1"),
+    ("tags", ["mecha", 1]),
+    ("tags", ("mecha", None)),
+    ("tags", 5),
+    ("score", 11),
+    ("score", True),
+    ("episode", -1),
+    ("episode", "3"),
+    ("status", 5),
+    ("status", MangaStatus.READING),
+    ("date_start", "2017-01-02"),
+    ("comments", 3),
+    ("volume", 1)
+])
+def test_invalid_values_raise_invalid_entry_field(field, value):
+    with pytest.raises(InvalidEntryField) as raised:
+        ANIME_ENTRY.to_xml({field: value})
+    assert raised.value.field == field
+    assert raised.value.value == value
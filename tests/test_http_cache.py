@@ -0,0 +1,44 @@
+from pyanimelist import HTTPCache, SyncPyAnimeList
+
+
+def test_not_modified_reuses_parsed_result(server):
+    cache = HTTPCache(":memory:", ttls={"malappinfo": 0})
+    with SyncPyAnimeList("bench", "bench", http_cache=cache) as client:
+        first = client.get_user_series("bench", "anime")
+        second = client.get_user_series("bench", "anime")
+        parsed = client.client.parse_executor.inline
+        # Parsed into something else, so parsed again
+        columnar = client.get_user_series("bench", "anime", columnar=True)
+    assert second == first and second is not first
+    assert len(columnar) == len(first) == 5
+    assert parsed == 1
+    assert cache.stats == {"hits": 0, "revalidated": 2, "misses": 1}
+    assert server.requests == 3
+
+
+def test_fresh_hit_reuses_parsed_result(server):
+    cache = HTTPCache(":memory:")
+    with SyncPyAnimeList("bench", "bench", http_cache=cache) as client:
+        first = client.search_all_anime("naruto")
+        second = client.search_all_anime("naruto")
+        assert second == first and second is not first
+        # Sharing the series, not the list
+        assert second[0] is first[0]
+        first.clear()
+        assert client.search_all_anime("naruto") == second
+        cache.clear()
+        # The parsed result went with the response
+        third = client.search_all_anime("naruto")
+        assert third == second and third[0] is not second[0]
+    assert server.requests == 2
+
+
+def test_parsed_result_of_replaced_response_is_dropped():
+    cache = HTTPCache(":memory:")
+    generation = cache.set("key", b"old", '"1"', None)
+    cache.set("key", b"new", '"2"', None)
+    # Parsed from the old body after the new one was stored
+    cache.keep_parsed("key", "variant", generation, "old")
+    assert cache.parsed("key", "variant") == (False, None)
+    cache.keep_parsed("key", "variant", cache.generation("key"), "new")
+    assert cache.parsed("key", "variant") == (True, "new")
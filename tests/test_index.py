@@ -0,0 +1,47 @@
+import pytest
+from fake_mal import search
+
+from pyanimelist import Anime, SyncPyAnimeList, TitleIndex
+from pyanimelist.client import _parse_anime_search
+
+
+def test_add_leaves_lazy_results_lazy():
+    results = _parse_anime_search(search(3, "anime"))
+    index = TitleIndex()
+    assert index.update(results) == 3
+    for item in results:
+        # The callers objects still read from their element, and only what the index needed was decoded on them
+        assert item._element is not None
+        with pytest.raises(AttributeError):
+            Anime.cover.__get__(item, Anime)
+    held = index.get("anime", results[0].id)
+    assert held is not results[0]
+    assert held._element is None
+    assert held == results[0]
+    assert index.resolve(results[0].titles.jp) == results[0].id
+
+
+def test_search_from_index_returns_copies(server):
+    index = TitleIndex()
+    with SyncPyAnimeList("bench", "bench", title_index=index) as client:
+        searched = client.search_all_anime("naruto")
+        first = client.search_all_anime("naruto", from_index=True)
+        first[0].titles.synonyms.append("Mutated")
+        first[0].status = "Mutated"
+        second = client.search_all_anime("naruto", from_index=True)
+        trimmed = client.search_all_anime("naruto", fields=("id", "synopsis"), from_index=True)
+    assert server.requests == 1
+    assert sorted(second, key=lambda anime: anime.id) == sorted(searched, key=lambda anime: anime.id)
+    assert index.get("anime", first[0].id).status != "Mutated"
+    assert all(anime.titles is None and anime.id is not None and anime.synopsis is not None for anime in trimmed)
+
+
+def test_search_from_index_asks_mal_for_fields_users_lists_lack(server):
+    index = TitleIndex()
+    with SyncPyAnimeList("bench", "bench", title_index=index) as client:
+        client.get_user_series("bench", "anime")
+        covers = client.search_all_anime("title", fields=("id", "cover"), from_index=True)
+        assert server.requests == 1
+        assert len(covers) == 5 and all(anime.cover is not None and anime.type is None for anime in covers)
+        client.search_all_anime("title", from_index=True)
+        assert server.requests == 2
@@ -0,0 +1,101 @@
+import logging
+
+from pyanimelist import SyncPyAnimeList
+from pyanimelist.metrics import Histogram, LoggingSink, MemorySink, Metrics, PrometheusSink
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram((0.1, 1.0))
+    assert histogram.mean is None
+    assert histogram.quantile(0.5) is None
+    for value in (0.05, 0.1, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+    # Values on a bound count towards that bucket
+    assert histogram.counts == [2, 2, 1]
+    assert histogram.count == 5
+    assert histogram.mean == 1.23
+    assert histogram.quantile(0.4) == 0.1
+    assert histogram.quantile(0.5) == 1.0
+    assert histogram.quantile(0.99) == float("inf")
+
+
+def test_memory_sink():
+    sink = MemorySink(buckets=(1.0,))
+    sink.increment("requests", (("endpoint", "search"), ("status", "200")))
+    sink.increment("requests", (("endpoint", "search"), ("status", "503")), 2)
+    sink.increment("requests", (("endpoint", "malappinfo"), ("status", "200")))
+    sink.observe("ttfb", (("endpoint", "search"),), 0.5)
+    assert sink.counter("requests") == 4
+    assert sink.counter("requests", endpoint="search") == 3
+    assert sink.counter("requests", endpoint="search", status="503") == 2
+    assert sink.counter("missing") == 0
+    assert sink.histogram("ttfb", endpoint="search").count == 1
+    assert sink.histogram("ttfb", endpoint="malappinfo") is None
+    snapshot = sink.snapshot()
+    assert snapshot["requests"][0] == {"endpoint": "malappinfo", "status": "200", "value": 1}
+    assert snapshot["ttfb"] == [{"endpoint": "search", "count": 1, "sum": 0.5, "mean": 0.5, "p50": 1.0, "p99": 1.0}]
+    sink.clear()
+    assert sink.snapshot() == {}
+
+
+def test_prometheus_rendering():
+    sink = PrometheusSink(buckets=(0.1, 1.0))
+    sink.increment("pyanimelist_requests_total", (("endpoint", 'say "hi"'),))
+    sink.observe("pyanimelist_ttfb_seconds", (("endpoint", "search"),), 0.5)
+    sink.observe("pyanimelist_ttfb_seconds", (("endpoint", "search"),), 2.0)
+    assert sink.render().splitlines() == [
+        "# TYPE pyanimelist_requests_total counter",
+        'pyanimelist_requests_total{endpoint="say \\"hi\\""} 1',
+        "# TYPE pyanimelist_ttfb_seconds histogram",
+        'pyanimelist_ttfb_seconds_bucket{endpoint="search",le="0.1"} 0',
+        'pyanimelist_ttfb_seconds_bucket{endpoint="search",le="1.0"} 1',
+        'pyanimelist_ttfb_seconds_bucket{endpoint="search",le="+Inf"} 2',
+        'pyanimelist_ttfb_seconds_sum{endpoint="search"} 2.5',
+        'pyanimelist_ttfb_seconds_count{endpoint="search"} 2',
+    ]
+
+
+def test_logging_sink(caplog):
+    sink = LoggingSink(level=logging.INFO)
+    with caplog.at_level(logging.INFO, logger="pyanimelist.metrics"):
+        sink.increment("requests", (("endpoint", "search"),), 2)
+        sink.observe("ttfb", (("endpoint", "search"),), 0.25)
+    assert [record.getMessage() for record in caplog.records] == [
+        "requests{'endpoint': 'search'} +2", "ttfb{'endpoint': 'search'} 0.250000"
+    ]
+    caplog.clear()
+    # Nothing is formatted below the level
+    with caplog.at_level(logging.WARNING, logger="pyanimelist.metrics"):
+        sink.increment("requests", (), 1)
+    assert not caplog.records
+
+
+def test_metrics_recorders():
+    metrics = Metrics()
+    metrics.downloaded("search", 1000, 0.01)
+    metrics.transferred("search", 250, 1000, 500)
+    metrics.transferred("search", 0, 0, 0)
+    metrics.parsed("parse_anime_search", 0.002, 5)
+    metrics.parsed("parse_user_data", 0.001)
+    metrics.retried("search", 503)
+    metrics.cache("response", "hit")
+    sink = metrics.sink
+    assert sink.counter("pyanimelist_response_bytes_total", endpoint="search") == 1000
+    assert sink.counter("pyanimelist_wire_bytes_total") == 250
+    # Only bodies that decoded to something have a ratio
+    assert sink.histogram("pyanimelist_compression_ratio", endpoint="search").sum == 0.25
+    assert sink.counter("pyanimelist_entries_total") == 5
+    assert sink.histogram("pyanimelist_parse_seconds", parser="parse_user_data").count == 1
+    assert sink.counter("pyanimelist_retries_total", status="503") == 1
+    assert sink.counter("pyanimelist_cache_total", cache="response", result="hit") == 1
+
+
+def test_client_requests_are_recorded(server):
+    metrics = Metrics()
+    with SyncPyAnimeList("bench", "bench", metrics=metrics) as client:
+        client.get_user_series("bench", "anime")
+        client.search_all_anime("naruto")
+    sink = metrics.sink
+    assert sink.counter("pyanimelist_requests_total", status="200") == 2
+    assert sink.histogram("pyanimelist_ttfb_seconds", endpoint="anime_search").count == 1
+    assert sink.counter("pyanimelist_entries_total") == 10
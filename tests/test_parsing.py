@@ -0,0 +1,32 @@
+from pyanimelist import Anime
+from pyanimelist.util.parsing import clean_synopsis
+
+
+def test_bbcode_and_html_are_stripped():
+    assert clean_synopsis("[b]Naruto[/b] is [i]loud[/i].<br />[url=https://myanimelist.net]More[/url]") == \
+        "Naruto is loud.More"
+    assert clean_synopsis('[*]One <a href="https://myanimelist.net">two</a> <SPAN class="x">three</SPAN>') == \
+        "One two three"
+
+
+def test_entities_are_unescaped_once():
+    assert clean_synopsis("&quot;Believe it&quot; &#39;a&#x27; &mdash;") == "\"Believe it\" 'a' —"
+    # The result of unescaping isn't unescaped again
+    assert clean_synopsis("&amp;lt;br /&amp;gt;") == "&lt;br /&gt;"
+
+
+def test_text_that_only_looks_like_markup_is_kept():
+    assert clean_synopsis("5 < 6 [Written by MAL Rewrite]") == "5 < 6 [Written by MAL Rewrite]"
+    assert clean_synopsis("a & b") == "a & b"
+
+
+def test_empty_synopses():
+    assert clean_synopsis(None) is None
+    assert clean_synopsis("") == ""
+
+
+def test_anime_cleans_its_synopsis_on_first_read():
+    anime = Anime(id=1, synopsis="[b]Bebop[/b] &amp; friends")
+    assert anime._synopsis is None
+    assert anime.synopsis == "Bebop & friends"
+    assert anime._synopsis == "Bebop & friends"
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from pyanimelist.ratelimit import EndpointLimiter, RateLimiter
+
+
+async def _requests(limiter, statuses):
+    for status in statuses:
+        await limiter.acquire()
+        limiter.release(status)
+
+
+def test_throttling_halves_concurrency():
+    limiter = EndpointLimiter(rate=1000, burst=100, concurrency=8)
+    asyncio.run(_requests(limiter, [429, 503]))
+    assert limiter.state["concurrency"] == 2
+    assert limiter.throttled == 2
+    asyncio.run(_requests(limiter, [500] * 5))
+    # Never below one
+    assert limiter.concurrency == 1.0
+
+
+def test_successes_grow_concurrency_back():
+    limiter = EndpointLimiter(rate=1000, burst=100, concurrency=4)
+    asyncio.run(_requests(limiter, [429, 429]))
+    assert limiter.concurrency == 1.0
+    # Each success adds one over the current limit, so it takes a limits worth of them to grow by one
+    asyncio.run(_requests(limiter, [200]))
+    assert limiter.concurrency == 2.0
+    asyncio.run(_requests(limiter, [200, 200]))
+    assert limiter.concurrency == pytest.approx(2.9)
+    assert limiter.state["concurrency"] == 2
+    asyncio.run(_requests(limiter, [200] * 20))
+    assert limiter.concurrency == 4.0
+
+
+def test_not_adaptive():
+    limiter = EndpointLimiter(rate=1000, burst=100, concurrency=4, adaptive=False)
+    asyncio.run(_requests(limiter, [429, 503]))
+    assert limiter.concurrency == 4.0
+    assert limiter.throttled == 2
+
+
+def test_shrunk_limit_holds_requests_back():
+    async def main():
+        limiter = EndpointLimiter(rate=1000, burst=100, concurrency=2)
+        await _requests(limiter, [429])
+        await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        limiter.release(200)
+        await asyncio.wait_for(waiting, 1)
+        assert limiter.in_flight == 1
+        limiter.release(200)
+    asyncio.run(main())
+
+
+def test_retry_after_pauses_group():
+    async def main():
+        limiter = EndpointLimiter(rate=1000, burst=100, concurrency=4)
+        await limiter.acquire()
+        limiter.release(429, retry_after=0.1)
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        await limiter.acquire()
+        limiter.release(200)
+        return loop.time() - start
+    assert asyncio.run(main()) >= 0.09
+
+
+def test_writes_are_not_retried_on_gateway_errors():
+    limiter = RateLimiter()
+    assert limiter.should_retry(502, 0, "search")
+    assert not limiter.should_retry(502, 0, "writes")
+    assert not limiter.should_retry(504, 0, "writes")
+    assert limiter.should_retry(429, 0, "writes") and limiter.should_retry(503, 0, "writes")
+    assert not limiter.should_retry(503, limiter.max_retries, "writes")
+    limiter = RateLimiter(retry_statuses={"search": (429,)})
+    assert not limiter.should_retry(503, 0, "search")
+    assert limiter.should_retry(502, 0, "malappinfo")
@@ -0,0 +1,67 @@
+import os
+
+from pyanimelist.scraper import _parse_details, _parse_statistics
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def test_parse_details():
+    details = _parse_details(fixture("anime_details.html"), "anime", 5114)
+    assert details.id == 5114
+    assert details.series_type == "anime"
+    assert details.title == "Fullmetal Alchemist: Brotherhood"
+    assert details.type == "TV"
+    assert details.episodes == 64
+    assert details.status == "Finished Airing"
+    assert details.aired == "Apr 5, 2009 to Jul 4, 2010"
+    assert details.studios == ["Bones"]
+    assert details.genres == ["Action", "Adventure"]
+    assert details.synopsis.startswith("After a horrific alchemy experiment")
+    assert details.authors is None
+
+
+def test_parse_details_ignores_footnote_markers():
+    details = _parse_details(fixture("anime_details.html"), "anime", 5114)
+    # <sup>1</sup> and <sup>2</sup> follow the score and rank
+    assert details.score == 9.10
+    assert details.ranked == 28
+    assert details.popularity == 3
+    assert details.members == 3377457
+    assert details.favorites == 226134
+
+
+def test_parse_details_related():
+    related = _parse_details(fixture("anime_details.html"), "anime", 5114).related
+    assert [(entry.relation, entry.series_type, entry.id) for entry in related] == [
+        ("Adaptation", "manga", 25),
+        ("Alternative version", "anime", 121),
+        ("Side story", "anime", 6421),
+        ("Side story", "anime", 9135)
+    ]
+    assert related[3].title == "Fullmetal Alchemist: The Sacred Star of Milos"
+
+
+def test_parse_statistics():
+    statistics = _parse_statistics(fixture("anime_stats.html"), "anime", 5114)
+    assert statistics.id == 5114
+    assert statistics.watching == 157003
+    assert statistics.completed == 2734588
+    assert statistics.on_hold == 83210
+    assert statistics.dropped == 52114
+    assert statistics.plan_to_watch == 350542
+    assert statistics.plan_to_read is None
+    assert statistics.total == 3377457
+    assert statistics.scores == [8712, 0, 0, 0, 0, 0, 0, 195576, 471342, 1222886]
+
+
+def test_parse_details_missing_fields():
+    details = _parse_details(b"<html><body><h1>Nothing</h1></body></html>", "manga", 1)
+    assert details.title == "Nothing"
+    assert details.score is None
+    assert details.genres == []
+    assert details.related == []
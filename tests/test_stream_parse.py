@@ -0,0 +1,22 @@
+from pyanimelist import ParseExecutor, SyncPyAnimeList
+
+
+def test_build_goes_through_parse_executor(server):
+    executor = ParseExecutor(threshold=1)
+    with SyncPyAnimeList("bench", "bench", parse_executor=executor, stream_parse=True) as client:
+        assert len(client.get_user_series("bench", "anime")) == 5
+        assert len(client.search_all_manga("naruto")) == 5
+    assert executor.offloaded == 2
+    assert executor.inline == 0
+    # Feeding the parser happened on the loop, so it's counted as blocking
+    assert executor.blocked > 0
+    assert 0 < executor.max_blocked <= executor.blocked
+
+
+def test_small_build_is_counted_as_blocking(server):
+    executor = ParseExecutor()
+    with SyncPyAnimeList("bench", "bench", parse_executor=executor, stream_parse=True) as client:
+        series = client.get_user_series("bench", "anime")
+    assert [entry.id for entry in series] == list(range(5))
+    assert executor.inline == 1
+    assert executor.max_blocked > 0
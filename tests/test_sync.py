@@ -0,0 +1,112 @@
+import asyncio
+
+from fake_mal import user_series
+
+from pyanimelist import ListSync, ParseExecutor, PyAnimeList
+
+_ADDED, _CHANGED, _REMOVED = "added", "changed", "removed"
+
+
+def test_first_apply_adds_everything():
+    sync = ListSync(None)
+    changes = sync.apply("bench", "anime", user_series(3, "anime"))
+    assert [(change.kind, change.series_id) for change in changes] == [(_ADDED, 0), (_ADDED, 1), (_ADDED, 2)]
+    snapshot = sync.snapshot("bench", "anime")
+    assert sorted(snapshot.entries) == [0, 1, 2]
+    assert snapshot.info is not None
+
+
+def test_identical_response_is_skipped():
+    sync = ListSync(None)
+    body = user_series(3, "anime")
+    sync.apply("bench", "anime", body)
+    assert sync.apply("bench", "anime", body) == []
+
+
+def test_changed_entry_is_updated_in_place():
+    sync = ListSync(None)
+    body = user_series(3, "anime")
+    sync.apply("bench", "anime", body)
+    entry = sync.snapshot("bench", "anime").entries[1]
+    assert entry.watched_episodes == 1
+    changed = body.replace(b"<my_watched_episodes>1</my_watched_episodes>",
+                           b"<my_watched_episodes>5</my_watched_episodes>")
+    changed = changed.replace(b"<my_last_updated>1400000001</my_last_updated>",
+                              b"<my_last_updated>1500000000</my_last_updated>")
+    changes = sync.apply("bench", "anime", changed)
+    assert len(changes) == 1
+    change = changes[0]
+    assert (change.kind, change.series_id) == (_CHANGED, 1)
+    assert change.entry is entry
+    assert entry.watched_episodes == 5
+    assert change.previous.watched_episodes == 1
+
+
+def test_unchanged_last_updated_isnt_reparsed():
+    sync = ListSync(None)
+    body = user_series(3, "anime")
+    sync.apply("bench", "anime", body)
+    # Different body, same my_last_updated, so the entry is trusted to be unchanged
+    changed = body.replace(b"<my_watched_episodes>1</my_watched_episodes>",
+                           b"<my_watched_episodes>5</my_watched_episodes>")
+    assert sync.apply("bench", "anime", changed) == []
+    assert sync.snapshot("bench", "anime").entries[1].watched_episodes == 1
+
+
+def test_removed_and_added_entries():
+    sync = ListSync(None)
+    sync.apply("bench", "manga", user_series(3, "manga"))
+    changes = sync.apply("bench", "manga", user_series(2, "manga"))
+    assert [(change.kind, change.series_id) for change in changes] == [(_REMOVED, 2)]
+    assert sorted(sync.snapshot("bench", "manga").entries) == [0, 1]
+    changes = sync.apply("bench", "manga", user_series(4, "manga"))
+    assert [(change.kind, change.series_id) for change in changes] == [(_ADDED, 2), (_ADDED, 3)]
+
+
+def test_forget():
+    sync = ListSync(None)
+    sync.apply("bench", "anime", user_series(2, "anime"))
+    sync.forget("bench", "anime")
+    assert sync.snapshot("bench", "anime") is None
+    assert len(sync.apply("bench", "anime", user_series(2, "anime"))) == 2
+
+
+def test_entries_without_last_updated_are_added():
+    sync = ListSync(None)
+    body = user_series(3, "anime")
+    for i in range(3):
+        body = body.replace("<my_last_updated>{}</my_last_updated>".format(1400000000 + i).encode(), b"")
+    changes = sync.apply("bench", "anime", body)
+    assert [(change.kind, change.series_id) for change in changes] == [(_ADDED, 0), (_ADDED, 1), (_ADDED, 2)]
+    # Still no timestamp, so nothing to tell a change by
+    changed = body.replace(b"<my_watched_episodes>1</my_watched_episodes>",
+                           b"<my_watched_episodes>5</my_watched_episodes>")
+    assert sync.apply("bench", "anime", changed) == []
+    # Getting one counts as a change
+    dated = body.replace(b"<my_watched_episodes>1</my_watched_episodes>",
+                         b"<my_watched_episodes>5</my_watched_episodes><my_last_updated>1500000000</my_last_updated>")
+    assert [(change.kind, change.series_id) for change in sync.apply("bench", "anime", dated)] == [(_CHANGED, 1)]
+
+
+def test_entries_without_an_id_are_skipped():
+    sync = ListSync(None)
+    body = user_series(3, "anime").replace(b"<series_animedb_id>1</series_animedb_id>", b"")
+    changes = sync.apply("bench", "anime", body)
+    assert [(change.kind, change.series_id) for change in changes] == [(_ADDED, 0), (_ADDED, 2)]
+
+
+def test_refresh_parses_through_parse_executor(server):
+    async def main():
+        client = PyAnimeList("bench", "bench", parse_executor=ParseExecutor(threshold=1))
+        try:
+            sync = ListSync(client)
+            added = await sync.refresh("bench", "anime")
+            # Identical responses aren't parsed at all
+            assert await sync.refresh("bench", "anime") == []
+            return added, client.parse_executor
+        finally:
+            await client.close()
+    added, executor = asyncio.run(main())
+    assert len(added) == 5
+    assert executor.offloaded == 1
+    assert executor.inline == 0
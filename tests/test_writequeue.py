@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from pyanimelist import WriteQueue
+
+
+class Sender(object):
+
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.sent = []
+        self.log = []
+
+    async def __call__(self, fields):
+        self.log.append(("start", dict(fields)))
+        await asyncio.sleep(self.delay)
+        self.log.append(("end", dict(fields)))
+        if self.error is not None:
+            raise self.error
+        self.sent.append(dict(fields))
+        return True
+
+
+def test_updates_are_merged():
+    async def main():
+        queue = WriteQueue(debounce=0.02)
+        send = Sender()
+        futures = [queue.put(1, {"episode": episode}, send) for episode in range(1, 4)]
+        futures.append(queue.put(1, {"score": 7}, send))
+        assert await asyncio.gather(*futures) == [True] * 4
+        return queue, send
+    queue, send = asyncio.run(main())
+    # Later fields win
+    assert send.sent == [{"episode": 3, "score": 7}]
+    assert queue.stats == {"queued": 4, "coalesced": 3, "sent": 1, "failed": 0, "pending": 0, "in_flight": 0}
+
+
+def test_debounce_waits_for_quiet():
+    async def main():
+        queue = WriteQueue(debounce=0.05, max_delay=10)
+        send = Sender()
+        for episode in range(5):
+            queue.put(1, {"episode": episode}, send)
+            await asyncio.sleep(0.02)
+        # Every update pushed the send back
+        assert send.sent == []
+        await asyncio.sleep(0.1)
+        return send
+    assert asyncio.run(main()).sent == [{"episode": 4}]
+
+
+def test_max_delay_caps_debounce():
+    async def main():
+        queue = WriteQueue(debounce=0.05, max_delay=0.1)
+        send = Sender()
+        for episode in range(15):
+            queue.put(1, {"episode": episode}, send)
+            await asyncio.sleep(0.02)
+        await queue.flush()
+        return send
+    # Sent before the updates stopped coming in, and again at the end
+    assert len(asyncio.run(main()).sent) >= 2
+
+
+def test_max_pending_sends_everything():
+    async def main():
+        queue = WriteQueue(debounce=10, max_pending=2)
+        send = Sender()
+        first = queue.put(1, {"episode": 1}, send)
+        second = queue.put(2, {"episode": 1}, send)
+        await asyncio.wait_for(asyncio.gather(first, second), 1)
+        return queue
+    assert asyncio.run(main()).sent == 2
+
+
+def test_writes_to_same_entry_are_ordered():
+    async def main():
+        queue = WriteQueue(debounce=0)
+        send = Sender(delay=0.05)
+        first = queue.put(1, {"episode": 1}, send)
+        # Sent as its own request while the first is still in flight
+        await asyncio.sleep(0.01)
+        second = queue.put(1, {"episode": 2}, send)
+        await asyncio.gather(first, second)
+        return send
+    assert asyncio.run(main()).log == [
+        ("start", {"episode": 1}), ("end", {"episode": 1}), ("start", {"episode": 2}), ("end", {"episode": 2})
+    ]
+
+
+def test_failures_reach_every_future():
+    async def main():
+        queue = WriteQueue(debounce=0)
+        send = Sender(error=ValueError("rejected"))
+        futures = [queue.put(1, {"episode": 1}, send), queue.put(1, {"score": 2}, send)]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        return queue, results
+    queue, results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert queue.failed == 1
+
+
+def test_cancel_drops_waiting_updates():
+    async def main():
+        queue = WriteQueue(debounce=10)
+        send = Sender()
+        future = queue.put(1, {"episode": 1}, send)
+        queue.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await future
+        return send, queue
+    send, queue = asyncio.run(main())
+    assert send.sent == []
+    assert len(queue) == 0